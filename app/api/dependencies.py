@@ -1,11 +1,10 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 from app.crud.user import get_user_by_id
 from app.database.session import SessionLocal
-from app.models.user import User
+from app.user_cache import CurrentUser, user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
@@ -13,7 +12,15 @@ async def get_db():
     async with SessionLocal() as session:
         yield session
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> CurrentUser:
+    """
+    The user the bearer token belongs to. Tokens that were verified recently are answered
+    from `user_cache` without decoding or touching the database.
+    """
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -26,7 +33,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = await get_user_by_id(db, user_id=user_id)
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+    async with SessionLocal() as db:
+        user = await get_user_by_id(db, user_id=user_id)
+        if user is None:
+            raise credentials_exception
+        current_user = CurrentUser.from_user(user)
+    user_cache.put(token, current_user, payload.get("exp"))
+    return current_user
\ No newline at end of file
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+import math
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.dependencies import get_current_user
 from app.crud.user import get_user_by_username
 from app.database.session import SessionLocal
-from app.models.user import User
+from app.user_cache import CurrentUser
 from app.schemas.auth import (
     LoginRequest,
     LoginResponse,
@@ -12,11 +13,23 @@ from app.schemas.auth import (
     PermissionCodesResponse,
     UserInfo,
 )
-from app.security import create_access_token, verify_password
+from app.core.config import settings
+from app.rate_limit import TokenBucketLimiter
+from app.security import PasswordHasherBusy, create_access_token, password_hasher
 
 
 router = APIRouter()
 
+login_limiter = TokenBucketLimiter(settings.LOGIN_RATE_BURST, settings.LOGIN_RATE_PER_MINUTE / 60)
+
+
+def too_many_requests(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many login attempts, try again later",
+        headers={"Retry-After": str(max(1, math.ceil(min(retry_after, 3600))))},
+    )
+
 
 async def get_db():
     async with SessionLocal() as session:
@@ -24,15 +37,36 @@ async def get_db():
 
 
 @router.post("/api/auth/login", response_model=LoginResponse)
-async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
+async def login(request: LoginRequest, http_request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Exchange username and password for an access token.
+
+    Attempts are rate limited per client IP and per username (429 with `Retry-After`), and
+    bcrypt runs on the bounded password hasher, which answers 429 when it is saturated.
+    A hash made with an outdated bcrypt cost is replaced on successful login.
+    """
+    client_ip = http_request.client.host if http_request.client else "unknown"
+    retry_after = max(
+        login_limiter.acquire(f"ip:{client_ip}"),
+        login_limiter.acquire(f"user:{request.username.lower()}"),
+    )
+    if retry_after > 0:
+        raise too_many_requests(retry_after)
+
     user = await get_user_by_username(db, username=request.username)
-    if not user or not verify_password(request.password, user.hashed_password):
+    valid, new_hash = False, None
+    if user:
+        try:
+            valid, new_hash = await password_hasher.verify_and_update(request.password, user.hashed_password)
+        except PasswordHasherBusy:
+            raise too_many_requests(1)
+    if not valid:
         raise HTTPException(
             status_code=403,
             detail="Incorrect username or password",
         )
     access_token = create_access_token(subject=user.id)
-    return LoginResponse(
+    response = LoginResponse(
         code=0,
         data=UserInfo(
             id=user.id,
@@ -42,10 +76,14 @@ async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)):
         ),
         message="ok",
     )
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        await db.commit()
+    return response
 
 
 @router.get("/api/auth/codes", response_model=PermissionCodesResponse)
-async def get_permission_codes(current_user: User = Depends(get_current_user)):
+async def get_permission_codes(current_user: CurrentUser = Depends(get_current_user)):
     """
     Get current user's permission codes.
     """
@@ -0,0 +1,64 @@
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query
+from app.coinmarket.snapshot import coin_snapshot
+
+router = APIRouter()
+
+def _split(value: Optional[str]) -> Optional[list[str]]:
+    return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
+@router.get("")
+async def query_coin_data(
+    sort: Literal["market_cap", "rank", "volume_24h", "percent_change_24h", "percent_change_7d"] = "market_cap",
+    limit: int = Query(100, ge=1, le=5000),
+    offset: int = Query(0, ge=0),
+    symbols: Optional[str] = None,
+    slugs: Optional[str] = None,
+    ids: Optional[str] = None,
+    min_market_cap: Optional[float] = None,
+    max_market_cap: Optional[float] = None,
+    exchange: Optional[str] = None,
+    include_metadata: bool = False,
+):
+    """
+    Query the locally ingested CoinMarketCap data, e.g. the top 50 coins by market cap with a
+    pair on an exchange (`?exchange=bybit_futures&limit=50`) or the metadata of some symbols
+    (`?symbols=BTC,ETH&include_metadata=true`). `symbols`, `slugs` and `ids` are comma separated.
+
+    Served from the in-memory coin snapshot, which is rebuilt after every ingestion run.
+    """
+    snapshot = coin_snapshot.current
+    if exchange is not None and exchange not in snapshot.exchange_pairs:
+        raise HTTPException(status_code=404, detail="Exchange not found")
+    try:
+        id_list = [int(i) for i in _split(ids)] if ids else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be integers")
+    result = snapshot.query(
+        sort=sort,
+        limit=limit,
+        offset=offset,
+        symbols=_split(symbols),
+        slugs=_split(slugs),
+        ids=id_list,
+        min_market_cap=min_market_cap,
+        max_market_cap=max_market_cap,
+        exchange=exchange,
+        include_metadata=include_metadata,
+    )
+    result["snapshot_at"] = snapshot.built_at
+    return {"code": 0, "data": result, "message": "ok"}
+
+@router.get("/status")
+async def get_coin_data_status():
+    snapshot = coin_snapshot.current
+    return {
+        "code": 0,
+        "data": {
+            "coins": len(snapshot.coins),
+            "with_metadata": sum(1 for meta in snapshot.metadata if meta is not None),
+            "exchanges": {exchange: len(pairs) for exchange, pairs in snapshot.exchange_pairs.items()},
+            "snapshot_at": snapshot.built_at,
+        },
+        "message": "ok",
+    }
\ No newline at end of file
@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, Body
 from sqlalchemy.ext.asyncio import AsyncSession
 from app import crud, schemas
 from app.api import dependencies
-from requests import Session
-from requests.exceptions import ConnectionError, Timeout, TooManyRedirects
+from app.coinmarket.client import cmc_client
+from app.coinmarket.ingest import coin_ingestor
+import httpx
 import json
 
 router = APIRouter()
@@ -32,6 +33,8 @@ async def create_or_update_coinmarket_config(
     coinmarket_in: schemas.CoinMarketCapCreate,
 ):
     await crud.coinmarket.create_or_update_coinmarket(db=db, coinmarket=coinmarket_in)
+    # Start ingesting with the new key / limits right away instead of at the next check.
+    coin_ingestor.notify()
     return {
         "code": 0,
         "data": None,
@@ -51,15 +54,8 @@ async def verify_coinmarket_api_key(
             "message": "API key is required."
         }
 
-    url = 'https://pro-api.coinmarketcap.com/v1/key/info'
-    headers = {
-        'Accepts': 'application/json',
-        'X-CMC_PRO_API_KEY': api_key,
-    }
-    session = Session()
-    session.headers.update(headers)
     try:
-        response = session.get(url)
+        response = await cmc_client.verify_key(api_key)
         r = response.json()
         if response.status_code == 200:
             return {
@@ -74,11 +70,11 @@ async def verify_coinmarket_api_key(
                 "error": r.get("status", {}),
                 "message": r.get("status", {}).get("error_message", "Unknown error")
             }
-    except (ConnectionError, Timeout, TooManyRedirects) as e:
+    except httpx.HTTPError as e:
         return {
             "code": -1,
             "data": None,
-            "error": {"error_message": str(e)},
+            "error": {"error_message": str(e) or type(e).__name__},
             "message": "Failed to connect to CoinMarketCap API."
         }
     except json.JSONDecodeError:
@@ -0,0 +1,38 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.metrics import registry
+from app.user_cache import user_cache
+from app.security import password_hasher
+from app.backtest.process import running_processes
+
+router = APIRouter()
+
+# Prometheus text exposition format, version 0.0.4
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _collect_app_state():
+    stats = user_cache.stats()
+    return [
+        "# HELP user_cache_lookups_total Authenticated-user cache lookups by result.",
+        "# TYPE user_cache_lookups_total counter",
+        f'user_cache_lookups_total{{result="hit"}} {stats["hits"]}',
+        f'user_cache_lookups_total{{result="miss"}} {stats["misses"]}',
+        "# HELP user_cache_entries Tokens currently cached.",
+        "# TYPE user_cache_entries gauge",
+        f"user_cache_entries {stats['entries']}",
+        "# HELP password_hash_pending Password hash/verify calls running or queued.",
+        "# TYPE password_hash_pending gauge",
+        f"password_hash_pending {password_hasher.pending}",
+        "# HELP backtest_processes_running Backtest subprocesses started by this process.",
+        "# TYPE backtest_processes_running gauge",
+        f"backtest_processes_running {len(running_processes)}",
+    ]
+
+registry.add_collector(_collect_app_state)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Request, database and I/O metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(registry.expose(), media_type=CONTENT_TYPE)
\ No newline at end of file
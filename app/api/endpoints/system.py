@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.dependencies import get_db, get_current_user
-from app.models.user import User
+from app.user_cache import CurrentUser, user_cache
+from app.database.instrumentation import query_stats
 from app.schemas.department import DepartmentCreate, DepartmentListResponse
 from app.schemas.api_key import ApiKeyCreate, ApiKeyListResponse, ApiKey
 from app.crud import department as crud_department
@@ -10,27 +12,27 @@ from app.crud import api_key as crud_api_key
 router = APIRouter()
 
 @router.get("/api/system/dept/list", response_model=DepartmentListResponse)
-async def get_department_list(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_department_list(db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     departments = await crud_department.get_departments(db)
     return DepartmentListResponse(code=0, data=departments, message="ok")
 
 @router.post("/api/system/dept", status_code=200)
-async def create_department(department: DepartmentCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_department(department: DepartmentCreate, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     await crud_department.create_department(db, department=department)
     return {"code": 0, "message": "ok"}
 
 @router.get("/api/system/exchanges", response_model=ApiKeyListResponse)
-async def get_api_key_list(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_api_key_list(db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     api_keys = await crud_api_key.get_api_keys(db)
     return ApiKeyListResponse(code=0, data=api_keys, message="ok")
 
 @router.post("/api/system/exchanges", status_code=200)
-async def create_api_key(api_key: ApiKeyCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_api_key(api_key: ApiKeyCreate, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     await crud_api_key.create_api_key(db, api_key=api_key)
     return {"code": 0, "message": "ok"}
 
 @router.put("/api/system/exchanges/{id}", status_code=200)
-async def update_api_key(id: int, api_key: ApiKeyCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_api_key(id: int, api_key: ApiKeyCreate, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     db_api_key = await crud_api_key.get_api_key(db, id=id)
     if not db_api_key:
         raise HTTPException(status_code=404, detail="API Key not found")
@@ -38,6 +40,29 @@ async def update_api_key(id: int, api_key: ApiKeyCreate, db: AsyncSession = Depe
     return {"code": 0, "message": "ok"}
 
 @router.delete("/api/system/exchanges/{id}", status_code=200)
-async def delete_api_key(id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_api_key(id: int, db: AsyncSession = Depends(get_db), current_user: CurrentUser = Depends(get_current_user)):
     await crud_api_key.delete_api_key(db, id=id)
+    return {"code": 0, "message": "ok"}
+
+@router.get("/api/system/user-cache", status_code=200)
+async def get_user_cache_stats(current_user: CurrentUser = Depends(get_current_user)):
+    """
+    Hit/miss counters and size of the authenticated-user cache.
+    """
+    return {"code": 0, "data": user_cache.stats(), "message": "ok"}
+
+@router.get("/api/system/sql-stats", status_code=200)
+async def get_sql_stats(
+    sort: Literal["total_seconds", "calls", "max_seconds", "avg_seconds", "rows", "slow"] = "total_seconds",
+    limit: int = Query(20, ge=1, le=500),
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    The most expensive SQL statement templates since startup (or the last reset).
+    """
+    return {"code": 0, "data": {"since": query_stats.started_at, "templates": query_stats.top(sort, limit)}, "message": "ok"}
+
+@router.delete("/api/system/sql-stats", status_code=200)
+async def reset_sql_stats(current_user: CurrentUser = Depends(get_current_user)):
+    query_stats.reset()
     return {"code": 0, "message": "ok"}
\ No newline at end of file
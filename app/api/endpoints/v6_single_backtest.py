@@ -1,12 +1,22 @@
 import os
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
+from datetime import datetime
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 import json
-import pandas as pd
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import dependencies
+from app.backtest.scheduler import scheduler
+from app.backtest.gc import garbage_collector
+from app.backtest.storage import artifact_storage
+from app.backtest.http_cache import cached_response, make_etag
+from app.backtest.stats import load_stats, load_archived_stats
+from app.backtest.downsample import select_stats
+from app.backtest.formats import MEDIA_TYPES, encode_series, negotiate_format
+from app.backtest.logs import READ_CHUNK_SIZE, follow_log, read_log_range
 from app.crud import v6_single_backtest as crud
 from app.schemas import v6_single_backtest as schemas
+from app.database.session import SessionLocal
 
 router = APIRouter()
 
@@ -18,6 +28,65 @@ async def create_v6_single_backtest(
     result = await crud.create_v6_single_backtest(db=db, backtest=backtest)
     return {"code": 0, "data": result, "message": "ok"}
 
+@router.post("/sweep", response_model=schemas.V6SingleBacktestSweepCreatedResponse)
+async def create_v6_single_backtest_sweep(
+    sweep: schemas.V6SingleBacktestSweepCreate,
+    db: AsyncSession = Depends(dependencies.get_db),
+):
+    """
+    Create a batch of backtests from a base config and a parameter grid and/or explicit items.
+    With `start`, all of them are queued as well.
+    """
+    try:
+        result = await crud.create_v6_single_backtest_sweep(db=db, sweep=sweep)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if sweep.start:
+        scheduler.notify()
+    return {"code": 0, "data": result, "message": "ok"}
+
+@router.get("/sweep/{sweep_id}", response_model=schemas.V6SingleBacktestSweepResponse)
+async def read_v6_single_backtest_sweep(
+    sweep_id: int,
+    db: AsyncSession = Depends(dependencies.get_db),
+):
+    db_sweep = await crud.get_v6_single_backtest_sweep(db, sweep_id=sweep_id)
+    if db_sweep is None:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    return {"code": 0, "data": db_sweep, "message": "ok"}
+
+@router.get("/usage/summary")
+async def read_v6_single_backtest_usage_summary(
+    group_by: List[Literal["symbol", "span_days"]] = Query(["symbol"]),
+    db: AsyncSession = Depends(dependencies.get_db),
+):
+    """
+    Resource usage of backtest runs aggregated by symbol and/or date span.
+    """
+    result = await crud.get_backtest_usage_summary(db, group_by=list(dict.fromkeys(group_by)))
+    return {"code": 0, "data": result, "message": "ok"}
+
+@router.post("/archive")
+async def archive_v6_single_backtests(
+    older_than_days: float = Query(..., ge=0),
+    limit: int = Query(100, ge=1, le=10000),
+    db: AsyncSession = Depends(dependencies.get_db),
+):
+    """
+    Pack backtests that finished more than `older_than_days` ago into the compressed archive
+    tier. Archived runs stay readable through the usual endpoints and are unpacked when restarted.
+    """
+    summary = await crud.archive_finished_backtests(db, older_than_days, limit=limit)
+    return {"code": 0, "data": summary, "message": "ok"}
+
+@router.get("/queue")
+async def read_v6_single_backtest_queue():
+    """
+    Queue depth and wait times of the backtest scheduler.
+    """
+    stats = await scheduler.get_stats()
+    return {"code": 0, "data": stats, "message": "ok"}
+
 @router.get("/{backtest_id}")
 async def read_v6_single_backtest(
     backtest_id: int,
@@ -31,11 +100,51 @@ async def read_v6_single_backtest(
 @router.get("/")
 async def read_v6_single_backtests(
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    status: Optional[List[str]] = Query(None),
+    symbol: Optional[str] = None,
+    exchange: Optional[str] = None,
+    account_name: Optional[str] = None,
+    sweep_id: Optional[int] = None,
+    name_prefix: Optional[str] = None,
+    start_date_from: Optional[datetime] = None,
+    start_date_to: Optional[datetime] = None,
+    end_date_from: Optional[datetime] = None,
+    end_date_to: Optional[datetime] = None,
+    adg_min: Optional[float] = None,
+    final_balance_min: Optional[float] = None,
+    max_drawdown_max: Optional[float] = None,
+    hours_stuck_max_max: Optional[float] = None,
+    n_fills_min: Optional[int] = None,
+    sort: Literal[tuple(crud.SORT_COLUMNS)] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    with_total: bool = False,
     db: AsyncSession = Depends(dependencies.get_db),
 ):
-    result = await crud.get_v6_single_backtests(db, skip=skip, limit=limit)
-    return {"code": 0, "data": result, "message": "ok"}
+    """
+    List backtests with server-side filters and sorting, including by extracted metrics
+    (adg, final_balance, max_drawdown, hours_stuck_max, n_fills). Pages are fetched with the opaque
+    `next_cursor` of the previous response; `skip` is still accepted for the first page.
+    `with_total` adds a count that is capped (see `total_is_exact`) to stay cheap.
+    """
+    filters = schemas.V6SingleBacktestFilter(
+        status=status, symbol=symbol, exchange=exchange, account_name=account_name, sweep_id=sweep_id,
+        name_prefix=name_prefix, start_date_from=start_date_from, start_date_to=start_date_to,
+        end_date_from=end_date_from, end_date_to=end_date_to, adg_min=adg_min,
+        final_balance_min=final_balance_min, max_drawdown_max=max_drawdown_max,
+        hours_stuck_max_max=hours_stuck_max_max, n_fills_min=n_fills_min,
+    )
+    try:
+        result, next_cursor = await crud.get_v6_single_backtests(
+            db, skip=skip, limit=limit, filters=filters, sort=sort, descending=order == "desc", cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    response = {"code": 0, "data": result, "next_cursor": next_cursor, "message": "ok"}
+    if with_total:
+        response["total"], response["total_is_exact"] = await crud.estimate_v6_single_backtests_total(db, filters)
+    return response
 
 @router.put("/{backtest_id}")
 async def update_v6_single_backtest(
@@ -56,103 +165,239 @@ async def delete_v6_single_backtest(
     result = await crud.delete_v6_single_backtest(db, backtest_id=backtest_id)
     if not result:
         raise HTTPException(status_code=404, detail="Backtest not found")
+    garbage_collector.notify()
     return {"code": 0, "data": None, "message": "ok"}
 
 @router.post("/{backtest_id}/start")
 async def start_v6_single_backtest(
     backtest_id: int,
-    background_tasks: BackgroundTasks,
+    priority: int = 0,
+    force: bool = False,
+    max_runtime: Optional[int] = Query(None, gt=0),
     db: AsyncSession = Depends(dependencies.get_db),
 ):
     """
-    Start a backtest task in the background.
+    Queue a backtest for execution. Higher priorities run first, otherwise FIFO.
+    If an identical run has already finished, its results are reused and the backtest
+    completes immediately; pass `force` to run it again anyway. The run is killed after
+    `max_runtime` seconds (default: the BACKTEST_MAX_RUNTIME_SECONDS setting).
     """
     db_backtest = await crud.get_v6_single_backtest(db, backtest_id=backtest_id)
     if db_backtest is None:
         raise HTTPException(status_code=404, detail="Backtest not found")
 
-    # Check if the backtest is already running or starting
-    if db_backtest.status in ["running", "starting"]:
+    # Check if the backtest is already queued, running or starting
+    if db_backtest.status in ["queued", "running", "starting"]:
         raise HTTPException(status_code=400, detail="Backtest is already running.")
-    
-    # Update status to 'starting' immediately
-    await crud.update_backtest_status(db, backtest_id, "starting")
-    
-    # Add the long-running task to the background
-    background_tasks.add_task(crud.run_backtest_process, db, backtest_id)
-    
-    return {"code": 0, "data": None, "message": "Backtest has been started in the background."}
+
+    if not force and await crud.reuse_stored_run(db, db_backtest):
+        return {"code": 0, "data": None, "message": "Backtest results reused from an identical run."}
+
+    await crud.enqueue_backtest(db, backtest_id, priority=priority, force=force, max_runtime=max_runtime)
+    scheduler.notify()
+
+    return {"code": 0, "data": None, "message": "Backtest has been queued."}
+
+@router.post("/{backtest_id}/cancel")
+async def cancel_v6_single_backtest(
+    backtest_id: int,
+    db: AsyncSession = Depends(dependencies.get_db),
+):
+    """
+    Cancel a queued or running backtest. A running backtest's whole process group is killed,
+    after which its status becomes 'cancelled'.
+    """
+    db_backtest = await crud.get_v6_single_backtest(db, backtest_id=backtest_id)
+    if db_backtest is None:
+        raise HTTPException(status_code=404, detail="Backtest not found")
+
+    state = await crud.cancel_backtest(db, backtest_id)
+    if state is None:
+        raise HTTPException(status_code=400, detail="Backtest is not queued or running.")
+    if state == "cancelled":
+        return {"code": 0, "data": {"status": state}, "message": "Backtest has been cancelled."}
+    return {"code": 0, "data": {"status": state}, "message": "Backtest is being cancelled."}
 
 @router.get("/{backtest_id}/log")
 async def read_v6_single_backtest_log(
     backtest_id: int,
+    offset: Optional[int] = Query(None, ge=0),
+    limit: int = Query(READ_CHUNK_SIZE, ge=1, le=16 * 1024 * 1024),
     db: AsyncSession = Depends(dependencies.get_db),
 ):
     """
     Retrieve the log file for a specific backtest.
+
+    With `offset`, only the bytes from that offset are returned (at most `limit`) and the
+    `X-Log-Offset` header holds the offset to ask for next. Range requests are also supported.
     """
     db_backtest = await crud.get_v6_single_backtest(db, backtest_id=backtest_id)
     if db_backtest is None:
         raise HTTPException(status_code=404, detail="Backtest not found")
 
     log_path = crud.get_backtest_log_path(db_backtest)
+    archive = await crud.get_run_archive(db_backtest)
+
+    if archive is not None:
+        # Archived run: decompress only the frames covering the requested bytes.
+        member = crud.run_member(crud.get_run_dir(db_backtest), log_path)
+        if member not in archive:
+            raise HTTPException(status_code=404, detail="Log file not found")
+        if offset is None:
+            headers = {
+                "Content-Disposition": f'attachment; filename="{db_backtest.name}.log"',
+                "Content-Length": str(archive.size(member)),
+            }
+            return StreamingResponse(archive.iter_member(member), media_type='text/plain', headers=headers)
+        data = await artifact_storage.run(archive.read, member, offset, limit)
+        headers = {"X-Log-Offset": str(offset + len(data)), "X-Log-Status": db_backtest.status or ""}
+        return Response(content=data, media_type='text/plain', headers=headers)
 
     if not os.path.exists(log_path):
         raise HTTPException(status_code=404, detail="Log file not found")
 
-    return FileResponse(log_path, media_type='text/plain', filename=f"{db_backtest.name}.log")
+    if offset is None:
+        return FileResponse(log_path, media_type='text/plain', filename=f"{db_backtest.name}.log")
+
+    data = await artifact_storage.run(read_log_range, log_path, offset, limit)
+    headers = {"X-Log-Offset": str(offset + len(data)), "X-Log-Status": db_backtest.status or ""}
+    return Response(content=data, media_type='text/plain', headers=headers)
 
-def get_plots_path(backtest: schemas.V6SingleBacktest) -> str | None:
+@router.get("/{backtest_id}/log/stream")
+async def stream_v6_single_backtest_log(
+    backtest_id: int,
+    offset: int = Query(0, ge=0),
+    last_event_id: Optional[int] = Header(None),
+    db: AsyncSession = Depends(dependencies.get_db),
+):
     """
-    Constructs the latest plots directory path for a given backtest.
+    Follow a backtest's log as Server-Sent Events. Each event carries new complete lines and its
+    id is the byte offset after them, so reconnecting clients resume via `Last-Event-ID`.
     """
-    base_path = f"data/bt_v6_single_queue/{backtest.name}"
-    exchange_base = backtest.exchange.split('_')[0]
-    plots_path = os.path.join(base_path, exchange_base, backtest.symbol, 'plots')
-
-    if not os.path.isdir(plots_path):
-        return None
-
-    all_subdirs = [d for d in os.listdir(plots_path) if os.path.isdir(os.path.join(plots_path, d))]
-    if not all_subdirs:
-        return None
+    db_backtest = await crud.get_v6_single_backtest(db, backtest_id=backtest_id)
+    if db_backtest is None:
+        raise HTTPException(status_code=404, detail="Backtest not found")
+    log_path = crud.get_backtest_log_path(db_backtest)
+    read_range = None
+    archive = await crud.get_run_archive(db_backtest)
+    if archive is not None:
+        member = crud.run_member(crud.get_run_dir(db_backtest), log_path)
+        read_range = lambda start: archive.read(member, start, READ_CHUNK_SIZE) if member in archive else b""
 
-    latest_subdir = max(all_subdirs)
-    return os.path.join(plots_path, latest_subdir)
+    async def is_active() -> bool:
+        # Runs for the lifetime of the stream, so use a short-lived session rather than the request's.
+        async with SessionLocal() as session:
+            backtest = await crud.get_v6_single_backtest(session, backtest_id=backtest_id)
+        return backtest is not None and backtest.status in ["queued", "starting", "running"]
 
+    start = last_event_id if last_event_id is not None else offset
+    return StreamingResponse(
+        follow_log(backtest_id, log_path, start, is_active, read_range),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.get("/{backtest_id}/stats")
 async def get_backtest_stats(
     backtest_id: int,
+    request: Request,
+    points: Optional[int] = Query(None, ge=2, le=100000),
+    columns: Optional[str] = None,
+    from_: Optional[float] = Query(None, alias="from"),
+    to: Optional[float] = None,
+    method: Literal["auto", "lttb", "minmax"] = "auto",
+    format_: Optional[Literal["json", "columns", "msgpack", "arrow"]] = Query(None, alias="format"),
     db: AsyncSession = Depends(dependencies.get_db),
 ):
     """
     Retrieve the statistics data for a specific backtest to render charts.
+
+    Without query parameters every row is returned. `columns` (comma separated) selects columns,
+    `from`/`to` restrict the timestamp window and `points` downsamples each column to about that
+    many points (LTTB for balance/equity, min-max buckets for prices). Responses carry an ETag,
+    are compressed per `Accept-Encoding` and, once the run has finished, are cacheable.
+
+    The default is a JSON list of rows. Column-oriented JSON, MessagePack or Arrow IPC are
+    returned for `format=columns|msgpack|arrow` or a matching `Accept` media type
+    (see `app.backtest.formats`).
     """
+    try:
+        fmt = negotiate_format(format_, request.headers.get("accept"))
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
     db_backtest = await crud.get_v6_single_backtest(db, backtest_id=backtest_id)
     if db_backtest is None:
         raise HTTPException(status_code=404, detail="Backtest not found")
 
-    plots_dir = get_plots_path(db_backtest)
+    archive, run_dir = await crud.get_run_archive(db_backtest), crud.get_run_dir(db_backtest)
+    finished_at, final = db_backtest.finished_at, crud.is_final(db_backtest)
+    entry = await crud.resolve_artifacts(db, db_backtest)
+    plots_dir = entry.plots_dir
     if plots_dir is None:
         raise HTTPException(status_code=404, detail="Plots directory not found")
         
     csv_path = os.path.join(plots_dir, 'stats.csv')
+    csv_member = crud.run_member(run_dir, csv_path)
 
-    if not os.path.exists(csv_path):
+    if (csv_member not in archive) if archive is not None else not os.path.exists(csv_path):
         raise HTTPException(status_code=404, detail="Stats file not found")
 
-    try:
-        df = pd.read_csv(csv_path)
-        json_data = df.to_dict(orient='records')
-        return {"code": 0, "data": json_data, "message": "ok"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to process stats file: {str(e)}")
+    # Only the full series is worth a variant file; windows and downsamplings are cached in memory.
+    canonical = points is None and columns is None and from_ is None and to is None
+
+    def build() -> bytes:
+        # Parsing, loading and downsampling run on the artifact I/O pool.
+        try:
+            stats = load_archived_stats(archive, csv_member) if archive is not None else load_stats(csv_path)
+            if not canonical:
+                column_list = [c.strip() for c in columns.split(',') if c.strip()] if columns else None
+                try:
+                    stats = select_stats(stats, points, column_list, from_, to, method)
+                except KeyError as e:
+                    raise HTTPException(status_code=400, detail=f"Unknown stats column(s): {e.args[0]}")
+            return encode_series(stats, fmt)
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to process stats file: {str(e)}")
+
+    etag = make_etag("stats", backtest_id, finished_at, entry.files.get('stats.csv'), points, columns, from_, to, method, fmt)
+    return await cached_response(request, backtest_id, etag, final, build, media_type=MEDIA_TYPES[fmt], vary="Accept, Accept-Encoding", persist=canonical)
+
+
+@router.get("/{backtest_id}/metrics", response_model=schemas.V6SingleBacktestMetricsResponse)
+async def get_backtest_metrics(
+    backtest_id: int,
+    db: AsyncSession = Depends(dependencies.get_db),
+):
+    """
+    Retrieve the key metrics extracted when the backtest finished.
+    """
+    db_metrics = await crud.get_backtest_metrics(db, backtest_id=backtest_id)
+    if db_metrics is None:
+        raise HTTPException(status_code=404, detail="Metrics not found")
+    return {"code": 0, "data": db_metrics, "message": "ok"}
+
+
+@router.get("/{backtest_id}/usage", response_model=schemas.V6SingleBacktestUsageResponse)
+async def get_backtest_usage(
+    backtest_id: int,
+    db: AsyncSession = Depends(dependencies.get_db),
+):
+    """
+    Retrieve the wall time, CPU, peak RSS and I/O of the backtest's latest run.
+    """
+    db_usage = await crud.get_backtest_usage(db, backtest_id=backtest_id)
+    if db_usage is None:
+        raise HTTPException(status_code=404, detail="Usage not found")
+    return {"code": 0, "data": db_usage, "message": "ok"}
 
 
 @router.get("/{backtest_id}/result")
 async def get_backtest_result(
     backtest_id: int,
+    request: Request,
     db: AsyncSession = Depends(dependencies.get_db),
 ):
     """
@@ -162,26 +407,32 @@ async def get_backtest_result(
     if db_backtest is None:
         raise HTTPException(status_code=404, detail="Backtest not found")
 
-    plots_dir = get_plots_path(db_backtest)
+    archive, run_dir = await crud.get_run_archive(db_backtest), crud.get_run_dir(db_backtest)
+    finished_at, final = db_backtest.finished_at, crud.is_final(db_backtest)
+    entry = await crud.resolve_artifacts(db, db_backtest)
+    plots_dir = entry.plots_dir
     if plots_dir is None:
         raise HTTPException(status_code=404, detail="Plots directory not found")
         
     result_path = os.path.join(plots_dir, 'backtest_result.txt')
 
-    if not os.path.exists(result_path):
-        raise HTTPException(status_code=404, detail="Result file not found")
+    def build() -> bytes:
+        raw = crud.read_run_file(archive, run_dir, result_path)
+        if raw is None:
+            raise HTTPException(status_code=404, detail="Result file not found")
+        try:
+            return JSONResponse({"code": 0, "data": raw.decode('utf-8'), "message": "ok"}).body
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to process result file: {str(e)}")
 
-    try:
-        with open(result_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        return {"code": 0, "data": content, "message": "ok"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to process result file: {str(e)}")
+    etag = make_etag("result", backtest_id, finished_at, entry.files.get('backtest_result.txt'))
+    return await cached_response(request, backtest_id, etag, final, build)
 
 
 @router.get("/{backtest_id}/config")
 async def get_backtest_config(
     backtest_id: int,
+    request: Request,
     db: AsyncSession = Depends(dependencies.get_db),
 ):
     """
@@ -191,14 +442,21 @@ async def get_backtest_config(
     if db_backtest is None:
         raise HTTPException(status_code=404, detail="Backtest not found")
 
-    config_path = f"data/bt_v6_single_queue/{db_backtest.name}/{db_backtest.name}.json"
+    archive, run_dir = await crud.get_run_archive(db_backtest), crud.get_run_dir(db_backtest)
+    config_path = f"{run_dir}/{db_backtest.name}.json"
+    signature = await artifact_storage.run(crud.run_file_signature, archive, run_dir, config_path)
 
-    if not os.path.exists(config_path):
+    if signature is None:
         raise HTTPException(status_code=404, detail="Config file not found")
 
-    try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            config_data = json.load(f)
-        return {"code": 0, "data": config_data, "message": "ok"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to process config file: {str(e)}")
\ No newline at end of file
+    def build() -> bytes:
+        raw = crud.read_run_file(archive, run_dir, config_path)
+        if raw is None:
+            raise HTTPException(status_code=404, detail="Config file not found")
+        try:
+            return JSONResponse({"code": 0, "data": json.loads(raw), "message": "ok"}).body
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to process config file: {str(e)}")
+
+    etag = make_etag("config", backtest_id, signature)
+    return await cached_response(request, backtest_id, etag, crud.is_final(db_backtest), build)
\ No newline at end of file
@@ -0,0 +1,184 @@
+import json
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Iterator, Optional
+import zstandard
+from app.core.config import settings
+
+ARCHIVE_SUFFIX = ".zarc"
+# Footer: magic, offset and length of the compressed member index.
+FOOTER = struct.Struct("<8sQQ")
+MAGIC = b"PBZARC01"
+
+def archive_path(name: str) -> str:
+    return os.path.join(settings.BACKTEST_ARCHIVE_DIR, f"{name}{ARCHIVE_SUFFIX}")
+
+def pack_directory(src_dir: str, dest_path: str, level: Optional[int] = None, chunk_size: Optional[int] = None) -> dict:
+    """
+    Pack every regular file under `src_dir` into a single archive at `dest_path`.
+
+    Each member is cut into chunks that are compressed as independent zstd frames, and a
+    compressed index of members -> frame offsets is appended, so readers can decompress just
+    the frames covering the bytes they need. Symlinks (e.g. to the shared market data cache)
+    are not followed. The archive is written to a temporary file and renamed into place.
+    Returns the number of members and the original and archived sizes in bytes.
+    """
+    level = level or settings.BACKTEST_ARCHIVE_LEVEL
+    chunk_size = chunk_size or settings.BACKTEST_ARCHIVE_CHUNK_BYTES
+    compressor = zstandard.ZstdCompressor(level=level)
+    members = {}
+    original_bytes = 0
+    os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+    tmp_path = f"{dest_path}.tmp{os.getpid()}.{threading.get_ident()}"
+    with open(tmp_path, 'wb') as out:
+        for root, dirs, files in os.walk(src_dir):
+            dirs.sort()
+            for file_name in sorted(files):
+                path = os.path.join(root, file_name)
+                if os.path.islink(path) or not os.path.isfile(path):
+                    continue
+                st = os.stat(path)
+                frames = []
+                with open(path, 'rb') as f:
+                    while True:
+                        chunk = f.read(chunk_size)
+                        if not chunk:
+                            break
+                        frame = compressor.compress(chunk)
+                        frames.append([out.tell(), len(frame)])
+                        out.write(frame)
+                member = os.path.relpath(path, src_dir).replace(os.sep, '/')
+                members[member] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "frames": frames}
+                original_bytes += st.st_size
+        index = compressor.compress(json.dumps({"chunk_size": chunk_size, "members": members}).encode('utf-8'))
+        index_offset = out.tell()
+        out.write(index)
+        out.write(FOOTER.pack(MAGIC, index_offset, len(index)))
+        out.flush()
+        os.fsync(out.fileno())
+        archived_bytes = out.tell()
+    os.replace(tmp_path, dest_path)
+    return {"members": len(members), "original_bytes": original_bytes, "archived_bytes": archived_bytes}
+
+class RunArchive:
+    """
+    Read-only access to the members of a packed run directory, by relative path.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        st = os.stat(path)
+        self.signature = (st.st_mtime_ns, st.st_size)
+        with open(path, 'rb') as f:
+            f.seek(-FOOTER.size, os.SEEK_END)
+            magic, index_offset, index_length = FOOTER.unpack(f.read(FOOTER.size))
+            if magic != MAGIC:
+                raise ValueError(f"Not a backtest archive: {path}")
+            f.seek(index_offset)
+            index = json.loads(zstandard.ZstdDecompressor().decompress(f.read(index_length)))
+        self.chunk_size = index["chunk_size"]
+        self.members: dict[str, dict] = index["members"]
+
+    def __contains__(self, member: str) -> bool:
+        return member in self.members
+
+    def size(self, member: str) -> int:
+        return self.members[member]["size"]
+
+    def _frames(self, member: str, first: int, last: int) -> Iterator[bytes]:
+        decompressor = zstandard.ZstdDecompressor()
+        with open(self.path, 'rb') as f:
+            for frame_offset, frame_length in self.members[member]["frames"][first:last + 1]:
+                f.seek(frame_offset)
+                yield decompressor.decompress(f.read(frame_length), max_output_size=self.chunk_size)
+
+    def read(self, member: str, offset: int = 0, limit: Optional[int] = None) -> bytes:
+        """
+        Up to `limit` bytes of a member from `offset`, decompressing only the frames that cover them.
+        Raises KeyError for unknown members.
+        """
+        size = self.size(member)
+        end = size if limit is None else min(size, offset + limit)
+        if offset >= end:
+            return b""
+        first, last = offset // self.chunk_size, (end - 1) // self.chunk_size
+        data = b"".join(self._frames(member, first, last))
+        start = offset - first * self.chunk_size
+        return data[start:start + end - offset]
+
+    def iter_member(self, member: str) -> Iterator[bytes]:
+        frames = self.members[member]["frames"]
+        return self._frames(member, 0, len(frames) - 1)
+
+    def list_dir(self, prefix: str) -> list[str]:
+        """
+        Names of the members directly inside `prefix` (a relative directory path).
+        """
+        prefix = prefix.rstrip('/') + '/'
+        return sorted(m[len(prefix):] for m in self.members if m.startswith(prefix) and '/' not in m[len(prefix):])
+
+    def extract_all(self, dest_dir: str):
+        for member in self.members:
+            path = os.path.join(dest_dir, *member.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                for chunk in self.iter_member(member):
+                    f.write(chunk)
+            mtime_ns = self.members[member]["mtime_ns"]
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+
+class ArchiveCache:
+    """
+    LRU cache of opened archives (their parsed member index), invalidated when the file changes.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, RunArchive] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> RunArchive:
+        st = os.stat(path)
+        with self._lock:
+            cached = self._entries.get(path)
+            if cached is not None and cached.signature == (st.st_mtime_ns, st.st_size):
+                self._entries.move_to_end(path)
+                return cached
+
+        archive = RunArchive(path)
+        with self._lock:
+            self._entries[path] = archive
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return archive
+
+    def forget(self, path: str):
+        with self._lock:
+            self._entries.pop(path, None)
+
+archive_cache = ArchiveCache(settings.BACKTEST_ARCHIVE_CACHE_ENTRIES)
+
+def open_archive(path: str) -> RunArchive:
+    return archive_cache.get(path)
+
+def archive_run(run_dir: str, dest_path: str) -> dict:
+    """
+    Pack a run directory and check that the archive reads back with every file.
+    The run directory itself is left in place for the caller to remove.
+    """
+    stats = pack_directory(run_dir, dest_path)
+    archive_cache.forget(dest_path)
+    if len(open_archive(dest_path).members) != stats["members"]:
+        raise ValueError(f"Archive {dest_path} does not match {run_dir}")
+    return stats
+
+def restore_run(archive_file: str, run_dir: str):
+    """
+    Unpack an archived run back into its directory and remove the archive.
+    """
+    open_archive(archive_file).extract_all(run_dir)
+    archive_cache.forget(archive_file)
+    os.remove(archive_file)
\ No newline at end of file
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+from typing import Optional
+from app.core.config import settings
+from app.crud import v6_single_backtest as crud
+from app.database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+class BacktestArchiver:
+    """
+    Periodically packs backtests that finished more than BACKTEST_ARCHIVE_AFTER_DAYS ago into
+    the compressed archive tier. Disabled while that setting is unset.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> dict:
+        async with SessionLocal() as db:
+            return await crud.archive_finished_backtests(db, settings.BACKTEST_ARCHIVE_AFTER_DAYS)
+
+    async def _loop(self):
+        while True:
+            try:
+                summary = await self.run_once()
+                if summary["archived"]:
+                    logger.info(
+                        "Archived %d backtest(s): %d -> %d bytes",
+                        summary["archived"], summary["original_bytes"], summary["archived_bytes"],
+                    )
+            except Exception:
+                logger.exception("Backtest archival failed")
+            await asyncio.sleep(settings.BACKTEST_ARCHIVE_INTERVAL)
+
+    def start(self):
+        if self._task is None and settings.BACKTEST_ARCHIVE_AFTER_DAYS is not None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+archiver = BacktestArchiver()
\ No newline at end of file
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete, update
+from app.backtest.storage import artifact_storage
+from app.core.config import settings
+from app.database.session import SessionLocal
+from app.models.v6_single_backtest import V6SingleBacktestArtifact
+
+logger = logging.getLogger(__name__)
+
+def plots_root(name: str, exchange: str, symbol: str) -> str:
+    exchange_base = exchange.split('_')[0]
+    return os.path.join(f"data/bt_v6_single_queue/{name}", exchange_base, symbol, 'plots')
+
+def find_latest_plots_dir(root: str) -> Optional[str]:
+    """
+    The newest run directory under a backtest's plots directory (scans the filesystem).
+    """
+    if not os.path.isdir(root):
+        return None
+    all_subdirs = [d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d))]
+    if not all_subdirs:
+        return None
+    return os.path.join(root, max(all_subdirs))
+
+def scan_files(plots_dir: str) -> dict[str, dict]:
+    files = {}
+    with os.scandir(plots_dir) as entries:
+        for entry in entries:
+            if entry.is_file():
+                st = entry.stat()
+                files[entry.name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    return files
+
+@dataclass
+class ArtifactEntry:
+    plots_dir: Optional[str]
+    finished_at: Optional[datetime]
+    files: dict[str, dict] = field(default_factory=dict)
+    # The run directory has been packed into the archive tier; plots_dir names archive members.
+    archived: bool = False
+
+class ArtifactIndex:
+    """
+    In-memory map of backtest id -> resolved plots directory and file sizes/mtimes.
+
+    Entries are recorded by the runner when a backtest finishes and are valid for as long as
+    the backtest's `finished_at` matches, so request handlers resolve artifact paths with a
+    dictionary lookup instead of listing directories. A periodic reconciliation pass drops
+    entries whose directory disappeared and refreshes file metadata, in the index and in the
+    artifact table it is loaded from.
+    """
+
+    def __init__(self):
+        self._entries: dict[int, ArtifactEntry] = {}
+        self._reconciler: Optional[asyncio.Task] = None
+
+    def get(self, backtest_id: int, finished_at: Optional[datetime]) -> Optional[ArtifactEntry]:
+        entry = self._entries.get(backtest_id)
+        if entry is None or entry.finished_at != finished_at:
+            return None
+        return entry
+
+    def put(self, backtest_id: int, entry: ArtifactEntry):
+        self._entries[backtest_id] = entry
+
+    def forget(self, backtest_id: int):
+        self._entries.pop(backtest_id, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def reconcile(self) -> tuple[dict[int, ArtifactEntry], dict[int, ArtifactEntry]]:
+        """
+        Re-stat indexed files; drop entries whose plots directory no longer exists.
+        Returns the entries whose files changed and the entries dropped, by backtest id.
+        """
+        changed, dropped = {}, {}
+        for backtest_id, entry in list(self._entries.items()):
+            if entry.plots_dir is None or entry.archived:
+                continue
+            try:
+                files = scan_files(entry.plots_dir)
+            except FileNotFoundError:
+                # Unless the runner recorded a new entry meanwhile
+                if self._entries.get(backtest_id) is entry:
+                    del self._entries[backtest_id]
+                dropped[backtest_id] = entry
+                continue
+            if files != entry.files:
+                entry.files = files
+                changed[backtest_id] = entry
+        return changed, dropped
+
+    async def reconcile_and_persist(self) -> int:
+        """
+        Reconcile the index on the artifact I/O pool, then apply the changes to the artifact
+        table, only to rows of the same run. Returns the number of entries dropped.
+        """
+        changed, dropped = await artifact_storage.run(self.reconcile)
+        if not changed and not dropped:
+            return 0
+        async with SessionLocal() as db:
+            for backtest_id, entry in changed.items():
+                await db.execute(
+                    update(V6SingleBacktestArtifact)
+                    .where(V6SingleBacktestArtifact.backtest_id == backtest_id, V6SingleBacktestArtifact.finished_at == entry.finished_at)
+                    .values(files=entry.files, indexed_at=datetime.utcnow())
+                )
+            for backtest_id, entry in dropped.items():
+                await db.execute(
+                    delete(V6SingleBacktestArtifact)
+                    .where(V6SingleBacktestArtifact.backtest_id == backtest_id, V6SingleBacktestArtifact.finished_at == entry.finished_at)
+                    .where(V6SingleBacktestArtifact.archived.is_not(True))
+                )
+            await db.commit()
+        return len(dropped)
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(settings.BACKTEST_ARTIFACT_RECONCILE_INTERVAL)
+            try:
+                dropped = await self.reconcile_and_persist()
+                if dropped:
+                    logger.info("Artifact index reconciliation dropped %d stale entries", dropped)
+            except Exception:
+                logger.exception("Artifact index reconciliation failed")
+
+    def start(self):
+        if self._reconciler is None:
+            self._reconciler = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self):
+        if self._reconciler is not None:
+            self._reconciler.cancel()
+            await asyncio.gather(self._reconciler, return_exceptions=True)
+            self._reconciler = None
+
+artifact_index = ArtifactIndex()
\ No newline at end of file
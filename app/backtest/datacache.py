@@ -0,0 +1,313 @@
+import asyncio
+import logging
+import math
+import os
+import shutil
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional
+import numpy as np
+from app.backtest.storage import artifact_storage
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - no cross-process locking on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class FlightAborted(Exception):
+    """
+    Raised while waiting for another run to populate a range, when the waiting run's
+    `should_stop` check returns a reason to give up (e.g. 'cancelled' or 'timeout').
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class RangeFlight:
+    """
+    Handle for one run's use of a (exchange, symbol, date range) partition. The leader is the
+    run responsible for populating the range and holds the range lock until it calls
+    `mark_ready()`, once the range's data files are complete or its backtest has exited
+    successfully, so that a crashed or killed run never leaves a partial range "ready".
+    """
+
+    def __init__(self, ready_path: str, is_leader: bool, lock_file=None):
+        self.ready_path = ready_path
+        self.is_leader = is_leader
+        self._lock_file = lock_file
+
+    def mark_ready(self):
+        if self.is_leader and not os.path.exists(self.ready_path):
+            with open(self.ready_path, 'w'):
+                pass
+        self.release()
+
+    def release(self):
+        """
+        Let waiting runs go. Closing the lock file releases the lock without blocking.
+        """
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+def _key_matches(key: str, name: str) -> bool:
+    # Whether a cache file belongs to the range with marker key ".{start}_{end}"
+    return all(part in name for part in key[1:].split('_'))
+
+def _npy_complete(path: str) -> bool:
+    """
+    Whether a .npy file holds all the data its header declares. np.save writes the header
+    first, so a file still being written is shorter than that.
+    """
+    try:
+        with open(path, 'rb') as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+            if dtype.hasobject:
+                return False
+            return os.fstat(f.fileno()).st_size >= f.tell() + math.prod(shape) * dtype.itemsize
+    except (OSError, ValueError):
+        return False
+
+class MarketDataCache:
+    """
+    Historical market data shared by all backtests, partitioned by exchange/symbol, with the
+    date ranges stored as passivbot's own cache files inside each partition.
+
+    Each backtest's passivbot `caches` directory is a symlink into its partition. A per-range
+    file lock gives single-flight population across processes and hosts sharing the data
+    directory: the first run populates the range and the others wait for its ready marker.
+    The lock is only held while the data is downloaded; the leader writes the marker as soon
+    as the range's data files are complete, and waiting runs give up when cancelled or out of
+    time. The total size is capped by evicting the least recently used files, except those of
+    ranges in use. Blocking file locks are always taken off the event loop.
+    """
+
+    def __init__(self, root: str, max_bytes: int, poll_interval: float = 1.0):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.poll_interval = poll_interval
+        self._pins: dict[tuple[str, str], int] = {}
+
+    def partition_dir(self, exchange: str, symbol: str) -> str:
+        return os.path.join(self.root, exchange, symbol)
+
+    def attach(self, caches_dir: str, exchange: str, symbol: str):
+        """
+        Point a backtest's caches directory at the shared partition. Files already cached
+        in a private directory are moved into the partition first.
+        """
+        partition = os.path.abspath(self.partition_dir(exchange, symbol))
+        os.makedirs(partition, exist_ok=True)
+        if os.path.islink(caches_dir):
+            if os.path.realpath(caches_dir) == os.path.realpath(partition):
+                return
+            os.remove(caches_dir)
+        elif os.path.isdir(caches_dir):
+            for name in os.listdir(caches_dir):
+                target = os.path.join(partition, name)
+                if not os.path.exists(target):
+                    shutil.move(os.path.join(caches_dir, name), target)
+            shutil.rmtree(caches_dir)
+        os.makedirs(os.path.dirname(caches_dir), exist_ok=True)
+        os.symlink(partition, caches_dir, target_is_directory=True)
+
+    def range_files(self, exchange: str, symbol: str, start: str, end: str) -> list[str]:
+        partition = self.partition_dir(exchange, symbol)
+        if not os.path.isdir(partition):
+            return []
+        return [
+            os.path.join(partition, name) for name in os.listdir(partition)
+            if not name.startswith('.') and start in name and end in name
+        ]
+
+    def range_complete(self, exchange: str, symbol: str, start: str, end: str) -> bool:
+        """
+        Whether a range's data files have all been written, i.e. its download is over.
+        """
+        files = [path for path in self.range_files(exchange, symbol, start, end) if path.endswith('.npy')]
+        return bool(files) and all(_npy_complete(path) for path in files)
+
+    def touch(self, exchange: str, symbol: str, start: str, end: str):
+        """
+        Mark a range as recently used for LRU eviction.
+        """
+        for path in self.range_files(exchange, symbol, start, end):
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+
+    @asynccontextmanager
+    async def _pinned(self, partition: str, key: str):
+        """
+        Keep a range from being evicted: counted for this process, and a shared lock on its
+        pin file for other processes (see `_pinned_keys`).
+        """
+        pin = (partition, key)
+        self._pins[pin] = self._pins.get(pin, 0) + 1
+        pin_file = None
+        try:
+            pin_file = await artifact_storage.run(self._lock_pin, partition, key)
+            yield
+        finally:
+            if pin_file is not None:
+                pin_file.close()
+            self._pins[pin] -= 1
+            if not self._pins[pin]:
+                del self._pins[pin]
+
+    @staticmethod
+    def _lock_pin(partition: str, key: str):
+        pin_file = open(os.path.join(partition, f"{key}.pin"), 'a+')
+        if fcntl is not None:
+            # Blocks while an eviction is probing this pin file
+            fcntl.flock(pin_file.fileno(), fcntl.LOCK_SH)
+        return pin_file
+
+    def _pinned_keys(self, partition: str) -> set[str]:
+        keys = {key for (pinned, key) in self._pins if pinned == partition}
+        if fcntl is None:
+            return keys
+        for name in os.listdir(partition):
+            key = name[:-len('.pin')]
+            if not name.endswith('.pin') or key in keys:
+                continue
+            with open(os.path.join(partition, name), 'a+') as pin_file:
+                try:
+                    fcntl.flock(pin_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    keys.add(key)
+        return keys
+
+    @asynccontextmanager
+    async def single_flight(
+        self, exchange: str, symbol: str, start: str, end: str,
+        should_stop: Optional[Callable[[], Awaitable[Optional[str]]]] = None,
+    ):
+        """
+        Yield a RangeFlight once this run may proceed: immediately if the range is ready or
+        this run becomes the leader, otherwise once the leader has marked it ready. While
+        waiting, `should_stop` is polled and FlightAborted raised with the reason it returns.
+        The range is pinned against eviction until the context exits.
+        """
+        partition = self.partition_dir(exchange, symbol)
+        await artifact_storage.run(os.makedirs, partition, exist_ok=True)
+        key = f".{start}_{end}"
+        async with self._pinned(partition, key):
+            flight = await self._acquire(partition, key, should_stop)
+            try:
+                yield flight
+            finally:
+                flight.release()
+
+    async def _acquire(self, partition: str, key: str, should_stop) -> RangeFlight:
+        ready_path = os.path.join(partition, f"{key}.ready")
+        if os.path.exists(ready_path) or fcntl is None:
+            return RangeFlight(ready_path, is_leader=fcntl is None)
+
+        lock_file = open(os.path.join(partition, f"{key}.lock"), 'a+')
+        try:
+            while not await artifact_storage.run(self._try_lock, lock_file):
+                if os.path.exists(ready_path):
+                    lock_file.close()
+                    return RangeFlight(ready_path, is_leader=False)
+                if should_stop is not None:
+                    reason = await should_stop()
+                    if reason:
+                        raise FlightAborted(reason)
+                await asyncio.sleep(self.poll_interval)
+        except BaseException:
+            lock_file.close()
+            raise
+        # The previous leader may have finished between our checks.
+        if os.path.exists(ready_path):
+            lock_file.close()
+            return RangeFlight(ready_path, is_leader=False)
+        # or died mid-download, leaving truncated files that passivbot would take as cached.
+        await artifact_storage.run(self._drop_partial, partition, key)
+        return RangeFlight(ready_path, is_leader=True, lock_file=lock_file)
+
+    @staticmethod
+    def _try_lock(lock_file) -> bool:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    @staticmethod
+    def _drop_partial(partition: str, key: str):
+        for name in os.listdir(partition):
+            path = os.path.join(partition, name)
+            if not name.startswith('.') and name.endswith('.npy') and _key_matches(key, name) \
+                    and not _npy_complete(path):
+                logger.info("Removing partially downloaded market data %s", path)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    async def watch_download(self, flight: RangeFlight, exchange: str, symbol: str, start: str, end: str):
+        """
+        Run by a leader alongside its backtest: mark the range ready, letting waiting runs go,
+        as soon as its data files are complete instead of when the backtest exits.
+        """
+        while flight.is_leader and not os.path.exists(flight.ready_path):
+            if await artifact_storage.run(self.range_complete, exchange, symbol, start, end):
+                flight.mark_ready()
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    def evict(self) -> int:
+        """
+        Delete least recently used cache files until the cache fits in `max_bytes`, keeping
+        the files of ranges that a run is using. Returns the number of bytes freed.
+        """
+        files = []
+        total = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            pinned = self._pinned_keys(dirpath) if any(name.endswith('.pin') for name in filenames) else set()
+            for name in filenames:
+                if name.startswith('.'):
+                    continue
+                if any(_key_matches(key, name) for key in pinned):
+                    # Counted towards the total, but not evictable
+                    try:
+                        total += os.path.getsize(os.path.join(dirpath, name))
+                    except FileNotFoundError:
+                        pass
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        freed = 0
+        for _, size, path in sorted(files):
+            if total - freed <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            freed += size
+            # Forget ready markers of ranges that lost one of their files.
+            partition, name = os.path.split(path)
+            for marker in os.listdir(partition):
+                if marker.endswith('.ready') and _key_matches(marker[:-len('.ready')], name):
+                    os.remove(os.path.join(partition, marker))
+        if freed:
+            logger.info("Evicted %d bytes from the market data cache", freed)
+        return freed
+
+market_data_cache = MarketDataCache(settings.MARKET_DATA_CACHE_DIR, settings.MARKET_DATA_CACHE_MAX_BYTES)
\ No newline at end of file
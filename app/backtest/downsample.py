@@ -0,0 +1,110 @@
+import numpy as np
+from app.backtest.stats import StatsColumns
+
+X_COLUMN = "timestamp"
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: pick `n` indices that preserve the visual shape of y(x).
+    The first and last points are always kept.
+    """
+    size = len(y)
+    if n >= size:
+        return np.arange(size)
+    if n < 3:
+        return np.array([0, size - 1])[:max(n, 0)]
+
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    # The average point of the bucket after each bucket, for all buckets at once.
+    next_starts = edges[1:]
+    counts = np.diff(np.append(next_starts, size))
+    avg_xs = (np.add.reduceat(x, next_starts) / counts).tolist()
+    avg_ys = (np.add.reduceat(y, next_starts) / counts).tolist()
+
+    # Each pick depends on the previous one, so buckets are walked in order: about 1 s per
+    # 100k points requested, whatever the input size.
+    selected = np.empty(n, dtype=np.int64)
+    selected[0], selected[-1] = 0, size - 1
+    a = 0
+    bounds = edges.tolist()
+    for i in range(n - 2):
+        start, end = bounds[i], bounds[i + 1]
+        a_x, a_y = x[a], y[a]
+        # Twice the area of the triangle (a, candidate, next bucket's average), up to sign
+        area = (a_x - avg_xs[i]) * (y[start:end] - a_y) - (a_x - x[start:end]) * (avg_ys[i] - a_y)
+        a = start + int(np.argmax(np.abs(area)))
+        selected[i + 1] = a
+    return selected
+
+def minmax_indices(y: np.ndarray, n: int) -> np.ndarray:
+    """
+    Min-max bucketing: keep the lowest and highest point of each of n/2 buckets,
+    so spikes survive downsampling.
+    """
+    size = len(y)
+    if n >= size:
+        return np.arange(size)
+    buckets = max(n // 2, 1)
+    edges = np.linspace(0, size, buckets + 1).astype(np.int64)
+    bucket_ids = np.repeat(np.arange(buckets), np.diff(edges))
+    # Sort by bucket, then by value: each bucket's min is at its start edge and its max at its end edge.
+    order = np.lexsort((y, bucket_ids))
+    mins = order[edges[:-1]]
+    maxs = order[edges[1:] - 1]
+    return np.unique(np.concatenate(([0, size - 1], mins, maxs)))
+
+def default_method(column: str) -> str:
+    return "minmax" if "price" in column else "lttb"
+
+def select_stats(
+    stats: StatsColumns,
+    points: int | None = None,
+    columns: list[str] | None = None,
+    start: float | None = None,
+    end: float | None = None,
+    method: str = "auto",
+) -> StatsColumns:
+    """
+    Return the stats columns restricted to the [start, end] timestamp window and downsampled to
+    at most `points` rows. Balance-like columns use LTTB and price columns use min-max buckets,
+    each with an equal share of `points`; the rows returned are the union of the indices each
+    column selected.
+    """
+    names = columns or [name for name in stats.names if name != X_COLUMN]
+    unknown = [name for name in names if name not in stats.columns]
+    if unknown:
+        raise KeyError(", ".join(unknown))
+
+    has_x = X_COLUMN in stats.columns
+    lo, hi = 0, len(stats)
+    if has_x:
+        timestamps = stats.columns[X_COLUMN]
+        if start is not None:
+            lo = int(np.searchsorted(timestamps, start, side="left"))
+        if end is not None:
+            hi = int(np.searchsorted(timestamps, end, side="right"))
+    hi = max(hi, lo)
+    x = np.asarray(stats.columns[X_COLUMN][lo:hi], dtype=np.float64) if has_x else np.arange(hi - lo, dtype=np.float64)
+
+    out_names = ([X_COLUMN] if has_x else []) + [name for name in names if name != X_COLUMN]
+    if points is None or points >= hi - lo:
+        return StatsColumns(out_names, {name: stats.columns[name][lo:hi] for name in out_names})
+
+    numeric = [name for name in names if np.issubdtype(stats.columns[name].dtype, np.number)]
+    share = max(points // max(len(numeric), 1), 3)
+    selected = []
+    for name in numeric:
+        y = np.asarray(stats.columns[name][lo:hi], dtype=np.float64)
+        column_method = default_method(name) if method == "auto" else method
+        if column_method == "minmax":
+            # Two points per bucket plus both ends
+            selected.append(minmax_indices(y, share - 2))
+        else:
+            selected.append(lttb_indices(x, y, share))
+    indices = np.unique(np.concatenate(selected)) if selected else lttb_indices(x, x, points)
+    if len(indices) > points:
+        # Shares rounded up for many columns: thin the union evenly, keeping both ends.
+        indices = indices[np.unique(np.linspace(0, len(indices) - 1, points).round().astype(np.int64))]
+
+    indices = indices + lo
+    return StatsColumns(out_names, {name: np.asarray(stats.columns[name])[indices] for name in out_names})
\ No newline at end of file
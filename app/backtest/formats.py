@@ -0,0 +1,98 @@
+from typing import Optional
+import numpy as np
+from fastapi.responses import JSONResponse
+from app.backtest.stats import StatsColumns
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pyarrow = None
+
+# Response formats of time-series endpoints -> media type.
+#   json     the default: {"code", "data": [{column: value, ...}, ...], "message"}
+#   columns  column-oriented JSON: {"code", "data": {"rows", "columns": {column: [values]}}, "message"}
+#   msgpack  the same envelope in MessagePack, with numeric columns as raw little-endian arrays
+#            ({"dtype": "float64", "data": <bin>}) that map straight onto JS typed arrays
+#   arrow    an Arrow IPC stream of one record batch, without the envelope
+MEDIA_TYPES = {
+    "json": "application/json",
+    "columns": "application/vnd.backtest.columns+json",
+    "msgpack": "application/msgpack",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+_ALIASES = {
+    "application/x-msgpack": "msgpack",
+    "application/x-apache-arrow-stream": "arrow",
+}
+
+def available_formats() -> list[str]:
+    formats = ["json", "columns"]
+    if msgpack is not None:
+        formats.append("msgpack")
+    if pyarrow is not None:
+        formats.append("arrow")
+    return formats
+
+def negotiate_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """
+    The series format to respond with: `requested` (a `format` query parameter) if given,
+    else the best available match for the `Accept` header, else "json".
+    Raises ValueError if `requested` is unknown or its library is not installed.
+    """
+    formats = available_formats()
+    if requested:
+        if requested not in formats:
+            raise ValueError(f"Unsupported format '{requested}'; available: {', '.join(formats)}")
+        return requested
+    if not accept:
+        return "json"
+    by_media_type = {media_type: name for name, media_type in MEDIA_TYPES.items()}
+    by_media_type.update(_ALIASES)
+    candidates = []
+    for rank, item in enumerate(accept.split(',')):
+        media_type, _, params = item.strip().partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        name = by_media_type.get(media_type.strip().lower())
+        if name in formats and q > 0:
+            candidates.append((q, -rank, name))
+    return max(candidates)[2] if candidates else "json"
+
+def _binary_column(values: np.ndarray):
+    values = np.asarray(values)
+    if values.dtype.kind in "biuf":
+        values = values.astype(values.dtype.newbyteorder('<'), copy=False)
+        return {"dtype": values.dtype.name, "data": np.ascontiguousarray(values).tobytes()}
+    return values.tolist()
+
+def encode_series(stats: StatsColumns, fmt: str) -> bytes:
+    """
+    Serialize the selected stats columns in `fmt` (see MEDIA_TYPES).
+    """
+    if fmt == "json":
+        return JSONResponse({"code": 0, "data": stats.to_records(), "message": "ok"}).body
+    if fmt == "columns":
+        data = {"rows": len(stats), "columns": {name: np.asarray(stats.columns[name]).tolist() for name in stats.names}}
+        return JSONResponse({"code": 0, "data": data, "message": "ok"}).body
+    if fmt == "msgpack":
+        data = {"rows": len(stats), "columns": {name: _binary_column(stats.columns[name]) for name in stats.names}}
+        return msgpack.packb({"code": 0, "data": data, "message": "ok"}, use_bin_type=True)
+    if fmt == "arrow":
+        table = pyarrow.table({name: np.asarray(stats.columns[name]) for name in stats.names})
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    raise ValueError(f"Unknown format '{fmt}'")
\ No newline at end of file
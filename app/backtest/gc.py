@@ -0,0 +1,51 @@
+import asyncio
+import logging
+from typing import Optional
+from app.core.config import settings
+from app.crud import v6_single_backtest as crud
+from app.database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+class BacktestGarbageCollector:
+    """
+    Removes deleted (tombstoned) backtests in the background: their trashed run directories
+    and archives, and their rows. Runs every BACKTEST_GC_INTERVAL seconds, or sooner after `notify`.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def run_once(self) -> int:
+        async with SessionLocal() as db:
+            return await crud.collect_deleted_backtests(db)
+
+    async def _loop(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                removed = await self.run_once()
+                if removed:
+                    logger.info("Garbage-collected %d deleted backtest(s)", removed)
+            except Exception:
+                logger.exception("Backtest garbage collection failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.BACKTEST_GC_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+garbage_collector = BacktestGarbageCollector()
\ No newline at end of file
@@ -0,0 +1,192 @@
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+import zstandard
+from fastapi import Request
+from fastapi.responses import Response
+from app.core.config import settings
+from app.backtest.storage import artifact_storage, atomic_write
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+# Content codings we can produce, best first, with their compressors and variant file suffixes.
+ENCODERS: dict[str, tuple[Callable[[bytes], bytes], str]] = {
+    "zstd": (lambda data: zstandard.ZstdCompressor(level=12).compress(data), ".zst"),
+    **({"br": (lambda data: brotli.compress(data, quality=9), ".br")} if brotli is not None else {}),
+    "gzip": (lambda data: gzip.compress(data, compresslevel=9, mtime=0), ".gz"),
+}
+# Bodies smaller than this are sent uncompressed.
+MIN_COMPRESS_BYTES = 1024
+
+def make_etag(*parts) -> str:
+    """
+    Strong ETag from everything that identifies a representation (artifact signature, query).
+    """
+    digest = hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()[:32]
+    return f'"{digest}"'
+
+def _encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    # Each content coding is a different representation and gets its own strong ETag.
+    return etag if encoding is None else f'{etag[:-1]}-{encoding}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag == '*':
+            return True
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag or any(tag == _encoded_etag(etag, encoding) for encoding in ENCODERS):
+            return True
+    return False
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    The best content coding we support that `Accept-Encoding` allows, or None for identity.
+    """
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get('*', 0.0)
+    candidates = [(accepted.get(encoding, wildcard), -rank, encoding) for rank, encoding in enumerate(ENCODERS)]
+    q, _, encoding = max(candidates)
+    return encoding if q > 0 else None
+
+def _variant_path(backtest_id: int, etag: str, encoding: Optional[str]) -> str:
+    suffix = ENCODERS[encoding][1] if encoding else ""
+    return os.path.join(variants_dir(backtest_id), etag.strip('"') + suffix)
+
+def variants_dir(backtest_id: int) -> str:
+    return os.path.join(settings.BACKTEST_HTTP_CACHE_DIR, str(backtest_id))
+
+def _read_file(path: str) -> Optional[bytes]:
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+class VariantMemoryCache:
+    """
+    LRU cache of response variants that are not worth a file, bounded by the total size of
+    the bodies it holds.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: tuple, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+variant_memory_cache = VariantMemoryCache(settings.BACKTEST_HTTP_CACHE_MEMORY_BYTES)
+
+def _load_variant(backtest_id: int, etag: str, encoding: Optional[str], build: Callable[[], bytes], persist: bool = True) -> tuple[bytes, Optional[str]]:
+    """
+    The cached body in `encoding`, creating it (and the identity body it is compressed from)
+    on first use. Returns the body and the encoding it is actually in: small bodies are kept
+    uncompressed. Compressed variants are stored on disk when `persist` is set; identity
+    bodies, which only duplicate the artifacts they are built from, and the variants of
+    other representations go to the bounded in-memory cache.
+    """
+    persist = persist and encoding is not None
+    if persist:
+        path = _variant_path(backtest_id, etag, encoding)
+        body = _read_file(path)
+    else:
+        key = (backtest_id, etag, encoding)
+        body = variant_memory_cache.get(key)
+    if body is not None:
+        return body, encoding
+    if encoding is None:
+        body = build()
+    else:
+        body, _ = _load_variant(backtest_id, etag, None, build, persist)
+        if len(body) < MIN_COMPRESS_BYTES:
+            return body, None
+        body = ENCODERS[encoding][0](body)
+    if persist:
+        atomic_write(path, body)
+    else:
+        variant_memory_cache.put(key, body)
+    return body, encoding
+
+async def cached_response(
+    request: Request,
+    backtest_id: int,
+    etag: str,
+    final: bool,
+    build: Callable[[], bytes],
+    media_type: str = "application/json",
+    vary: str = "Accept-Encoding",
+    persist: bool = True,
+) -> Response:
+    """
+    Conditional, compressed response for a backtest artifact.
+
+    `If-None-Match` is answered with 304 without reading anything. Responses are always
+    revalidated (`no-cache`): a restarted run is served from the same URL. For finished
+    runs (`final`), each compressed variant is stored the first time it is asked for and
+    served from disk afterwards; other bodies are built and compressed per request. Representations with open-ended parameters (windows,
+    downsampling) pass `persist=False` and are only cached in memory, so clients cannot
+    fill the disk. `build` runs on the artifact I/O pool.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    headers = {"Vary": vary, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={**headers, "ETag": _encoded_etag(etag, encoding)})
+
+    if final:
+        body, encoding = await artifact_storage.run(_load_variant, backtest_id, etag, encoding, build, persist)
+    else:
+        body = await artifact_storage.run(build)
+        if encoding is not None and len(body) >= MIN_COMPRESS_BYTES:
+            body = await artifact_storage.run(ENCODERS[encoding][0], body)
+        else:
+            encoding = None
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    headers["ETag"] = _encoded_etag(etag, encoding)
+    return Response(content=body, media_type=media_type, headers=headers)
\ No newline at end of file
@@ -0,0 +1,145 @@
+import asyncio
+import os
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from app.core.config import settings
+from app.backtest.storage import artifact_storage
+
+READ_CHUNK_SIZE = 64 * 1024
+
+class LogBuffer:
+    """
+    Bounded in-memory tail of a running backtest's output, addressed by byte offset in the log file.
+    Readers wait on `changed()` to be woken as soon as new output arrives.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0  # offset just past the last byte written
+        self.closed = False
+        self._chunks: deque[tuple[int, bytes]] = deque()
+        self._buffered = 0
+        self._changed = asyncio.Event()
+
+    def append(self, data: bytes):
+        self._chunks.append((self.size, data))
+        self.size += len(data)
+        self._buffered += len(data)
+        while self._buffered > self.max_bytes and len(self._chunks) > 1:
+            _, dropped = self._chunks.popleft()
+            self._buffered -= len(dropped)
+        self._notify()
+
+    def close(self):
+        self.closed = True
+        self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def changed(self) -> asyncio.Event:
+        return self._changed
+
+    def read(self, offset: int) -> Optional[bytes]:
+        """
+        Bytes from `offset` to the end, or None if that range is no longer buffered.
+        """
+        if not self._chunks or offset < self._chunks[0][0]:
+            return b"" if offset >= self.size else None
+        parts = []
+        for start, data in self._chunks:
+            end = start + len(data)
+            if end <= offset:
+                continue
+            parts.append(data[max(offset - start, 0):])
+        return b"".join(parts)
+
+_buffers: dict[int, LogBuffer] = {}
+
+def open_log_buffer(backtest_id: int) -> LogBuffer:
+    buffer = LogBuffer(settings.BACKTEST_LOG_BUFFER_BYTES)
+    _buffers[backtest_id] = buffer
+    return buffer
+
+def close_log_buffer(backtest_id: int):
+    buffer = _buffers.pop(backtest_id, None)
+    if buffer is not None:
+        buffer.close()
+
+def get_log_buffer(backtest_id: int) -> Optional[LogBuffer]:
+    return _buffers.get(backtest_id)
+
+async def tee_stream(stream: asyncio.StreamReader, log_file, buffer: LogBuffer):
+    """
+    Copy a subprocess pipe to the log file and the in-memory buffer until EOF.
+    """
+    while True:
+        data = await stream.read(READ_CHUNK_SIZE)
+        if not data:
+            break
+        log_file.write(data)
+        log_file.flush()
+        buffer.append(data)
+
+def read_log_range(log_path: str, offset: int, limit: int = READ_CHUNK_SIZE) -> bytes:
+    with open(log_path, 'rb') as f:
+        f.seek(offset)
+        return f.read(limit)
+
+def _sse_event(data: bytes, offset: int, event: Optional[str] = None) -> bytes:
+    lines = [f"id: {offset}"]
+    if event:
+        lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.decode('utf-8', errors='replace').split('\n'))
+    return ("\n".join(lines) + "\n\n").encode('utf-8')
+
+async def follow_log(
+    backtest_id: int,
+    log_path: str,
+    offset: int,
+    is_active: Callable[[], Awaitable[bool]],
+    read_range: Optional[Callable[[int], bytes]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Server-Sent Events stream of the log from `offset`, pushing complete lines as they are written.
+
+    New output is read from the in-memory buffer when the run belongs to this process and from
+    the log file otherwise (e.g. a run on another worker), or with `read_range(offset)` when
+    given (e.g. for an archived log). The stream ends with an `end` event
+    once the run is no longer active and everything has been sent.
+    """
+    pending = b""
+    while True:
+        buffer = get_log_buffer(backtest_id)
+        waiter = buffer.changed() if buffer is not None else None
+        data = buffer.read(offset + len(pending)) if buffer is not None else None
+        if data is None and read_range is not None:
+            data = await artifact_storage.run(read_range, offset + len(pending))
+        elif data is None:
+            data = await artifact_storage.run(read_log_range, log_path, offset + len(pending)) if os.path.exists(log_path) else b""
+
+        if data:
+            pending += data
+            cut = pending.rfind(b"\n") + 1
+            if cut:
+                offset += cut
+                yield _sse_event(pending[:cut - 1], offset)
+                pending = pending[cut:]
+            if len(data) == READ_CHUNK_SIZE:
+                continue
+
+        if (buffer is None or buffer.closed) and not data and not await is_active():
+            if pending:
+                offset += len(pending)
+                yield _sse_event(pending, offset)
+            yield _sse_event(b"", offset, event="end")
+            return
+
+        if waiter is not None and not buffer.closed:
+            try:
+                await asyncio.wait_for(waiter.wait(), timeout=settings.BACKTEST_LOG_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+        else:
+            await asyncio.sleep(settings.BACKTEST_LOG_POLL_INTERVAL)
\ No newline at end of file
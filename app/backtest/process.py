@@ -0,0 +1,59 @@
+import asyncio
+import os
+import signal
+import socket
+
+# Backtest subprocesses started by this process, by backtest id. Each one leads its own
+# process group, so signalling the group also reaches passivbot and anything it spawned.
+running_processes: dict[int, asyncio.subprocess.Process] = {}
+
+def kill_process_group(pgid: int, sig: int = signal.SIGTERM) -> bool:
+    try:
+        os.killpg(pgid, sig)
+    except (ProcessLookupError, PermissionError):
+        return False
+    return True
+
+def is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def is_backtest_process(pid: int, marker: str) -> bool:
+    """
+    Whether `pid` is still one of our backtest wrappers rather than an unrelated process that
+    reused the PID. `marker` is a string that appears in the wrapper's command line.
+    """
+    try:
+        with open(f"/proc/{pid}/cmdline", 'rb') as f:
+            return marker.encode() in f.read()
+    except OSError:
+        # No procfs (e.g. macOS): fall back to trusting a live PID.
+        return is_alive(pid)
+
+def owner_is_local_and_dead(lease_owner: str | None) -> bool:
+    """
+    Whether a lease owner ("host:pid", see `default_worker_id`) ran on this host and has exited.
+    """
+    if not lease_owner:
+        return False
+    host, _, pid = lease_owner.rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    return int(pid) != os.getpid() and not is_alive(int(pid))
+
+async def terminate(process: asyncio.subprocess.Process, grace_seconds: float):
+    """
+    SIGTERM the process group, then SIGKILL it if it is still running after `grace_seconds`.
+    """
+    if process.returncode is not None:
+        return
+    kill_process_group(process.pid, signal.SIGTERM)
+    try:
+        await asyncio.wait_for(asyncio.shield(process.wait()), timeout=grace_seconds)
+    except asyncio.TimeoutError:
+        kill_process_group(process.pid, signal.SIGKILL)
\ No newline at end of file
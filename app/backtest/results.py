@@ -0,0 +1,65 @@
+import re
+from typing import Optional
+import numpy as np
+from app.backtest.stats import load_stats
+
+# Labels used by passivbot's backtest_result.txt for the metrics we index, lower-cased.
+RESULT_LABELS = {
+    "adg": ("average daily gain", "adg"),
+    "final_balance": ("final balance",),
+    "max_drawdown": ("max drawdown", "drawdown max"),
+    "hours_stuck_max": ("hours stuck max", "hours stuck (max)", "max hours stuck"),
+    "n_fills": ("no. fills", "n fills", "number of fills"),
+}
+
+_ROW = re.compile(r"^\|\s*(?P<key>[^|]+?)\s*\|\s*(?P<value>[^|]*?)\s*\|")
+
+def _parse_number(value: str) -> Optional[float]:
+    text = value.strip().replace(',', '')
+    percent = text.endswith('%')
+    try:
+        number = float(text.rstrip('%'))
+    except ValueError:
+        return None
+    return number / 100 if percent else number
+
+def parse_result_table(text: str) -> dict[str, str]:
+    """
+    Key/value rows of a backtest_result.txt table. When a key repeats (long and short
+    sections), the first occurrence wins.
+    """
+    rows = {}
+    for line in text.splitlines():
+        match = _ROW.match(line.strip())
+        if match:
+            rows.setdefault(match.group('key').strip().lower(), match.group('value'))
+    return rows
+
+def extract_metrics(result_path: Optional[str], stats_path: Optional[str]) -> dict:
+    """
+    Key metrics of a finished run. Percentages are stored as fractions. Values missing from
+    the result table are derived from stats.csv where possible.
+    """
+    metrics = {name: None for name in RESULT_LABELS}
+    if result_path:
+        with open(result_path, 'r', encoding='utf-8') as f:
+            rows = parse_result_table(f.read())
+        for name, labels in RESULT_LABELS.items():
+            for label in labels:
+                if label in rows:
+                    metrics[name] = _parse_number(rows[label])
+                    break
+
+    if stats_path and (metrics["final_balance"] is None or metrics["max_drawdown"] is None):
+        stats = load_stats(stats_path)
+        if len(stats) and metrics["final_balance"] is None and "balance" in stats.columns:
+            metrics["final_balance"] = float(stats.columns["balance"][-1])
+        if len(stats) and metrics["max_drawdown"] is None and "equity" in stats.columns:
+            equity = np.asarray(stats.columns["equity"], dtype=np.float64)
+            peak = np.maximum.accumulate(equity)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                metrics["max_drawdown"] = float(np.nanmax(np.where(peak > 0, 1 - equity / peak, 0.0)))
+
+    if metrics["n_fills"] is not None:
+        metrics["n_fills"] = int(metrics["n_fills"])
+    return metrics
\ No newline at end of file
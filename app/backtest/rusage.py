@@ -0,0 +1,76 @@
+"""
+Process wrapper that runs a command and reports its resource usage.
+
+    python rusage.py OUT_JSON -- CMD [ARGS...]
+
+Runs CMD with the wrapper's stdio, waits for it with wait4(), and writes its CPU times,
+peak RSS and I/O byte counts to OUT_JSON. Exits with CMD's return code. Kept free of
+project imports so it can be run by path from any working directory.
+"""
+import json
+import os
+import signal
+import subprocess
+import sys
+
+def _proc_io(pid: int) -> dict:
+    """
+    /proc/<pid>/io of an exited-but-unreaped child (Linux only).
+    """
+    counters = {}
+    try:
+        with open(f"/proc/{pid}/io", 'r') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                counters[key.strip()] = int(value)
+    except (OSError, ValueError):
+        pass
+    return counters
+
+def main(argv: list[str]) -> int:
+    out_path, separator, *cmd = argv
+    if separator != '--' or not cmd:
+        print(__doc__, file=sys.stderr)
+        return 2
+
+    process = subprocess.Popen(cmd)
+    # Forward termination to the child so that it is not orphaned. os.kill rather than
+    # Popen.send_signal, which polls and could reap the child before wait4() sees it.
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda signum, frame: os.kill(process.pid, signum))
+
+    io = {}
+    if hasattr(os, 'waitid'):
+        while True:
+            try:
+                os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+                break
+            except InterruptedError:
+                continue
+        io = _proc_io(process.pid)
+    while True:
+        try:
+            _, status, usage = os.wait4(process.pid, 0)
+            break
+        except InterruptedError:
+            continue
+    returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS.
+    max_rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    report = {
+        "returncode": returncode,
+        "user_cpu_seconds": usage.ru_utime,
+        "system_cpu_seconds": usage.ru_stime,
+        "max_rss_bytes": max_rss,
+        "read_bytes": io.get("read_bytes", usage.ru_inblock * 512),
+        "write_bytes": io.get("write_bytes", usage.ru_oublock * 512),
+        "read_chars": io.get("rchar"),
+        "write_chars": io.get("wchar"),
+    }
+    with open(out_path, 'w') as f:
+        json.dump(report, f)
+    return returncode if returncode >= 0 else 128 - returncode
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
\ No newline at end of file
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+import socket
+from typing import Optional
+from app.core.config import settings
+from app.crud import v6_single_backtest as crud
+from app.database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class BacktestScheduler:
+    """
+    Runs queued v6 single backtests with a bounded number of concurrent subprocesses.
+
+    The queue itself lives in the `v6_single_backtest_queue` table, so pending runs survive
+    a restart. Entries are claimed with a database lease that is renewed by a heartbeat while
+    the run is in progress, which lets any number of schedulers (in the API process or in
+    `python -m app.worker` processes on other hosts) share one queue. Every run gets its own
+    database session rather than borrowing a request's.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        worker_id: Optional[str] = None,
+        lease_seconds: Optional[int] = None,
+    ):
+        self.max_concurrency = max_concurrency or settings.backtest_max_concurrency
+        self.poll_interval = poll_interval or settings.BACKTEST_QUEUE_POLL_INTERVAL
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds or settings.BACKTEST_LEASE_SECONDS
+        self._capacity = asyncio.Semaphore(self.max_concurrency)
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: dict[int, asyncio.Task] = {}
+
+    @property
+    def is_running(self) -> bool:
+        return self._dispatcher is not None
+
+    async def start(self):
+        if self._dispatcher is not None:
+            return
+        async with SessionLocal() as db:
+            reaped = await crud.reap_orphaned_backtests(db)
+            requeued = await crud.requeue_interrupted_backtests(db)
+        if reaped:
+            logger.info("Reaped %d backtest(s) orphaned by a dead worker", reaped)
+        if requeued:
+            logger.info("Re-queued %d interrupted backtest(s)", requeued)
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def stop(self):
+        if self._dispatcher is None:
+            return
+        self._dispatcher.cancel()
+        tasks = [self._dispatcher, *self._running.values()]
+        for task in self._running.values():
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatcher = None
+        self._running.clear()
+
+    def notify(self):
+        """
+        Wake the dispatcher after something has been enqueued.
+        """
+        self._wakeup.set()
+
+    async def _dispatch_loop(self):
+        while True:
+            await self._capacity.acquire()
+            try:
+                async with SessionLocal() as db:
+                    entry = await crud.claim_next_queued_backtest(db, self.worker_id, self.lease_seconds)
+            except Exception:
+                logger.exception("Failed to claim the next queued backtest")
+                entry = None
+
+            if entry is None:
+                self._capacity.release()
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            logger.info("Worker %s claimed backtest %s", self.worker_id, entry.backtest_id)
+            self._running[entry.backtest_id] = asyncio.create_task(
+                self._run(entry.backtest_id, bool(entry.force_rerun), entry.max_runtime_seconds)
+            )
+
+    async def _heartbeat(self, backtest_id: int):
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with SessionLocal() as db:
+                    held = await crud.renew_backtest_lease(db, backtest_id, self.worker_id, self.lease_seconds)
+            except Exception:
+                logger.exception("Failed to renew the lease on backtest %s", backtest_id)
+                continue
+            if not held:
+                # Someone else has cancelled or reclaimed the run: stop ours. Cancelling the
+                # run task makes the runner terminate the process group.
+                logger.warning("Worker %s lost the lease on backtest %s, stopping it", self.worker_id, backtest_id)
+                run = self._running.get(backtest_id)
+                if run is not None:
+                    run.cancel()
+                return
+
+    async def _run(self, backtest_id: int, force: bool = False, max_runtime: Optional[int] = None):
+        heartbeat = asyncio.create_task(self._heartbeat(backtest_id))
+        try:
+            async with SessionLocal() as db:
+                await crud.run_backtest_process(db, backtest_id, force=force, max_runtime=max_runtime, worker_id=self.worker_id)
+            async with SessionLocal() as db:
+                await crud.complete_queue_entry(db, backtest_id, self.worker_id)
+        except asyncio.CancelledError:
+            # Shutting down or lost the lease: the runner has terminated the subprocess; leave the
+            # queue entry to its new owner, or in place so the run is reclaimed once its lease expires.
+            raise
+        except Exception:
+            logger.exception("Backtest %s ended with an unexpected error", backtest_id)
+        finally:
+            heartbeat.cancel()
+            self._running.pop(backtest_id, None)
+            self._capacity.release()
+            self.notify()
+
+    async def get_stats(self) -> dict:
+        async with SessionLocal() as db:
+            stats = await crud.get_queue_stats(db)
+        stats.update({
+            "worker_id": self.worker_id if self.is_running else None,
+            "max_concurrency": self.max_concurrency if self.is_running else 0,
+            "active": len(self._running),
+        })
+        return stats
+
+scheduler = BacktestScheduler()
\ No newline at end of file
@@ -0,0 +1,163 @@
+import io
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from app.core.config import settings
+
+COLUMNS_DIR_SUFFIX = ".cols"
+META_FILE = "meta.json"
+
+class StatsColumns:
+    """
+    Read-only, column-oriented view of a backtest's stats.csv.
+    Each column is a NumPy array memory-mapped from its own .npy file.
+    """
+
+    def __init__(self, names: list[str], columns: dict[str, np.ndarray]):
+        self.names = names
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns[self.names[0]]) if self.names else 0
+
+    def to_records(self) -> list[dict]:
+        values = [self.columns[name].tolist() for name in self.names]
+        return [dict(zip(self.names, row)) for row in zip(*values)]
+
+def _source_signature(csv_path: str) -> tuple[int, int]:
+    st = os.stat(csv_path)
+    return st.st_mtime_ns, st.st_size
+
+def _columns_dir(csv_path: str) -> str:
+    return csv_path + COLUMNS_DIR_SUFFIX
+
+def _read_meta(columns_dir: str) -> dict | None:
+    try:
+        with open(os.path.join(columns_dir, META_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def convert_stats_csv(csv_path: str) -> str:
+    """
+    Convert stats.csv into one .npy file per column, next to the CSV.
+    The conversion is written to a temporary directory and renamed into place; the previous
+    conversion is renamed aside first, so readers that have it mapped keep their files.
+    """
+    mtime_ns, size = _source_signature(csv_path)
+    df = pd.read_csv(csv_path)
+    columns_dir = _columns_dir(csv_path)
+    tmp_dir = f"{columns_dir}.tmp{uuid.uuid4().hex}"
+    os.makedirs(tmp_dir)
+
+    names = [str(name) for name in df.columns]
+    for index, name in enumerate(names):
+        values = df.iloc[:, index].to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)
+        np.save(os.path.join(tmp_dir, f"{index}.npy"), values, allow_pickle=False)
+    with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump({"mtime_ns": mtime_ns, "size": size, "columns": names, "rows": len(df)}, f)
+
+    old_dir = f"{columns_dir}.old{uuid.uuid4().hex}"
+    try:
+        os.rename(columns_dir, old_dir)
+    except FileNotFoundError:
+        old_dir = None
+    try:
+        os.replace(tmp_dir, columns_dir)
+    except OSError:
+        # A concurrent conversion got its result in place first.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+    return columns_dir
+
+def _open_columns(csv_path: str, signature: tuple[int, int]) -> StatsColumns:
+    columns_dir = _columns_dir(csv_path)
+    meta = _read_meta(columns_dir)
+    if meta is None or (meta["mtime_ns"], meta["size"]) != signature:
+        convert_stats_csv(csv_path)
+        meta = _read_meta(columns_dir)
+    names = meta["columns"]
+    columns = {
+        name: np.load(os.path.join(columns_dir, f"{index}.npy"), mmap_mode='r', allow_pickle=False)
+        for index, name in enumerate(names)
+    }
+    return StatsColumns(names, columns)
+
+def _open_archived_columns(archive, csv_member: str) -> StatsColumns:
+    """
+    Stats of an archived run, decompressed into memory: from its column files when they were
+    archived along with the CSV, else by parsing the archived stats.csv.
+    """
+    columns_dir = csv_member + COLUMNS_DIR_SUFFIX
+    meta_member = f"{columns_dir}/{META_FILE}"
+    if meta_member in archive:
+        meta = json.loads(archive.read(meta_member))
+        source = archive.members[csv_member]
+        if (meta["mtime_ns"], meta["size"]) == (source["mtime_ns"], source["size"]):
+            names = meta["columns"]
+            columns = {
+                name: np.load(io.BytesIO(archive.read(f"{columns_dir}/{index}.npy")), allow_pickle=False)
+                for index, name in enumerate(names)
+            }
+            return StatsColumns(names, columns)
+    df = pd.read_csv(io.BytesIO(archive.read(csv_member)))
+    names = [str(name) for name in df.columns]
+    columns = {}
+    for index, name in enumerate(names):
+        values = df.iloc[:, index].to_numpy()
+        columns[name] = values.astype(str) if values.dtype == object else values
+    return StatsColumns(names, columns)
+
+class StatsCache:
+    """
+    LRU cache of opened stats columns, keyed by CSV path and invalidated when the CSV's
+    mtime or size changes.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[tuple[int, int], StatsColumns]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, csv_path: str) -> StatsColumns:
+        signature = _source_signature(csv_path)
+        return self._get(csv_path, signature, lambda: _open_columns(csv_path, signature))
+
+    def get_archived(self, archive, csv_member: str) -> StatsColumns:
+        key = f"{archive.path}::{csv_member}"
+        return self._get(key, archive.signature, lambda: _open_archived_columns(archive, csv_member))
+
+    def _get(self, key: str, signature: tuple[int, int], opener) -> StatsColumns:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == signature:
+                self._entries.move_to_end(key)
+                return cached[1]
+
+        stats = opener()
+        with self._lock:
+            self._entries[key] = (signature, stats)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+stats_cache = StatsCache(settings.STATS_CACHE_MAX_ENTRIES)
+
+def load_stats(csv_path: str) -> StatsColumns:
+    return stats_cache.get(csv_path)
+
+def load_archived_stats(archive, csv_member: str) -> StatsColumns:
+    return stats_cache.get_archived(archive, csv_member)
\ No newline at end of file
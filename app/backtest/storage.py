@@ -0,0 +1,114 @@
+import asyncio
+import functools
+import json
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from app.core.config import settings
+from app.metrics import track_io
+
+def atomic_write(path: str, data: bytes, durable: bool = True):
+    """
+    Write `data` to a temporary file next to `path`, fsync it and rename it into place,
+    so readers never see a partially written file. Without `durable` the fsync is skipped:
+    still atomic for readers, but the file may be lost or empty after a crash.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}.{threading.get_ident()}"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class ArtifactStorage:
+    """
+    Blocking file work on backtest artifacts (configs, logs, results, stats, run directories),
+    run on a bounded thread pool so that a large read, parse or delete never stalls the event loop.
+
+    Deleted run directories are first renamed into a trash directory, which is cheap, and removed
+    later by `purge_trash` (see the garbage collector).
+    """
+
+    def __init__(self, max_workers: int, trash_dir: str):
+        self.max_workers = max_workers
+        self.trash_dir = trash_dir
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="artifact-io")
+        return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        with track_io():
+            return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def read_bytes(self, path: str) -> Optional[bytes]:
+        """
+        The contents of `path`, or None if it does not exist.
+        """
+        def read():
+            try:
+                with open(path, 'rb') as f:
+                    return f.read()
+            except FileNotFoundError:
+                return None
+        return await self.run(read)
+
+    async def write_bytes(self, path: str, data: bytes, durable: bool = True):
+        await self.run(atomic_write, path, data, durable)
+
+    async def write_json(self, path: str, data, indent: Optional[int] = 4, durable: bool = True):
+        await self.run(atomic_write, path, json.dumps(data, indent=indent).encode('utf-8'), durable)
+
+    def discard_sync(self, path: str) -> Optional[str]:
+        """
+        Move a file or directory into the trash. Returns its trash path, or None if it did not exist.
+        """
+        os.makedirs(self.trash_dir, exist_ok=True)
+        target = os.path.join(self.trash_dir, f"{uuid.uuid4().hex}-{os.path.basename(path.rstrip(os.sep))}")
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            return None
+        return target
+
+    async def discard(self, path: str) -> Optional[str]:
+        return await self.run(self.discard_sync, path)
+
+    def purge_trash_sync(self) -> int:
+        """
+        Remove everything in the trash. Returns the number of entries removed.
+        """
+        if not os.path.isdir(self.trash_dir):
+            return 0
+        removed = 0
+        for entry in os.scandir(self.trash_dir):
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            else:
+                os.remove(entry.path)
+            removed += 1
+        return removed
+
+    async def purge_trash(self) -> int:
+        return await self.run(self.purge_trash_sync)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+artifact_storage = ArtifactStorage(settings.ARTIFACT_IO_THREADS, settings.BACKTEST_TRASH_DIR)
\ No newline at end of file
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from typing import Optional
+from app.core.config import settings
+
+def compute_run_hash(config: dict, cli_params: dict) -> str:
+    """
+    Canonical hash of everything that determines a backtest's output: its config and the
+    command line parameters passed to passivbot.
+    """
+    canonical = json.dumps({"config": config, "params": cli_params}, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def _run_dir(run_hash: str) -> str:
+    return os.path.join(settings.BACKTEST_STORE_DIR, run_hash[:2], run_hash)
+
+def _link_or_copy(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def find_stored_run(run_hash: str) -> Optional[str]:
+    run_dir = _run_dir(run_hash)
+    return run_dir if os.path.isdir(run_dir) else None
+
+def store_run(run_hash: str, plots_dir: str, log_path: str):
+    """
+    Add a finished run's artifacts (its plots directory and log) to the content-addressed store.
+    Plot files are hard-linked where possible; the log is copied, since a re-run of the backtest
+    rewrites it in place. The entry appears atomically; an existing entry is kept.
+    """
+    run_dir = _run_dir(run_hash)
+    if os.path.isdir(run_dir):
+        return run_dir
+    # Unique per call: identical runs may finish together on several threads and hosts.
+    tmp_dir = f"{run_dir}.tmp{uuid.uuid4().hex}"
+    try:
+        os.makedirs(os.path.join(tmp_dir, 'plots'))
+        shutil.copytree(plots_dir, os.path.join(tmp_dir, 'plots', os.path.basename(plots_dir)), copy_function=_link_or_copy)
+        if os.path.exists(log_path):
+            shutil.copyfile(log_path, os.path.join(tmp_dir, 'backtest.log'))
+        os.replace(tmp_dir, run_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.isdir(run_dir):
+            raise
+        # Another worker stored the same run first.
+    return run_dir
+
+def link_stored_run(run_hash: str, plots_root: str, log_path: str) -> bool:
+    """
+    Materialize a stored run under a backtest's directory by hard-linking its artifacts.
+    Returns False when the store has no entry for `run_hash`.
+    """
+    run_dir = find_stored_run(run_hash)
+    if run_dir is None:
+        return False
+    shutil.copytree(os.path.join(run_dir, 'plots'), plots_root, copy_function=_link_or_copy, dirs_exist_ok=True)
+    stored_log = os.path.join(run_dir, 'backtest.log')
+    if os.path.exists(stored_log):
+        # Copied rather than linked: the note below must not leak into the stored log.
+        shutil.copyfile(stored_log, log_path)
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write(f"\nResults reused from an identical run ({run_hash}).\n")
+    return True
\ No newline at end of file
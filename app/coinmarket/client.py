@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from typing import Optional
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: CMC rate limiting and transient server errors.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+def key_fingerprint(api_key: str) -> str:
+    """
+    Stable identifier for an API key that does not reveal it (cache keys, logs).
+    """
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()
+
+class CoinMarketCapClient:
+    """
+    Shared async client for the CoinMarketCap API: one pooled keep-alive connection pool,
+    explicit connect/read timeouts, and retries with exponential backoff on connection errors,
+    timeouts, 429 and 5xx (honouring `Retry-After`).
+
+    `base_url` and `transport` can be overridden to run against a local stub server.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url or settings.CMC_BASE_URL
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._verify_cache: dict[str, tuple[float, httpx.Response]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                transport=self.transport,
+                timeout=httpx.Timeout(settings.CMC_READ_TIMEOUT, connect=settings.CMC_CONNECT_TIMEOUT),
+                limits=httpx.Limits(max_connections=settings.CMC_MAX_CONNECTIONS, max_keepalive_connections=settings.CMC_MAX_CONNECTIONS),
+                headers={"Accept": "application/json"},
+            )
+        return self._client
+
+    async def get(self, path: str, api_key: str, params: Optional[dict] = None) -> httpx.Response:
+        """
+        GET `path` with `api_key`. Returns the last response, which may be an error response
+        once retries are exhausted; raises `httpx.HTTPError` if no response was received.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.get(path, params=params, headers={"X-CMC_PRO_API_KEY": api_key})
+                if response.status_code not in RETRY_STATUSES or attempt >= settings.CMC_MAX_RETRIES:
+                    return response
+                delay = self._retry_after(response)
+            except httpx.TransportError as e:
+                if attempt >= settings.CMC_MAX_RETRIES:
+                    raise
+                delay = None
+                logger.warning("CoinMarketCap request %s failed (%s), retrying", path, e)
+            backoff = settings.CMC_RETRY_BACKOFF_SECONDS * 2 ** attempt
+            await asyncio.sleep(max(backoff, delay or 0))
+            attempt += 1
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        try:
+            return min(float(response.headers.get("retry-after", "")), 60.0)
+        except ValueError:
+            return None
+
+    async def verify_key(self, api_key: str) -> httpx.Response:
+        """
+        The `/v1/key/info` response for `api_key`. Responses from CMC (valid or not) are reused
+        for CMC_VERIFY_CACHE_TTL seconds, keyed by a hash of the key; transport errors are not cached.
+        """
+        fingerprint = key_fingerprint(api_key)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._verify_cache.get(fingerprint)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+        response = await self.get("/v1/key/info", api_key)
+        if response.status_code not in RETRY_STATUSES:
+            with self._lock:
+                self._verify_cache = {k: v for k, v in self._verify_cache.items() if v[0] > now}
+                self._verify_cache[fingerprint] = (now + settings.CMC_VERIFY_CACHE_TTL, response)
+        return response
+
+    def forget_key(self, api_key: str):
+        with self._lock:
+            self._verify_cache.pop(key_fingerprint(api_key), None)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+cmc_client = CoinMarketCapClient()
\ No newline at end of file
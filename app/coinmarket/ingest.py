@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+import httpx
+from app.core.config import settings
+from app.coinmarket.client import CoinMarketCapClient, cmc_client
+from app.coinmarket.snapshot import coin_snapshot
+from app.crud import coinmarket as crud
+from app.database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+class IngestError(Exception):
+    pass
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    # CMC timestamps are ISO 8601 in UTC ("2013-04-28T00:00:00.000Z"); stored naive like the rest of the DB.
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+def listing_row(coin: dict, fetched_at: datetime) -> dict:
+    quote = (coin.get("quote") or {}).get("USD") or {}
+    return {
+        "cmc_id": coin["id"],
+        "symbol": coin.get("symbol"),
+        "name": coin.get("name"),
+        "slug": coin.get("slug"),
+        "cmc_rank": coin.get("cmc_rank"),
+        "num_market_pairs": coin.get("num_market_pairs"),
+        "price": quote.get("price"),
+        "volume_24h": quote.get("volume_24h"),
+        "percent_change_1h": quote.get("percent_change_1h"),
+        "percent_change_24h": quote.get("percent_change_24h"),
+        "percent_change_7d": quote.get("percent_change_7d"),
+        "market_cap": quote.get("market_cap"),
+        "fully_diluted_market_cap": quote.get("fully_diluted_market_cap"),
+        "circulating_supply": coin.get("circulating_supply"),
+        "total_supply": coin.get("total_supply"),
+        "max_supply": coin.get("max_supply"),
+        "tags": coin.get("tags") or [],
+        "date_added": _parse_datetime(coin.get("date_added")),
+        "last_updated": _parse_datetime(quote.get("last_updated") or coin.get("last_updated")),
+        "fetched_at": fetched_at,
+    }
+
+def metadata_row(info: dict, fetched_at: datetime) -> dict:
+    return {
+        "cmc_id": info["id"],
+        "symbol": info.get("symbol"),
+        "name": info.get("name"),
+        "slug": info.get("slug"),
+        "category": info.get("category"),
+        "description": info.get("description"),
+        "logo": info.get("logo"),
+        "tags": info.get("tags") or [],
+        "urls": info.get("urls") or {},
+        "platform": info.get("platform"),
+        "date_launched": _parse_datetime(info.get("date_launched")),
+        "fetched_at": fetched_at,
+    }
+
+class CoinMarketIngestor:
+    """
+    Keeps the local coin store (`coin_listings`, `coin_metadata`) filled from CoinMarketCap,
+    following the saved CoinMarketCap config: listings up to `fetch_limit` coins every
+    `fetch_interval` hours, and metadata of the listed coins every `metadata_interval` days.
+
+    Due work is checked every CMC_INGEST_CHECK_INTERVAL seconds, or right away after `notify`
+    (e.g. when the config is saved). All I/O is async; large responses are parsed off the event loop.
+    The in-memory `coin_snapshot` is rebuilt after each run that wrote anything.
+    """
+
+    def __init__(self, client: Optional[CoinMarketCapClient] = None):
+        self.client = client or cmc_client
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._run_lock = asyncio.Lock()
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def _get_json(self, path: str, api_key: str, params: dict) -> dict:
+        try:
+            response = await self.client.get(path, api_key, params)
+            payload = await asyncio.to_thread(response.json)
+        except (httpx.HTTPError, ValueError) as e:
+            raise IngestError(f"CoinMarketCap request {path} failed: {str(e) or type(e).__name__}")
+        if response.status_code != 200:
+            message = (payload.get("status") or {}).get("error_message") if isinstance(payload, dict) else None
+            raise IngestError(f"CoinMarketCap request {path} returned {response.status_code}: {message or 'unknown error'}")
+        return payload
+
+    async def fetch_listings(self, api_key: str, limit: int) -> list[dict]:
+        fetched_at = datetime.utcnow()
+        rows = []
+        start = 1
+        while len(rows) < limit:
+            page_size = min(settings.CMC_LISTINGS_PAGE_SIZE, limit - len(rows))
+            payload = await self._get_json(
+                "/v1/cryptocurrency/listings/latest", api_key,
+                {"start": start, "limit": page_size, "convert": "USD", "sort": "market_cap"},
+            )
+            page = payload.get("data") or []
+            rows.extend(listing_row(coin, fetched_at) for coin in page)
+            if len(page) < page_size:
+                break
+            start += page_size
+        return rows
+
+    async def fetch_metadata(self, api_key: str, cmc_ids: list[int]) -> list[dict]:
+        fetched_at = datetime.utcnow()
+        rows = []
+        for start in range(0, len(cmc_ids), settings.CMC_METADATA_BATCH_SIZE):
+            batch = cmc_ids[start:start + settings.CMC_METADATA_BATCH_SIZE]
+            payload = await self._get_json(
+                "/v2/cryptocurrency/info", api_key,
+                {"id": ",".join(str(cmc_id) for cmc_id in batch), "skip_invalid": "true"},
+            )
+            for info in (payload.get("data") or {}).values():
+                # v2 answers id queries with an object per id; symbol queries would give lists.
+                for item in info if isinstance(info, list) else [info]:
+                    rows.append(metadata_row(item, fetched_at))
+        return rows
+
+    async def run_once(self, force: bool = False) -> dict:
+        """
+        Refresh listings and metadata if they are due (or always, with `force`).
+        Returns the number of listings and metadata rows written.
+        """
+        async with self._run_lock:
+            async with SessionLocal() as db:
+                config = await crud.get_coinmarket(db)
+                if config is None or not config.coin_market_cap_api_key:
+                    return {"listings": 0, "metadata": 0}
+                api_key = config.coin_market_cap_api_key
+                fetch_limit = config.fetch_limit or 0
+                fetch_interval = timedelta(hours=config.fetch_interval or 0)
+                metadata_interval = timedelta(days=config.metadata_interval or 0)
+                listings_at, metadata_at = config.listings_fetched_at, config.metadata_fetched_at
+
+            now = datetime.utcnow()
+            written = {"listings": 0, "metadata": 0}
+            try:
+                if fetch_limit > 0 and (force or (fetch_interval and (listings_at is None or listings_at <= now - fetch_interval))):
+                    rows = await self.fetch_listings(api_key, fetch_limit)
+                    if not rows:
+                        # An empty answer is a CMC or plan problem, not an empty market: keep what we have.
+                        raise IngestError("CoinMarketCap returned no listings; keeping the stored ones")
+                    async with SessionLocal() as db:
+                        written["listings"] = await crud.replace_coin_listings(db, rows)
+                        await crud.mark_coinmarket_ingested(db, listings_at=now)
+                    logger.info("Ingested %d CoinMarketCap listings", written["listings"])
+
+                if force or (metadata_interval and (metadata_at is None or metadata_at <= now - metadata_interval)):
+                    async with SessionLocal() as db:
+                        cmc_ids = await crud.get_coin_ids_needing_metadata(db, older_than=now if force else now - metadata_interval)
+                    rows = await self.fetch_metadata(api_key, cmc_ids)
+                    async with SessionLocal() as db:
+                        written["metadata"] = await crud.upsert_coin_metadata(db, rows)
+                        await crud.mark_coinmarket_ingested(db, metadata_at=now)
+                    logger.info("Ingested CoinMarketCap metadata of %d coins", written["metadata"])
+                return written
+            finally:
+                # Also after a failure part-way, e.g. listings written but metadata not.
+                if written["listings"] or written["metadata"]:
+                    await coin_snapshot.reload()
+
+    async def _loop(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("CoinMarketCap ingestion failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.CMC_INGEST_CHECK_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+coin_ingestor = CoinMarketIngestor()
\ No newline at end of file
@@ -0,0 +1,194 @@
+import asyncio
+import bisect
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterable, Optional
+from app.crud import coinmarket as crud_coinmarket
+from app.crud.trading_pair import get_trading_pairs
+from app.database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Sort keys offered by the query API -> (listing column, descending).
+SORT_KEYS = {
+    "market_cap": ("market_cap", True),
+    "rank": ("cmc_rank", False),
+    "volume_24h": ("volume_24h", True),
+    "percent_change_24h": ("percent_change_24h", True),
+    "percent_change_7d": ("percent_change_7d", True),
+}
+# Quote assets stripped from trading pair names ("BTCUSDT" -> "BTC"), longest first.
+QUOTE_ASSETS = ("FDUSD", "USDT", "USDC", "BUSD", "USD")
+
+LISTING_FIELDS = (
+    "cmc_id", "symbol", "name", "slug", "cmc_rank", "num_market_pairs", "price", "volume_24h",
+    "percent_change_1h", "percent_change_24h", "percent_change_7d", "market_cap",
+    "fully_diluted_market_cap", "circulating_supply", "total_supply", "max_supply", "tags",
+    "date_added", "last_updated",
+)
+METADATA_FIELDS = ("category", "description", "logo", "tags", "urls", "platform", "date_launched")
+
+def base_asset(pair: str) -> str:
+    pair = pair.upper().replace("/", "").replace("-", "").split(":")[0]
+    for quote in QUOTE_ASSETS:
+        if pair.endswith(quote) and len(pair) > len(quote):
+            return pair[:-len(quote)]
+    return pair
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _sort_value(value, descending: bool):
+    # Missing values sort last in either direction.
+    if value is None:
+        return (1, 0)
+    return (0, -value if descending else value)
+
+@dataclass(frozen=True)
+class CoinSnapshot:
+    """
+    Immutable, fully indexed copy of the local coin store: coins in rank order, one precomputed
+    order per sort key, hash indexes by symbol, slug and id, and per exchange the coins (and
+    their pairs) in the `TradingPair` universe. Built off to the side and swapped in whole,
+    so readers never see a half-updated state and never take a lock.
+    """
+    coins: tuple[dict, ...] = ()
+    metadata: tuple[Optional[dict], ...] = ()
+    orders: dict[str, tuple[int, ...]] = field(default_factory=dict)
+    positions: dict[str, tuple[int, ...]] = field(default_factory=dict)
+    market_caps: tuple[float, ...] = ()
+    by_symbol: dict[str, tuple[int, ...]] = field(default_factory=dict)
+    by_slug: dict[str, int] = field(default_factory=dict)
+    by_id: dict[int, int] = field(default_factory=dict)
+    exchange_pairs: dict[str, dict[int, tuple[str, ...]]] = field(default_factory=dict)
+    built_at: Optional[datetime] = None
+
+    @classmethod
+    def build(cls, rows: Iterable[tuple], trading_pairs: dict[str, list[str]]) -> "CoinSnapshot":
+        coins, metadata = [], []
+        for listing, meta in rows:
+            coins.append({name: _plain(getattr(listing, name)) for name in LISTING_FIELDS})
+            metadata.append({name: _plain(getattr(meta, name)) for name in METADATA_FIELDS} if meta is not None else None)
+
+        orders, positions = {}, {}
+        for key, (column, descending) in SORT_KEYS.items():
+            order = sorted(range(len(coins)), key=lambda i: _sort_value(coins[i][column], descending))
+            position = [0] * len(coins)
+            for pos, i in enumerate(order):
+                position[i] = pos
+            orders[key], positions[key] = tuple(order), tuple(position)
+
+        by_symbol: dict[str, list[int]] = {}
+        for i in orders["rank"]:
+            if coins[i]["symbol"]:
+                by_symbol.setdefault(coins[i]["symbol"].upper(), []).append(i)
+        by_slug = {coin["slug"]: i for i, coin in enumerate(coins) if coin["slug"]}
+        by_id = {coin["cmc_id"]: i for i, coin in enumerate(coins)}
+
+        exchange_pairs = {}
+        for exchange, pairs in trading_pairs.items():
+            matched: dict[int, list[str]] = {}
+            for pair in pairs:
+                # A symbol shared by several coins maps to the best ranked one.
+                indexes = by_symbol.get(base_asset(pair))
+                if indexes:
+                    matched.setdefault(indexes[0], []).append(pair)
+            exchange_pairs[exchange] = {i: tuple(p) for i, p in matched.items()}
+
+        return cls(
+            coins=tuple(coins),
+            metadata=tuple(metadata),
+            orders=orders,
+            positions=positions,
+            # Ascending market caps in "market_cap" order, negated, for bisecting the cap filters.
+            market_caps=tuple(-(coins[i]["market_cap"] or 0.0) for i in orders["market_cap"]),
+            by_symbol={symbol: tuple(indexes) for symbol, indexes in by_symbol.items()},
+            by_slug=by_slug,
+            by_id=by_id,
+            exchange_pairs=exchange_pairs,
+            built_at=datetime.utcnow(),
+        )
+
+    def query(
+        self,
+        sort: str = "market_cap",
+        limit: int = 100,
+        offset: int = 0,
+        symbols: Optional[list[str]] = None,
+        slugs: Optional[list[str]] = None,
+        ids: Optional[list[int]] = None,
+        min_market_cap: Optional[float] = None,
+        max_market_cap: Optional[float] = None,
+        exchange: Optional[str] = None,
+        include_metadata: bool = False,
+    ) -> dict:
+        """
+        Coins matching every given filter, in `sort` order, paginated. `exchange` restricts the
+        result to coins with a trading pair on that exchange and adds their `pairs`.
+        Raises KeyError for an unknown sort key or exchange.
+        """
+        position = self.positions[sort]
+        pairs = self.exchange_pairs[exchange] if exchange is not None else None
+
+        if symbols is not None or slugs is not None or ids is not None:
+            candidates = set()
+            for symbol in symbols or ():
+                candidates.update(self.by_symbol.get(symbol.upper(), ()))
+            for slug in slugs or ():
+                if slug in self.by_slug:
+                    candidates.add(self.by_slug[slug])
+            for cmc_id in ids or ():
+                if cmc_id in self.by_id:
+                    candidates.add(self.by_id[cmc_id])
+            ordered = sorted(candidates, key=position.__getitem__)
+        elif pairs is not None and len(pairs) < len(self.coins):
+            ordered = sorted(pairs, key=position.__getitem__)
+        elif sort == "market_cap" and (min_market_cap is not None or max_market_cap is not None):
+            # Contiguous slice of the market cap order.
+            start = bisect.bisect_left(self.market_caps, -max_market_cap) if max_market_cap is not None else 0
+            end = bisect.bisect_right(self.market_caps, -min_market_cap) if min_market_cap is not None else len(self.coins)
+            ordered = self.orders[sort][start:end]
+        else:
+            ordered = self.orders[sort]
+
+        def matches(i: int) -> bool:
+            market_cap = self.coins[i]["market_cap"]
+            if min_market_cap is not None and (market_cap is None or market_cap < min_market_cap):
+                return False
+            if max_market_cap is not None and (market_cap is None or market_cap > max_market_cap):
+                return False
+            return pairs is None or i in pairs
+
+        selected = [i for i in ordered if matches(i)]
+        items = []
+        for i in selected[offset:offset + limit]:
+            item = dict(self.coins[i])
+            if pairs is not None:
+                item["pairs"] = list(pairs[i])
+            if include_metadata:
+                item["metadata"] = self.metadata[i]
+            items.append(item)
+        return {"total": len(selected), "items": items}
+
+class CoinSnapshotHolder:
+    """
+    The current `CoinSnapshot`, replaced by `reload` with a freshly built one (a single
+    reference assignment, so concurrent queries see either the old or the new snapshot).
+    """
+
+    def __init__(self):
+        self.current = CoinSnapshot()
+        self._reload_lock = asyncio.Lock()
+
+    async def reload(self) -> CoinSnapshot:
+        async with self._reload_lock:
+            async with SessionLocal() as db:
+                rows = await crud_coinmarket.get_coin_listings_with_metadata(db)
+                trading_pairs = {tp.exchange_name: list(tp.trading_pairs or []) for tp in await get_trading_pairs(db)}
+            snapshot = await asyncio.to_thread(CoinSnapshot.build, rows, trading_pairs)
+            self.current = snapshot
+            logger.info("Loaded coin snapshot with %d coins", len(snapshot.coins))
+            return snapshot
+
+coin_snapshot = CoinSnapshotHolder()
\ No newline at end of file
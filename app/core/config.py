@@ -1,11 +1,115 @@
+import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite+aiosqlite:///./data/backend.db"
+    # SQLite profile for file databases: WAL, tuned pragmas, a pool of read-only connections and
+    # a single writer connection that serializes all writes of this process
+    SQLITE_PROFILE: bool = True
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 10000
+    SQLITE_CACHE_SIZE_KIB: int = 64 * 1024
+    SQLITE_MMAP_SIZE: int = 256 * 1024 ** 2
+    SQLITE_READ_POOL_SIZE: int = 8
+    SQLITE_READ_MAX_OVERFLOW: int = 16
+    # How long a session waits for the writer connection before failing
+    SQLITE_WRITER_TIMEOUT: float = 30.0
+    # Log every statement through SQLAlchemy's echo (debugging only)
+    DATABASE_ECHO: bool = False
+    # Statements slower than this are logged with their parameters; None disables the slow-query log
+    SQL_SLOW_QUERY_SECONDS: Optional[float] = 0.5
+    # Fraction of statements logged at INFO with their duration
+    SQL_LOG_SAMPLE_RATE: float = 0.0
+    # Distinct statement templates tracked before the rest are counted together
+    SQL_STATS_MAX_TEMPLATES: int = 500
     SECRET_KEY: str = "your-secret-key"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # In-process cache of authenticated users by access token; a TTL of 0 disables it
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    USER_CACHE_MAX_ENTRIES: int = 10000
+
+    # bcrypt cost; stored hashes with a different cost are rehashed on the next login
+    PASSWORD_HASH_ROUNDS: int = 12
+    # Threads hashing and verifying passwords, and how many more calls may wait before 429s
+    PASSWORD_HASH_THREADS: int = 2
+    PASSWORD_HASH_QUEUE_LIMIT: int = 16
+    # Login attempts per client IP and per username: bucket size and refill per minute
+    LOGIN_RATE_BURST: int = 10
+    LOGIN_RATE_PER_MINUTE: float = 10.0
+
+    # Backtest scheduler
+    BACKTEST_MAX_CONCURRENCY: Optional[int] = None  # defaults to the CPU count
+    BACKTEST_QUEUE_POLL_INTERVAL: float = 5.0
+    BACKTEST_LEASE_SECONDS: int = 60
+    # Set to False when backtests are executed by standalone `python -m app.worker` processes
+    BACKTEST_RUN_IN_API: bool = True
+    # Runs are killed after this many seconds unless started with their own limit; None = no limit
+    BACKTEST_MAX_RUNTIME_SECONDS: Optional[int] = None
+    # How often a running backtest checks for cancellation and its deadline
+    BACKTEST_SUPERVISE_INTERVAL: float = 2.0
+    # Time between SIGTERM and SIGKILL when a run is cancelled or times out
+    BACKTEST_KILL_GRACE_SECONDS: float = 10.0
+    # What to do with runs orphaned by a dead worker on this host: "requeue" or "fail"
+    BACKTEST_ORPHAN_ACTION: str = "requeue"
+
+    BACKTEST_SWEEP_MAX_ITEMS: int = 10000
+    # Content-addressed store of finished runs, used to reuse identical backtests
+    BACKTEST_STORE_DIR: str = "data/bt_v6_single_store"
+
+    BACKTEST_ARTIFACT_RECONCILE_INTERVAL: float = 300.0
+
+    # Thread pool for blocking artifact file I/O, and deferred deletion of run directories
+    ARTIFACT_IO_THREADS: int = 8
+    BACKTEST_TRASH_DIR: str = "data/bt_v6_single_trash"
+    BACKTEST_GC_INTERVAL: float = 60.0
+
+    # HTTP caching of finished runs' artifacts, with stored pre-compressed response variants
+    BACKTEST_HTTP_CACHE_DIR: str = "data/bt_v6_single_http_cache"
+    # Variants of parameterized (windowed, downsampled) responses are only kept in memory, up to this size
+    BACKTEST_HTTP_CACHE_MEMORY_BYTES: int = 64 * 1024 * 1024
+
+    # Compressed archive tier for finished runs
+    BACKTEST_ARCHIVE_DIR: str = "data/bt_v6_single_archive"
+    BACKTEST_ARCHIVE_AFTER_DAYS: Optional[float] = None  # None disables automatic archiving
+    BACKTEST_ARCHIVE_INTERVAL: float = 3600.0
+    BACKTEST_ARCHIVE_LEVEL: int = 10
+    BACKTEST_ARCHIVE_CHUNK_BYTES: int = 1024 * 1024
+    BACKTEST_ARCHIVE_CACHE_ENTRIES: int = 64
+
+    # CoinMarketCap API client
+    CMC_BASE_URL: str = "https://pro-api.coinmarketcap.com"
+    CMC_CONNECT_TIMEOUT: float = 5.0
+    CMC_READ_TIMEOUT: float = 15.0
+    CMC_MAX_CONNECTIONS: int = 10
+    CMC_MAX_RETRIES: int = 3
+    CMC_RETRY_BACKOFF_SECONDS: float = 0.5
+    # How long an API key verification result is reused
+    CMC_VERIFY_CACHE_TTL: float = 300.0
+    # Background ingestion of listings (every `fetch_interval` hours) and metadata (every
+    # `metadata_interval` days) from the saved CoinMarketCap config
+    CMC_INGEST_ENABLED: bool = True
+    CMC_INGEST_CHECK_INTERVAL: float = 60.0
+    CMC_LISTINGS_PAGE_SIZE: int = 5000
+    CMC_METADATA_BATCH_SIZE: int = 100
+
+    # Shared historical market data for all backtests
+    MARKET_DATA_CACHE_DIR: str = "data/market_data_cache"
+    MARKET_DATA_CACHE_MAX_BYTES: int = 20 * 1024 ** 3
+
+    # Live log streaming
+    BACKTEST_LOG_BUFFER_BYTES: int = 1024 * 1024
+    BACKTEST_LOG_POLL_INTERVAL: float = 1.0
+
+    # Columnar stats.csv cache
+    STATS_CACHE_MAX_ENTRIES: int = 32
+
+    @property
+    def backtest_max_concurrency(self) -> int:
+        return self.BACKTEST_MAX_CONCURRENCY or os.cpu_count() or 1
+
     class Config:
         env_file = ".env"
 
@@ -1,6 +1,10 @@
+from datetime import datetime
+from typing import Iterable, Optional
+from sqlalchemy import delete, or_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.models.coinmarket import CoinMarketCap
+from app.models.coinmarket import CoinMarketCap, CoinListing, CoinMetadata
 from app.schemas.coinmarket import CoinMarketCapCreate
 
 async def get_coinmarket(db: AsyncSession):
@@ -27,4 +31,83 @@ async def create_or_update_coinmarket(db: AsyncSession, coinmarket: CoinMarketCa
 
     await db.commit()
     await db.refresh(db_coinmarket)
-    return db_coinmarket
\ No newline at end of file
+    return db_coinmarket
+
+# Rows per INSERT statement, keeping well below SQLite's bound-parameter limit.
+UPSERT_BATCH_SIZE = 500
+
+def _insert(db: AsyncSession, model):
+    # ON CONFLICT upserts are dialect-specific constructs
+    if db.bind.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+async def _upsert(db: AsyncSession, model, rows: Iterable[dict], changed_column: Optional[str] = None) -> int:
+    """
+    Insert or update `rows` by `cmc_id` in batches. Rows are deduplicated by id (the last one
+    wins), and when `changed_column` is given an existing row is only rewritten if that column
+    differs. Does not commit. Returns the number of distinct rows.
+    """
+    unique = list({row["cmc_id"]: row for row in rows}.values())
+    for start in range(0, len(unique), UPSERT_BATCH_SIZE):
+        stmt = _insert(db, model).values(unique[start:start + UPSERT_BATCH_SIZE])
+        updates = {c.name: stmt.excluded[c.name] for c in model.__table__.columns if c.name != "cmc_id"}
+        where = None
+        if changed_column is not None:
+            where = getattr(model, changed_column).is_distinct_from(stmt.excluded[changed_column])
+        await db.execute(stmt.on_conflict_do_update(index_elements=["cmc_id"], set_=updates, where=where))
+    return len(unique)
+
+async def replace_coin_listings(db: AsyncSession, rows: list[dict]) -> int:
+    """
+    Make `rows` the stored listings: upsert them (skipping coins whose `last_updated` is unchanged)
+    and remove coins that are no longer listed. Returns the number of coins stored.
+    Raises ValueError for an empty `rows`, which would wipe the store.
+    """
+    if not rows:
+        raise ValueError("Refusing to replace the coin listings with an empty result")
+    count = await _upsert(db, CoinListing, rows, changed_column="last_updated")
+    listed = {row["cmc_id"] for row in rows}
+    stale = [cmc_id for cmc_id in (await db.execute(select(CoinListing.cmc_id))).scalars() if cmc_id not in listed]
+    for start in range(0, len(stale), UPSERT_BATCH_SIZE):
+        await db.execute(delete(CoinListing).where(CoinListing.cmc_id.in_(stale[start:start + UPSERT_BATCH_SIZE])))
+    await db.commit()
+    return count
+
+async def upsert_coin_metadata(db: AsyncSession, rows: list[dict]) -> int:
+    count = await _upsert(db, CoinMetadata, rows)
+    await db.commit()
+    return count
+
+async def get_coin_ids_needing_metadata(db: AsyncSession, older_than: datetime) -> list[int]:
+    """
+    Ids of listed coins without metadata, or with metadata fetched before `older_than`.
+    """
+    result = await db.execute(
+        select(CoinListing.cmc_id)
+        .outerjoin(CoinMetadata, CoinMetadata.cmc_id == CoinListing.cmc_id)
+        .filter(or_(CoinMetadata.fetched_at.is_(None), CoinMetadata.fetched_at < older_than))
+        .order_by(CoinListing.cmc_rank)
+    )
+    return list(result.scalars())
+
+async def mark_coinmarket_ingested(db: AsyncSession, listings_at: Optional[datetime] = None, metadata_at: Optional[datetime] = None):
+    db_coinmarket = await get_coinmarket(db)
+    if db_coinmarket is None:
+        return
+    if listings_at is not None:
+        db_coinmarket.listings_fetched_at = listings_at
+    if metadata_at is not None:
+        db_coinmarket.metadata_fetched_at = metadata_at
+    await db.commit()
+
+async def get_coin_listings_with_metadata(db: AsyncSession):
+    """
+    Every stored listing with its metadata (or None), by rank.
+    """
+    result = await db.execute(
+        select(CoinListing, CoinMetadata)
+        .outerjoin(CoinMetadata, CoinMetadata.cmc_id == CoinListing.cmc_id)
+        .order_by(CoinListing.cmc_rank)
+    )
+    return result.all()
\ No newline at end of file
@@ -7,6 +7,10 @@ async def get_trading_pair_by_exchange(db: AsyncSession, exchange_name: str):
     result = await db.execute(select(TradingPair).filter(TradingPair.exchange_name == exchange_name))
     return result.scalars().first()
 
+async def get_trading_pairs(db: AsyncSession):
+    result = await db.execute(select(TradingPair))
+    return result.scalars().all()
+
 async def create_trading_pair(db: AsyncSession, trading_pair: TradingPairCreate):
     db_trading_pair = TradingPair(
         exchange_name=trading_pair.exchange_name,
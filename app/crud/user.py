@@ -16,10 +16,10 @@ async def get_user_by_id(db: AsyncSession, user_id: str):
     result = await db.execute(select(User).filter(User.id == val_uuid))
     return result.scalars().first()
 from app.schemas.user import UserCreate
-from app.security import get_password_hash
+from app.security import password_hasher
 
 async def create_user(db: AsyncSession, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await password_hasher.hash(user.password)
     db_user = User(username=user.username, hashed_password=hashed_password, roles=user.roles)
     db.add(db_user)
     await db.commit()
@@ -1,16 +1,41 @@
 import os
+import sys
 import json
+import time
+import base64
 import asyncio
 import shlex
 import shutil
+import signal
+import copy
+import itertools
+import math
+import logging
+from collections import Counter
 from pathlib import PurePath
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
-from app.models.v6_single_backtest import V6SingleBacktest
-from app.schemas.v6_single_backtest import V6SingleBacktestCreate, V6SingleBacktestUpdate
+from sqlalchemy import select, update, delete, func, or_, and_
+from pydantic import ValidationError
+from app.core.config import settings
+from app.models.v6_single_backtest import V6SingleBacktest, V6SingleBacktestQueue, V6SingleBacktestSweep, V6SingleBacktestMetrics, V6SingleBacktestArtifact, V6SingleBacktestUsage
+from app.schemas.v6_single_backtest import V6SingleBacktestCreate, V6SingleBacktestUpdate, V6SingleBacktestFilter, V6SingleBacktestSweepCreate
 from sqlalchemy.inspection import inspect
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.crud.preference import get_preference
+from app.backtest.stats import convert_stats_csv
+from app.backtest.logs import open_log_buffer, close_log_buffer, tee_stream
+from app.backtest.store import compute_run_hash, link_stored_run, store_run
+from app.backtest.results import extract_metrics
+from app.backtest.artifacts import ArtifactEntry, artifact_index, find_latest_plots_dir, plots_root, scan_files
+from app.backtest.datacache import FlightAborted, market_data_cache
+from app.backtest import rusage
+from app.backtest.storage import artifact_storage
+from app.backtest.http_cache import variants_dir
+from app.backtest.archive import RunArchive, archive_cache, archive_path, archive_run, open_archive, restore_run
+from app.backtest.process import running_processes, kill_process_group, is_backtest_process, owner_is_local_and_dead, terminate
+from app.database.session import SessionLocal
+
+logger = logging.getLogger(__name__)
 
 def _to_dict(obj):
     """
@@ -25,17 +50,14 @@ def _to_dict(obj):
             data[key] = value.isoformat()
     return data
 
-async def create_v6_single_backtest(db: AsyncSession, backtest: V6SingleBacktestCreate):
-    backtest_name = backtest.name
-    # 1. Ensure the queue directory exists
+async def _write_backtest_config(backtest_name: str, config: dict, durable: bool = True):
+    # Write config to a JSON file in the queue directory (created if needed), atomically
     backtest_dir = f"data/bt_v6_single_queue/{backtest_name}"
-    os.makedirs(backtest_dir, exist_ok=True)
-
-    # 2. Write config to a JSON file
-    
     json_path = os.path.join(backtest_dir, f"{backtest_name}.json")
-    with open(json_path, 'w') as f:
-        json.dump(backtest.config, f, indent=4)
+    await artifact_storage.write_json(json_path, config, durable=durable)
+
+async def create_v6_single_backtest(db: AsyncSession, backtest: V6SingleBacktestCreate):
+    await _write_backtest_config(backtest.name, backtest.config)
 
     # 3. Create backtest record in the database
     backtest_data = backtest.dict()
@@ -46,13 +68,275 @@ async def create_v6_single_backtest(db: AsyncSession, backtest: V6SingleBacktest
     await db.refresh(db_backtest)
     return db_backtest
 
+def _set_path(target: dict, dotted_key: str, value):
+    keys = dotted_key.split('.')
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+
+def expand_sweep(sweep: V6SingleBacktestSweepCreate) -> list[V6SingleBacktestCreate]:
+    """
+    Expand a sweep into one backtest per combination of its explicit items and grid values.
+    Raises ValueError if the sweep is too large or an expanded backtest is invalid.
+    """
+    grid = sweep.grid or {}
+    grid_keys = list(grid)
+    # Sized before anything is expanded: a large grid must not be built just to be rejected.
+    total = len(sweep.items or [{}]) * math.prod(len(values) for values in grid.values())
+    if total > settings.BACKTEST_SWEEP_MAX_ITEMS:
+        raise ValueError(f"Sweep expands to {total} backtests; the limit is {settings.BACKTEST_SWEEP_MAX_ITEMS}.")
+    combinations = itertools.product(sweep.items or [{}], itertools.product(*grid.values()))
+
+    base = sweep.base.dict(exclude={'status', 'sweep_id'})
+    backtests = []
+    for index, (item, grid_values) in enumerate(combinations):
+        data = copy.deepcopy(base)
+        data['config'] = data.get('config') or {}
+        data['name'] = f"{sweep.name}_{index:05d}"
+        for key, value in [*item.items(), *zip(grid_keys, grid_values)]:
+            if key.startswith('config.'):
+                _set_path(data['config'], key[len('config.'):], value)
+            else:
+                data[key] = value
+        try:
+            backtests.append(V6SingleBacktestCreate(**data))
+        except ValidationError as e:
+            raise ValueError(f"Sweep item {index} is invalid: {e}")
+    duplicates = sorted(name for name, count in Counter(b.name for b in backtests).items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Sweep expands to backtests with duplicate names: {', '.join(duplicates[:5])}")
+    return backtests
+
+def _remove_backtest_config(backtest_name: str):
+    backtest_dir = f"data/bt_v6_single_queue/{backtest_name}"
+    try:
+        os.remove(os.path.join(backtest_dir, f"{backtest_name}.json"))
+        os.rmdir(backtest_dir)
+    except OSError:
+        pass
+
+async def create_v6_single_backtest_sweep(db: AsyncSession, sweep: V6SingleBacktestSweepCreate):
+    """
+    Create every backtest of a sweep in one transaction, optionally queueing them all.
+    Raises ValueError if a backtest name is already taken.
+    Config files are written concurrently on the artifact I/O pool before the insert (a queued
+    backtest may be claimed as soon as it commits), and removed again if the insert fails.
+    They are not fsynced one by one, which would dominate the cost of a large sweep; a config
+    lost in a crash makes its run fail rather than corrupting it.
+    """
+    # Expanding and validating thousands of items is CPU work; keep it off the event loop.
+    backtests = await asyncio.to_thread(expand_sweep, sweep)
+    names = [b.name for b in backtests]
+    taken = (await db.execute(
+        select(V6SingleBacktest.name).filter(V6SingleBacktest.name.in_(names), V6SingleBacktest.deleted_at.is_(None)).limit(5)
+    )).scalars().all()
+    if taken:
+        raise ValueError(f"Backtest names already in use: {', '.join(taken)}")
+
+    try:
+        results = await asyncio.gather(*(_write_backtest_config(b.name, b.config, durable=False) for b in backtests), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            raise errors[0]
+        result = await _insert_sweep(db, sweep, backtests)
+    except BaseException:
+        await db.rollback()
+        await asyncio.gather(*(artifact_storage.run(_remove_backtest_config, name) for name in names))
+        raise
+    return result
+
+async def _insert_sweep(db: AsyncSession, sweep: V6SingleBacktestSweepCreate, backtests: list[V6SingleBacktestCreate]):
+    db_sweep = V6SingleBacktestSweep(name=sweep.name, total=len(backtests))
+    db.add(db_sweep)
+    await db.flush()
+
+    status = "queued" if sweep.start else "created"
+    db_backtests = [
+        V6SingleBacktest(**b.dict(exclude={'config', 'status', 'sweep_id'}), status=status, sweep_id=db_sweep.id)
+        for b in backtests
+    ]
+    db.add_all(db_backtests)
+    await db.flush()
+    if sweep.start:
+        now = datetime.utcnow()
+        db.add_all([
+            V6SingleBacktestQueue(backtest_id=b.id, priority=sweep.priority, enqueued_at=now, force_rerun=sweep.force)
+            for b in db_backtests
+        ])
+    result = {"sweep_id": db_sweep.id, "total": len(db_backtests), "backtest_ids": [b.id for b in db_backtests]}
+    await db.commit()
+    return result
+
+async def get_v6_single_backtest_sweep(db: AsyncSession, sweep_id: int):
+    """
+    A sweep with the number of its backtests in each status.
+    """
+    db_sweep = (await db.execute(select(V6SingleBacktestSweep).filter(V6SingleBacktestSweep.id == sweep_id))).scalars().first()
+    if db_sweep is None:
+        return None
+    result = await db.execute(
+        select(V6SingleBacktest.status, func.count())
+        .filter(V6SingleBacktest.sweep_id == sweep_id, V6SingleBacktest.deleted_at.is_(None))
+        .group_by(V6SingleBacktest.status)
+    )
+    data = _to_dict(db_sweep)
+    data["status_counts"] = {status: count for status, count in result.all()}
+    return data
+
 async def get_v6_single_backtest(db: AsyncSession, backtest_id: int):
-    result = await db.execute(select(V6SingleBacktest).filter(V6SingleBacktest.id == backtest_id))
+    result = await db.execute(
+        select(V6SingleBacktest).filter(V6SingleBacktest.id == backtest_id, V6SingleBacktest.deleted_at.is_(None))
+    )
     return result.scalars().first()
 
-async def get_v6_single_backtests(db: AsyncSession, skip: int = 0, limit: int = 100):
-    result = await db.execute(select(V6SingleBacktest).offset(skip).limit(limit))
-    return result.scalars().all()
+SORT_COLUMNS = {
+    "id": V6SingleBacktest.id,
+    "name": V6SingleBacktest.name,
+    "status": V6SingleBacktest.status,
+    "symbol": V6SingleBacktest.symbol,
+    "start_date": V6SingleBacktest.start_date,
+    "end_date": V6SingleBacktest.end_date,
+    "initial_capital": V6SingleBacktest.initial_capital,
+    "adg": V6SingleBacktestMetrics.adg,
+    "final_balance": V6SingleBacktestMetrics.final_balance,
+    "max_drawdown": V6SingleBacktestMetrics.max_drawdown,
+    "hours_stuck_max": V6SingleBacktestMetrics.hours_stuck_max,
+    "n_fills": V6SingleBacktestMetrics.n_fills,
+}
+METRIC_SORTS = {"adg", "final_balance", "max_drawdown", "hours_stuck_max", "n_fills"}
+
+TOTAL_COUNT_CAP = 10000
+
+def encode_cursor(sort_value, backtest_id: int) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, backtest_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str, sort: str):
+    """
+    Decode an opaque cursor into (sort value, id). Raises ValueError if it is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, backtest_id = json.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if sort_value is not None and sort in ("start_date", "end_date"):
+        sort_value = datetime.fromisoformat(sort_value)
+    return sort_value, int(backtest_id)
+
+def _apply_filters(stmt, filters: V6SingleBacktestFilter):
+    stmt = stmt.filter(V6SingleBacktest.deleted_at.is_(None))
+    if filters.status:
+        stmt = stmt.filter(V6SingleBacktest.status.in_(filters.status))
+    if filters.symbol:
+        stmt = stmt.filter(V6SingleBacktest.symbol == filters.symbol)
+    if filters.exchange:
+        stmt = stmt.filter(V6SingleBacktest.exchange == filters.exchange)
+    if filters.account_name:
+        stmt = stmt.filter(V6SingleBacktest.account_name == filters.account_name)
+    if filters.sweep_id is not None:
+        stmt = stmt.filter(V6SingleBacktest.sweep_id == filters.sweep_id)
+    if filters.name_prefix:
+        # A range rather than LIKE so that the name index is used
+        stmt = stmt.filter(V6SingleBacktest.name >= filters.name_prefix, V6SingleBacktest.name < filters.name_prefix + '\uffff')
+    if filters.start_date_from:
+        stmt = stmt.filter(V6SingleBacktest.start_date >= filters.start_date_from)
+    if filters.start_date_to:
+        stmt = stmt.filter(V6SingleBacktest.start_date <= filters.start_date_to)
+    if filters.end_date_from:
+        stmt = stmt.filter(V6SingleBacktest.end_date >= filters.end_date_from)
+    if filters.end_date_to:
+        stmt = stmt.filter(V6SingleBacktest.end_date <= filters.end_date_to)
+    if filters.adg_min is not None:
+        stmt = stmt.filter(V6SingleBacktestMetrics.adg >= filters.adg_min)
+    if filters.final_balance_min is not None:
+        stmt = stmt.filter(V6SingleBacktestMetrics.final_balance >= filters.final_balance_min)
+    if filters.max_drawdown_max is not None:
+        stmt = stmt.filter(V6SingleBacktestMetrics.max_drawdown <= filters.max_drawdown_max)
+    if filters.hours_stuck_max_max is not None:
+        stmt = stmt.filter(V6SingleBacktestMetrics.hours_stuck_max <= filters.hours_stuck_max_max)
+    if filters.n_fills_min is not None:
+        stmt = stmt.filter(V6SingleBacktestMetrics.n_fills >= filters.n_fills_min)
+    return stmt
+
+def _join_metrics(stmt, filters: V6SingleBacktestFilter, sort: str):
+    """
+    Inner join when sorting or filtering by a metric (so NULL metrics never enter the keyset),
+    otherwise an outer join so that runs without metrics are listed too.
+    """
+    on = V6SingleBacktestMetrics.backtest_id == V6SingleBacktest.id
+    if sort in METRIC_SORTS or filters.has_metric_filters():
+        return stmt.join(V6SingleBacktestMetrics, on).filter(SORT_COLUMNS[sort].is_not(None))
+    return stmt.outerjoin(V6SingleBacktestMetrics, on)
+
+async def get_v6_single_backtests(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    filters: V6SingleBacktestFilter | None = None,
+    sort: str = "id",
+    descending: bool = False,
+    cursor: str | None = None,
+):
+    """
+    List backtests matching `filters`, ordered by `sort` then id, each with its extracted
+    metrics (or None). Pass the returned `next_cursor` back as `cursor` to fetch the
+    following page with a keyset seek. Returns (backtests, next_cursor).
+    """
+    filters = filters or V6SingleBacktestFilter()
+    sort_column = SORT_COLUMNS[sort]
+    stmt = _apply_filters(_join_metrics(select(V6SingleBacktest, V6SingleBacktestMetrics), filters, sort), filters)
+
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, sort)
+        id_after = V6SingleBacktest.id < last_id if descending else V6SingleBacktest.id > last_id
+        if sort == "id":
+            stmt = stmt.filter(id_after)
+        elif sort_value is None:
+            # Inside the trailing run of NULL sort values
+            stmt = stmt.filter(sort_column.is_(None), id_after)
+        else:
+            value_after = sort_column < sort_value if descending else sort_column > sort_value
+            stmt = stmt.filter(or_(value_after, and_(sort_column == sort_value, id_after), sort_column.is_(None)))
+    elif skip:
+        stmt = stmt.offset(skip)
+
+    # NULL sort values come last in either direction, on every database, to match the seek above.
+    if sort == "id":
+        order_by = [V6SingleBacktest.id.desc() if descending else V6SingleBacktest.id.asc()]
+    elif descending:
+        order_by = [sort_column.desc().nulls_last(), V6SingleBacktest.id.desc()]
+    else:
+        order_by = [sort_column.asc().nulls_last(), V6SingleBacktest.id.asc()]
+    stmt = stmt.order_by(*order_by)
+
+    # Fetch one extra row to know whether another page exists.
+    rows = (await db.execute(stmt.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_backtest, last_metrics = rows[-1]
+        sort_value = getattr(last_metrics if sort in METRIC_SORTS else last_backtest, sort)
+        next_cursor = encode_cursor(sort_value, last_backtest.id)
+
+    backtests = []
+    for backtest, metrics in rows:
+        data = _to_dict(backtest)
+        data["metrics"] = _to_dict(metrics)
+        backtests.append(data)
+    return backtests, next_cursor
+
+async def estimate_v6_single_backtests_total(db: AsyncSession, filters: V6SingleBacktestFilter | None = None):
+    """
+    Count matching backtests, stopping at TOTAL_COUNT_CAP so the count stays cheap.
+    Returns (count, is_exact).
+    """
+    filters = filters or V6SingleBacktestFilter()
+    inner = _apply_filters(_join_metrics(select(V6SingleBacktest.id), filters, "id"), filters).limit(TOTAL_COUNT_CAP + 1)
+    count = (await db.execute(select(func.count()).select_from(inner.subquery()))).scalar_one()
+    return min(count, TOTAL_COUNT_CAP), count <= TOTAL_COUNT_CAP
 
 async def update_v6_single_backtest(db: AsyncSession, backtest_id: int, backtest: V6SingleBacktestUpdate):
     update_data = backtest.dict(exclude_unset=True)
@@ -64,27 +348,283 @@ async def update_v6_single_backtest(db: AsyncSession, backtest_id: int, backtest
     return await get_v6_single_backtest(db, backtest_id)
 
 async def delete_v6_single_backtest(db: AsyncSession, backtest_id: int):
+    """
+    Delete a backtest by setting its tombstone: it disappears from every read right away, and
+    its run directory and archive are moved into the trash (a rename). A queued or running
+    backtest is cancelled first. `collect_deleted_backtests` removes the files and rows later.
+    """
     backtest = await get_v6_single_backtest(db, backtest_id)
-    if backtest:
-        backtest_dir = f"data/bt_v6_single_queue/{backtest.name}"
-        if os.path.exists(backtest_dir):
-            shutil.rmtree(backtest_dir)
-            
-    q = delete(V6SingleBacktest).where(V6SingleBacktest.id == backtest_id)
+    if backtest is None:
+        return None
+    name = backtest.name
+    active = await cancel_backtest(db, backtest_id) == "cancelling"
+
+    q = (
+        update(V6SingleBacktest)
+        .where(V6SingleBacktest.id == backtest_id, V6SingleBacktest.deleted_at.is_(None))
+        .values(deleted_at=datetime.utcnow())
+    )
     result = await db.execute(q)
-    
     if result.rowcount == 0:
-        return {"ok": False, "message": "Backtest not found"}
-
+        await db.rollback()
+        return None
     await db.commit()
+    artifact_index.forget(backtest_id)
+    if not active:
+        # A running backtest still writes to its directory; the collector moves it once it has stopped.
+        await artifact_storage.discard(f"data/bt_v6_single_queue/{name}")
+        await artifact_storage.discard(archive_path(name))
     return {"ok": True}
 
+async def collect_deleted_backtests(db: AsyncSession, limit: int = 500) -> int:
+    """
+    Garbage-collect tombstoned backtests that are no longer running: trash their files and
+    delete their rows, then empty the trash. Returns the number of backtests removed.
+    """
+    running = select(V6SingleBacktestQueue.backtest_id)
+    result = await db.execute(
+        select(V6SingleBacktest.id, V6SingleBacktest.name)
+        .filter(V6SingleBacktest.deleted_at.is_not(None), V6SingleBacktest.id.not_in(running))
+        .limit(limit)
+    )
+    rows = result.all()
+    for backtest_id, name in rows:
+        reused = await db.execute(
+            select(V6SingleBacktest.id).filter(V6SingleBacktest.name == name, V6SingleBacktest.deleted_at.is_(None)).limit(1)
+        )
+        if reused.first() is None:
+            await artifact_storage.discard(f"data/bt_v6_single_queue/{name}")
+            await artifact_storage.discard(archive_path(name))
+        await artifact_storage.discard(variants_dir(backtest_id))
+        await db.execute(delete(V6SingleBacktestMetrics).where(V6SingleBacktestMetrics.backtest_id == backtest_id))
+        await db.execute(delete(V6SingleBacktestArtifact).where(V6SingleBacktestArtifact.backtest_id == backtest_id))
+        await db.execute(delete(V6SingleBacktestUsage).where(V6SingleBacktestUsage.backtest_id == backtest_id))
+        await db.execute(delete(V6SingleBacktest).where(V6SingleBacktest.id == backtest_id))
+        await db.commit()
+    await artifact_storage.purge_trash()
+    return len(rows)
+
 def get_backtest_log_path(backtest: V6SingleBacktest) -> str:
     """
     Constructs the log file path for a given backtest.
     """
     return f"data/bt_v6_single_queue/{backtest.name}/{backtest.name}.log"
 
+def get_plots_path(backtest: V6SingleBacktest) -> str | None:
+    """
+    Constructs the latest plots directory path for a given backtest, using the artifact
+    index when it has a current entry and scanning the directory otherwise.
+    """
+    entry = artifact_index.get(backtest.id, backtest.finished_at)
+    if entry is not None:
+        return entry.plots_dir
+    return find_latest_plots_dir(plots_root(backtest.name, backtest.exchange, backtest.symbol))
+
+def _scan_artifacts(backtest: V6SingleBacktest) -> ArtifactEntry:
+    plots_dir = find_latest_plots_dir(plots_root(backtest.name, backtest.exchange, backtest.symbol))
+    files = scan_files(plots_dir) if plots_dir else {}
+    return ArtifactEntry(plots_dir=plots_dir, finished_at=backtest.finished_at, files=files)
+
+async def _save_artifact_entry(db: AsyncSession, backtest_id: int, entry: ArtifactEntry):
+    artifact_index.put(backtest_id, entry)
+    await db.merge(V6SingleBacktestArtifact(
+        backtest_id=backtest_id, plots_dir=entry.plots_dir, files=entry.files,
+        finished_at=entry.finished_at, archived=entry.archived, indexed_at=datetime.utcnow(),
+    ))
+    await db.commit()
+
+async def resolve_artifacts(db: AsyncSession, backtest: V6SingleBacktest) -> ArtifactEntry:
+    """
+    Artifact entry of a backtest: from the in-memory index, else from the artifact table
+    (e.g. recorded by another worker), else by scanning once. Entries of runs that have
+    not ended are never persisted.
+    """
+    backtest_id, finished_at, status = backtest.id, backtest.finished_at, backtest.status
+    entry = artifact_index.get(backtest_id, finished_at)
+    if entry is not None:
+        return entry
+
+    result = await db.execute(select(V6SingleBacktestArtifact).filter(V6SingleBacktestArtifact.backtest_id == backtest_id))
+    row = result.scalars().first()
+    if row is not None and row.finished_at == finished_at:
+        entry = ArtifactEntry(plots_dir=row.plots_dir, finished_at=row.finished_at, files=row.files or {}, archived=bool(row.archived))
+        artifact_index.put(backtest_id, entry)
+        return entry
+
+    entry = await artifact_storage.run(_scan_artifacts, backtest)
+    if status in ["finished", "failed"] and entry.plots_dir is not None:
+        await _save_artifact_entry(db, backtest_id, entry)
+    return entry
+
+async def load_artifact_index(db: AsyncSession) -> int:
+    """
+    Warm the in-memory artifact index from the artifact table.
+    """
+    result = await db.execute(select(V6SingleBacktestArtifact))
+    rows = result.scalars().all()
+    for row in rows:
+        artifact_index.put(row.backtest_id, ArtifactEntry(
+            plots_dir=row.plots_dir, finished_at=row.finished_at, files=row.files or {}, archived=bool(row.archived),
+        ))
+    return len(rows)
+
+def get_run_dir(backtest: V6SingleBacktest) -> str:
+    return f"data/bt_v6_single_queue/{backtest.name}"
+
+async def get_run_archive(backtest: V6SingleBacktest) -> RunArchive | None:
+    """
+    The archive holding the backtest's run directory, or None while the run is unpacked.
+    Opening it reads and decompresses its index, on the artifact I/O pool.
+    """
+    if backtest.archived_at is None:
+        return None
+    try:
+        return await artifact_storage.run(open_archive, archive_path(backtest.name))
+    except FileNotFoundError:
+        # Being unpacked right now; the run directory is authoritative again.
+        return None
+
+def run_member(run_dir: str, path: str) -> str:
+    """
+    Archive member name of a path inside a run directory.
+    """
+    return os.path.relpath(path, run_dir).replace(os.sep, '/')
+
+def run_file_signature(archive: RunArchive | None, run_dir: str, path: str) -> tuple[int, int] | None:
+    """
+    (mtime_ns, size) of a file of a run directory, or None if it does not exist.
+    """
+    if archive is not None:
+        member = archive.members.get(run_member(run_dir, path))
+        return (member["mtime_ns"], member["size"]) if member is not None else None
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def read_run_file(archive: RunArchive | None, run_dir: str, path: str) -> bytes | None:
+    """
+    Contents of a file of a run directory, read from `archive` when the run is archived.
+    Returns None if the file does not exist.
+    """
+    if archive is not None:
+        member = run_member(run_dir, path)
+        return archive.read(member) if member in archive else None
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+TERMINAL_STATUSES = ["finished", "failed", "cancelled", "timeout"]
+
+def is_final(backtest: V6SingleBacktest) -> bool:
+    """
+    Whether the backtest's artifacts are final, i.e. it has ended and is not queued again.
+    """
+    return backtest.status in TERMINAL_STATUSES and backtest.finished_at is not None
+
+async def archive_backtest(db: AsyncSession, backtest: V6SingleBacktest) -> dict | None:
+    """
+    Pack a finished backtest's run directory into the archive tier and remove the directory.
+    Returns the archive's sizes, or None if the backtest changed state in the meantime.
+    """
+    backtest_id, finished_at, name = backtest.id, backtest.finished_at, backtest.name
+    run_dir = get_run_dir(backtest)
+    entry = await resolve_artifacts(db, backtest)
+    dest_path = archive_path(name)
+    stats = await artifact_storage.run(archive_run, run_dir, dest_path)
+
+    # Only flip the run to archived if nobody restarted it while it was being packed.
+    q = (
+        update(V6SingleBacktest)
+        .where(
+            V6SingleBacktest.id == backtest_id,
+            V6SingleBacktest.archived_at.is_(None),
+            V6SingleBacktest.finished_at == finished_at,
+            V6SingleBacktest.status.in_(TERMINAL_STATUSES),
+        )
+        .values(archived_at=datetime.utcnow())
+    )
+    if (await db.execute(q)).rowcount != 1:
+        await db.rollback()
+        await _drop_unused_archive(db, backtest_id, dest_path)
+        return None
+    # Move the run directory out of the way before the swap commits: from then on, a restart
+    # unpacks the archive into a fresh run directory that must not be deleted under it.
+    trashed = await artifact_storage.discard(run_dir)
+    try:
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        if trashed is not None:
+            await artifact_storage.run(os.rename, trashed, run_dir)
+        await _drop_unused_archive(db, backtest_id, dest_path)
+        raise
+    await artifact_storage.discard(variants_dir(backtest_id))
+    await _save_artifact_entry(db, backtest_id, ArtifactEntry(
+        plots_dir=entry.plots_dir, finished_at=entry.finished_at, files=entry.files, archived=True,
+    ))
+    return stats
+
+async def _drop_unused_archive(db: AsyncSession, backtest_id: int, dest_path: str):
+    """
+    Remove an archive that was packed but not swapped in, unless the backtest is archived
+    (by another archiver, into the same file) after all.
+    """
+    archived_at = (await db.execute(select(V6SingleBacktest.archived_at).filter(V6SingleBacktest.id == backtest_id))).scalar()
+    if archived_at is None:
+        await artifact_storage.discard(dest_path)
+        archive_cache.forget(dest_path)
+
+async def archive_finished_backtests(db: AsyncSession, older_than_days: float, limit: int = 100) -> dict:
+    """
+    Archive backtests that finished more than `older_than_days` ago and are still unpacked.
+    Runs that finished recently stay unpacked.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    result = await db.execute(
+        select(V6SingleBacktest)
+        .filter(
+            V6SingleBacktest.archived_at.is_(None),
+            V6SingleBacktest.deleted_at.is_(None),
+            V6SingleBacktest.finished_at < cutoff,
+            V6SingleBacktest.status.in_(TERMINAL_STATUSES),
+        )
+        .order_by(V6SingleBacktest.finished_at.asc())
+        .limit(limit)
+    )
+    summary = {"archived": 0, "original_bytes": 0, "archived_bytes": 0}
+    for backtest in result.scalars().all():
+        backtest_id = backtest.id
+        if not os.path.isdir(get_run_dir(backtest)):
+            continue
+        try:
+            stats = await archive_backtest(db, backtest)
+        except Exception:
+            logger.exception("Failed to archive backtest %s", backtest_id)
+            await db.rollback()
+            continue
+        if stats is not None:
+            summary["archived"] += 1
+            summary["original_bytes"] += stats["original_bytes"]
+            summary["archived_bytes"] += stats["archived_bytes"]
+    return summary
+
+async def unarchive_backtest(db: AsyncSession, backtest: V6SingleBacktest):
+    """
+    Unpack an archived backtest's run directory, e.g. before running it again.
+    """
+    if backtest.archived_at is None:
+        return
+    backtest_id = backtest.id
+    await artifact_storage.run(restore_run, archive_path(backtest.name), get_run_dir(backtest))
+    await db.execute(update(V6SingleBacktest).where(V6SingleBacktest.id == backtest_id).values(archived_at=None))
+    await db.execute(update(V6SingleBacktestArtifact).where(V6SingleBacktestArtifact.backtest_id == backtest_id).values(archived=False))
+    await db.commit()
+    artifact_index.forget(backtest_id)
+    await db.refresh(backtest)
+
 async def update_backtest_status(db: AsyncSession, backtest_id: int, status: str):
     """
     Helper function to update the status of a backtest.
@@ -94,25 +634,474 @@ async def update_backtest_status(db: AsyncSession, backtest_id: int, status: str
     await db.commit()
     return await get_v6_single_backtest(db, backtest_id)
 
-async def run_backtest_process(db: AsyncSession, backtest_id: int):
+async def complete_backtest(db: AsyncSession, backtest_id: int, status: str):
+    """
+    Record the end of a run: set its final status and finish time, index its artifacts and
+    drop the cached HTTP responses of the previous run.
+    """
+    q = update(V6SingleBacktest).where(V6SingleBacktest.id == backtest_id).values(status=status, finished_at=datetime.utcnow())
+    await db.execute(q)
+    await db.commit()
+    backtest = await get_v6_single_backtest(db, backtest_id)
+    if backtest is None:
+        # Deleted while running; the garbage collector removes its files.
+        return None
+    await artifact_storage.discard(variants_dir(backtest_id))
+    entry = await artifact_storage.run(_scan_artifacts, backtest)
+    await _save_artifact_entry(db, backtest_id, entry)
+    return backtest
+
+async def enqueue_backtest(db: AsyncSession, backtest_id: int, priority: int = 0, force: bool = False, max_runtime: int | None = None):
+    """
+    Put a backtest on the run queue (or re-queue it) and mark it as 'queued'.
+    Higher priorities run first; equal priorities run in FIFO order. With `force`, the run
+    does not reuse the results of an identical finished run. `max_runtime` (seconds) overrides
+    BACKTEST_MAX_RUNTIME_SECONDS for this run.
+    """
+    result = await db.execute(select(V6SingleBacktestQueue).filter(V6SingleBacktestQueue.backtest_id == backtest_id))
+    entry = result.scalars().first()
+    if entry is None:
+        entry = V6SingleBacktestQueue(backtest_id=backtest_id)
+        db.add(entry)
+    entry.priority = priority
+    entry.force_rerun = force
+    entry.max_runtime_seconds = max_runtime
+    entry.pid = None
+    entry.cancel_requested = False
+    entry.status = "queued"
+    entry.enqueued_at = datetime.utcnow()
+    entry.started_at = None
+    entry.lease_owner = None
+    entry.lease_expires_at = None
+    await db.execute(update(V6SingleBacktest).where(V6SingleBacktest.id == backtest_id).values(status="queued"))
+    await db.commit()
+    return entry
+
+def _claimable(now: datetime):
+    """
+    Queue entries that are waiting, or whose worker stopped renewing its lease.
+    """
+    return or_(
+        V6SingleBacktestQueue.status == "queued",
+        and_(V6SingleBacktestQueue.status == "running", V6SingleBacktestQueue.lease_expires_at < now),
+    )
+
+async def claim_next_queued_backtest(db: AsyncSession, worker_id: str, lease_seconds: int):
+    """
+    Atomically lease the next runnable queue entry to `worker_id` and mark its backtest as 'starting'.
+    Entries with an expired lease are reclaimed. Returns the claimed entry, or None when nothing is runnable.
+    """
+    while True:
+        now = datetime.utcnow()
+        stmt = (
+            select(V6SingleBacktestQueue)
+            .filter(_claimable(now))
+            .order_by(V6SingleBacktestQueue.priority.desc(), V6SingleBacktestQueue.enqueued_at.asc(), V6SingleBacktestQueue.id.asc())
+            .limit(1)
+        )
+        if db.bind.dialect.name == "postgresql":
+            stmt = stmt.with_for_update(skip_locked=True)
+        entry = (await db.execute(stmt)).scalars().first()
+        if entry is None:
+            await db.rollback()
+            return None
+
+        # Re-check the claim condition in the UPDATE itself so that concurrent workers
+        # (other processes or hosts) cannot lease the same entry.
+        q = (
+            update(V6SingleBacktestQueue)
+            .where(V6SingleBacktestQueue.id == entry.id, _claimable(now))
+            .values(
+                status="running",
+                started_at=now,
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                heartbeat_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        claimed = await db.execute(q)
+        if claimed.rowcount == 1:
+            await db.execute(update(V6SingleBacktest).where(V6SingleBacktest.id == entry.backtest_id).values(status="starting"))
+            await db.commit()
+            await db.refresh(entry)
+            return entry
+        await db.rollback()
+
+async def renew_backtest_lease(db: AsyncSession, backtest_id: int, worker_id: str, lease_seconds: int) -> bool:
+    """
+    Heartbeat: extend the lease held by `worker_id`. Returns False if the lease has been lost.
+    """
+    now = datetime.utcnow()
+    q = (
+        update(V6SingleBacktestQueue)
+        .where(V6SingleBacktestQueue.backtest_id == backtest_id, V6SingleBacktestQueue.lease_owner == worker_id)
+        .values(lease_expires_at=now + timedelta(seconds=lease_seconds), heartbeat_at=now)
+    )
+    result = await db.execute(q)
+    await db.commit()
+    return result.rowcount == 1
+
+async def holds_backtest_lease(db: AsyncSession, backtest_id: int, worker_id: str) -> bool:
+    """
+    Whether `worker_id` still holds the lease on a backtest's queue entry. A lease that merely
+    expired is still held: only a reclaim (which rewrites `lease_owner`) or a cancel (which
+    removes the entry) takes the run away from its worker.
+    """
+    q = select(V6SingleBacktestQueue.backtest_id).where(
+        V6SingleBacktestQueue.backtest_id == backtest_id,
+        V6SingleBacktestQueue.lease_owner == worker_id,
+    )
+    return (await db.execute(q)).first() is not None
+
+async def complete_queue_entry(db: AsyncSession, backtest_id: int, worker_id: str):
+    """
+    Remove a backtest from the run queue once the worker holding its lease has finished it.
+    """
+    await db.execute(
+        delete(V6SingleBacktestQueue)
+        .where(V6SingleBacktestQueue.backtest_id == backtest_id, V6SingleBacktestQueue.lease_owner == worker_id)
+    )
+    await db.commit()
+
+async def cancel_backtest(db: AsyncSession, backtest_id: int) -> str | None:
+    """
+    Cancel a queued or running backtest. A queued entry (or one whose worker is gone) is removed
+    and the backtest marked 'cancelled' right away. A running one is flagged, and the worker
+    running it kills its process group; that happens immediately when it runs in this process.
+    Returns 'cancelled', 'cancelling', or None when there is nothing to cancel.
+    """
+    now = datetime.utcnow()
+    removed = await db.execute(
+        delete(V6SingleBacktestQueue)
+        .where(
+            V6SingleBacktestQueue.backtest_id == backtest_id,
+            or_(V6SingleBacktestQueue.status == "queued", V6SingleBacktestQueue.lease_expires_at < now),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    if removed.rowcount == 1:
+        await db.commit()
+        await complete_backtest(db, backtest_id, "cancelled")
+        return "cancelled"
+
+    flagged = await db.execute(
+        update(V6SingleBacktestQueue)
+        .where(V6SingleBacktestQueue.backtest_id == backtest_id)
+        .values(cancel_requested=True)
+    )
+    await db.commit()
+    if flagged.rowcount == 0:
+        return None
+    process = running_processes.get(backtest_id)
+    if process is not None:
+        kill_process_group(process.pid, signal.SIGTERM)
+    return "cancelling"
+
+async def is_cancel_requested(db: AsyncSession, backtest_id: int) -> bool:
+    result = await db.execute(
+        select(V6SingleBacktestQueue.cancel_requested).filter(V6SingleBacktestQueue.backtest_id == backtest_id)
+    )
+    return bool(result.scalar())
+
+async def reap_orphaned_backtests(db: AsyncSession, action: str | None = None) -> int:
+    """
+    Clean up runs whose worker on this host has died: kill their process group if it is still
+    alive, then re-queue them or mark them failed (`action`, default BACKTEST_ORPHAN_ACTION).
+    Runs that were being cancelled end up 'cancelled'. Runs leased by workers on other hosts are
+    left to lease expiry.
+    """
+    action = action or settings.BACKTEST_ORPHAN_ACTION
+    result = await db.execute(select(V6SingleBacktestQueue).filter(V6SingleBacktestQueue.status == "running"))
+    orphans = [entry for entry in result.scalars().all() if owner_is_local_and_dead(entry.lease_owner)]
+    finished = []
+    for entry in orphans:
+        if entry.pid and is_backtest_process(entry.pid, RUSAGE_WRAPPER):
+            kill_process_group(entry.pid, signal.SIGKILL)
+        if entry.cancel_requested or action == "fail":
+            finished.append((entry.backtest_id, "cancelled" if entry.cancel_requested else "failed"))
+            await db.delete(entry)
+            continue
+        entry.status = "queued"
+        entry.started_at = None
+        entry.lease_owner = None
+        entry.lease_expires_at = None
+        entry.pid = None
+        await db.execute(update(V6SingleBacktest).where(V6SingleBacktest.id == entry.backtest_id).values(status="queued"))
+    await db.commit()
+    for backtest_id, status in finished:
+        await complete_backtest(db, backtest_id, status)
+    return len(orphans)
+
+async def requeue_interrupted_backtests(db: AsyncSession):
+    """
+    Re-queue backtests that were left 'starting' or 'running' without a live lease,
+    e.g. by a process that ran them before leases existed. Runs with an expired lease
+    are picked up by the next claim.
+    """
+    now = datetime.utcnow()
+    result = await db.execute(select(V6SingleBacktest).filter(V6SingleBacktest.status.in_(["starting", "running"])))
+    backtests = result.scalars().all()
+    leased_ids = set((await db.execute(
+        select(V6SingleBacktestQueue.backtest_id).filter(V6SingleBacktestQueue.lease_expires_at >= now)
+    )).scalars().all())
+    queued_ids = set((await db.execute(select(V6SingleBacktestQueue.backtest_id))).scalars().all())
+    requeued = 0
+    for backtest in backtests:
+        if backtest.id in leased_ids:
+            continue
+        if backtest.id not in queued_ids:
+            db.add(V6SingleBacktestQueue(backtest_id=backtest.id))
+        backtest.status = "queued"
+        requeued += 1
+    await db.execute(
+        update(V6SingleBacktestQueue)
+        .where(V6SingleBacktestQueue.status == "running", V6SingleBacktestQueue.lease_owner.is_(None))
+        .values(status="queued", started_at=None)
+    )
+    await db.commit()
+    return requeued
+
+async def get_queue_stats(db: AsyncSession):
+    """
+    Queue depth per status, wait times and the workers currently holding leases.
+    """
+    now = datetime.utcnow()
+    result = await db.execute(
+        select(
+            V6SingleBacktestQueue.status,
+            V6SingleBacktestQueue.enqueued_at,
+            V6SingleBacktestQueue.started_at,
+            V6SingleBacktestQueue.lease_owner,
+        )
+    )
+    stats = {"queued": 0, "running": 0, "oldest_wait_seconds": 0.0, "avg_start_wait_seconds": 0.0, "workers": {}}
+    start_waits = []
+    for status, enqueued_at, started_at, lease_owner in result.all():
+        stats[status] = stats.get(status, 0) + 1
+        if status == "queued":
+            stats["oldest_wait_seconds"] = max(stats["oldest_wait_seconds"], (now - enqueued_at).total_seconds())
+        elif started_at is not None:
+            start_waits.append((started_at - enqueued_at).total_seconds())
+            stats["workers"][lease_owner] = stats["workers"].get(lease_owner, 0) + 1
+    if start_waits:
+        stats["avg_start_wait_seconds"] = sum(start_waits) / len(start_waits)
+    return stats
+
+def _prepare_stats_columns(backtest: V6SingleBacktest):
+    """
+    Convert a finished run's stats.csv to its columnar form so the first chart load is fast.
+    """
+    plots_dir = get_plots_path(backtest)
+    csv_path = os.path.join(plots_dir, 'stats.csv') if plots_dir else None
+    if csv_path and os.path.exists(csv_path):
+        try:
+            convert_stats_csv(csv_path)
+        except Exception:
+            logger.exception("Failed to convert the stats of backtest %s", backtest.id)
+
+def _extract_backtest_metrics(backtest: V6SingleBacktest) -> dict | None:
+    plots_dir = get_plots_path(backtest)
+    if plots_dir is None:
+        return None
+    result_path = os.path.join(plots_dir, 'backtest_result.txt')
+    stats_path = os.path.join(plots_dir, 'stats.csv')
+    return extract_metrics(
+        result_path if os.path.exists(result_path) else None,
+        stats_path if os.path.exists(stats_path) else None,
+    )
+
+async def save_backtest_metrics(db: AsyncSession, backtest_id: int, metrics: dict):
+    await db.merge(V6SingleBacktestMetrics(backtest_id=backtest_id, extracted_at=datetime.utcnow(), **metrics))
+    await db.commit()
+
+async def get_backtest_metrics(db: AsyncSession, backtest_id: int):
+    result = await db.execute(select(V6SingleBacktestMetrics).filter(V6SingleBacktestMetrics.backtest_id == backtest_id))
+    return result.scalars().first()
+
+async def _record_backtest_metrics(db: AsyncSession, backtest: V6SingleBacktest):
+    """
+    Parse a finished run's result files once and store its key metrics.
+    """
+    backtest_id = backtest.id
+    try:
+        metrics = await artifact_storage.run(_extract_backtest_metrics, backtest)
+        if metrics is not None:
+            await save_backtest_metrics(db, backtest_id, metrics)
+    except Exception:
+        logger.exception("Failed to extract the metrics of backtest %s", backtest_id)
+
+RUSAGE_WRAPPER = os.path.join(os.path.dirname(os.path.abspath(rusage.__file__)), 'rusage.py')
+
+def _read_usage_report(path: str) -> dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    return {
+        "return_code": report.get("returncode"),
+        "user_cpu_seconds": report.get("user_cpu_seconds"),
+        "system_cpu_seconds": report.get("system_cpu_seconds"),
+        "max_rss_bytes": report.get("max_rss_bytes"),
+        "read_bytes": report.get("read_bytes"),
+        "write_bytes": report.get("write_bytes"),
+    }
+
+async def save_backtest_usage(db: AsyncSession, backtest_id: int, usage: dict):
+    await db.merge(V6SingleBacktestUsage(backtest_id=backtest_id, recorded_at=datetime.utcnow(), **usage))
+    await db.commit()
+
+async def get_backtest_usage(db: AsyncSession, backtest_id: int):
+    result = await db.execute(select(V6SingleBacktestUsage).filter(V6SingleBacktestUsage.backtest_id == backtest_id))
+    return result.scalars().first()
+
+async def get_backtest_usage_summary(db: AsyncSession, group_by: list[str]):
+    """
+    Resource usage aggregated by symbol and/or date span (in days). `seconds_per_day` and
+    `cpu_seconds_per_day` normalize cost by the simulated span, for predicting new runs.
+    """
+    columns = {"symbol": V6SingleBacktestUsage.symbol, "span_days": V6SingleBacktestUsage.span_days}
+    keys = [columns[key] for key in group_by]
+    cpu = func.coalesce(V6SingleBacktestUsage.user_cpu_seconds, 0) + func.coalesce(V6SingleBacktestUsage.system_cpu_seconds, 0)
+    stmt = select(
+        *keys,
+        func.count().label("runs"),
+        func.avg(V6SingleBacktestUsage.wall_seconds).label("avg_wall_seconds"),
+        func.max(V6SingleBacktestUsage.wall_seconds).label("max_wall_seconds"),
+        func.avg(cpu).label("avg_cpu_seconds"),
+        func.avg(V6SingleBacktestUsage.max_rss_bytes).label("avg_max_rss_bytes"),
+        func.max(V6SingleBacktestUsage.max_rss_bytes).label("max_rss_bytes"),
+        func.avg(V6SingleBacktestUsage.read_bytes).label("avg_read_bytes"),
+        func.avg(V6SingleBacktestUsage.write_bytes).label("avg_write_bytes"),
+        (func.sum(V6SingleBacktestUsage.wall_seconds) / func.nullif(func.sum(V6SingleBacktestUsage.span_days), 0)).label("seconds_per_day"),
+        (func.sum(cpu) / func.nullif(func.sum(V6SingleBacktestUsage.span_days), 0)).label("cpu_seconds_per_day"),
+    ).group_by(*keys).order_by(*keys)
+    result = await db.execute(stmt)
+    return [dict(row._mapping) for row in result.all()]
+
+def _cli_params(backtest: V6SingleBacktest) -> dict:
+    """
+    The passivbot command line parameters derived from a backtest record.
+    """
+    return {
+        "account_name": backtest.account_name,
+        "symbol": backtest.symbol,
+        "start_date": backtest.start_date.strftime("%Y-%m-%d"),
+        "end_date": backtest.end_date.strftime("%Y-%m-%d"),
+        "initial_capital": backtest.initial_capital,
+        "market_type": backtest.market_type,
+    }
+
+def _compute_backtest_run_hash(backtest: V6SingleBacktest) -> str:
+    cfg_path = f"data/bt_v6_single_queue/{backtest.name}/{backtest.name}.json"
+    with open(cfg_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return compute_run_hash(config, _cli_params(backtest))
+
+def _link_stored_run(backtest: V6SingleBacktest, run_hash: str) -> bool:
+    os.makedirs(f"data/bt_v6_single_queue/{backtest.name}", exist_ok=True)
+    return link_stored_run(run_hash, plots_root(backtest.name, backtest.exchange, backtest.symbol), get_backtest_log_path(backtest))
+
+def _store_finished_run(backtest: V6SingleBacktest, run_hash: str):
+    """
+    Add a finished run to the run store. Failing to store it only loses the reuse, not the run.
+    """
+    plots_dir = get_plots_path(backtest)
+    if plots_dir is None:
+        return
+    try:
+        store_run(run_hash, plots_dir, get_backtest_log_path(backtest))
+    except Exception:
+        logger.exception("Failed to store the results of backtest %s", backtest.id)
+
+async def reuse_stored_run(db: AsyncSession, backtest: V6SingleBacktest) -> bool:
+    """
+    Complete a backtest instantly if an identical run has already finished, by linking
+    to its stored results. Returns True if the backtest was completed this way.
+    """
+    backtest_id = backtest.id
+    await unarchive_backtest(db, backtest)
+    try:
+        run_hash = await artifact_storage.run(_compute_backtest_run_hash, backtest)
+    except (OSError, ValueError):
+        return False
+    if not await artifact_storage.run(_link_stored_run, backtest, run_hash):
+        return False
+    await _record_backtest_metrics(db, backtest)
+    await db.execute(update(V6SingleBacktest).where(V6SingleBacktest.id == backtest_id).values(run_hash=run_hash))
+    await complete_backtest(db, backtest_id, "finished")
+    return True
+
+async def _supervise_backtest(backtest_id: int, process: asyncio.subprocess.Process, max_runtime: int | None, stopped: dict):
+    """
+    Watch a running backtest until it has to be stopped, then kill its process group.
+    The final status it was stopped with ('cancelled' or 'timeout') is put in `stopped["status"]`
+    before the kill, so the runner sees it as soon as the process exits.
+    """
+    deadline = time.monotonic() + max_runtime if max_runtime else None
+    while True:
+        await asyncio.sleep(settings.BACKTEST_SUPERVISE_INTERVAL)
+        if deadline is not None and time.monotonic() >= deadline:
+            reason = "timeout"
+            break
+        try:
+            async with SessionLocal() as db:
+                if await is_cancel_requested(db, backtest_id):
+                    reason = "cancelled"
+                    break
+        except Exception:
+            logger.exception("Failed to check whether backtest %s was cancelled", backtest_id)
+    stopped["status"] = reason
+    await terminate(process, settings.BACKTEST_KILL_GRACE_SECONDS)
+
+async def _complete_leased_backtest(db: AsyncSession, backtest_id: int, status: str, worker_id: str | None):
+    """
+    Record the final status of a run, unless the run was claimed by `worker_id` and its lease
+    has since been lost: the backtest then belongs to whoever cancelled or reclaimed it.
+    """
+    if worker_id is not None and not await holds_backtest_lease(db, backtest_id, worker_id):
+        logger.warning("Not completing backtest %s as '%s': worker %s no longer holds its lease", backtest_id, status, worker_id)
+        return
+    await complete_backtest(db, backtest_id, status)
+
+async def run_backtest_process(db: AsyncSession, backtest_id: int, force: bool = False, max_runtime: int | None = None, worker_id: str | None = None):
     """
     Runs a backtest as a background process, updating its status upon completion.
+    Unless `force` is set, an identical finished run is reused instead of running passivbot again.
+    The run is killed once it exceeds `max_runtime` seconds (default BACKTEST_MAX_RUNTIME_SECONDS)
+    or is cancelled, and ends as 'timeout' or 'cancelled'.
+    When run for a queue lease held by `worker_id`, the final status is only recorded while
+    that lease is still held.
     """
     # 1. Get the backtest record
     backtest = await get_v6_single_backtest(db, backtest_id)
     if not backtest:
         # Optionally log this error
         return
-    # 2. Ensure the queue and log directories exist
+    # 2. Ensure the queue and log directories exist, unpacking an archived run
+    await unarchive_backtest(db, backtest)
     backtest_dir = f"data/bt_v6_single_queue/{backtest.name}"
     os.makedirs(backtest_dir, exist_ok=True)
 
-
-
     # 3. Set status to 'RUNNING'
+    artifact_index.forget(backtest_id)
+    await db.execute(update(V6SingleBacktest).where(V6SingleBacktest.id == backtest_id).values(finished_at=None))
     await update_backtest_status(db, backtest_id, "running")
 
     try:
+        run_hash = await artifact_storage.run(_compute_backtest_run_hash, backtest)
+        await db.execute(update(V6SingleBacktest).where(V6SingleBacktest.id == backtest_id).values(run_hash=run_hash))
+        await db.commit()
+        await db.refresh(backtest)
+        if not force and await artifact_storage.run(_link_stored_run, backtest, run_hash):
+            await _record_backtest_metrics(db, backtest)
+            await _complete_leased_backtest(db, backtest_id, "finished", worker_id)
+            return
+
         preference = await get_preference(db)
         pb6venv = preference.pbv6_interpreter_path if preference else None
         pb6dir = preference.pbv6_path if preference else None
@@ -126,28 +1115,110 @@ async def run_backtest_process(db: AsyncSession, backtest_id: int):
         log_path = os.path.abspath(os.path.join(backtest_dir, f"{file_name}.log"))
 
         # 5. Run the backtest process asynchronously
+        params = _cli_params(backtest)
         cmd = [pb6venv, '-u', str(PurePath(f'{pb6dir}/backtest.py'))]
-        cmd_end = f'-dp -u {backtest.account_name} -s {backtest.symbol} -sd {backtest.start_date.strftime("%Y-%m-%d")} -ed {backtest.end_date.strftime("%Y-%m-%d")} -sb {backtest.initial_capital} -m {backtest.market_type}'
+        cmd_end = f'-dp -u {params["account_name"]} -s {params["symbol"]} -sd {params["start_date"]} -ed {params["end_date"]} -sb {params["initial_capital"]} -m {params["market_type"]}'
         cmd.extend(shlex.split(cmd_end))
         #cmd.extend(['-bd', str(PurePath(f'{pb6dir}/backtests/pbgui')), str(PurePath(cfg_path))])
         cmd.extend(['-bd', str(PurePath(os.path.abspath(backtest_dir))), str(PurePath(cfg_path))])
 
-        
-        with open(log_path, "w") as log_file:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=log_file,
-                stderr=log_file,
-                cwd=pb6dir
-            )
-            
-            return_code = await process.wait()
+        # Historical data comes from the shared market data cache; concurrent runs of the
+        # same range wait for the first one to download it, for no longer than they may run.
+        data_range = (backtest.exchange, backtest.symbol, params["start_date"], params["end_date"])
+        caches_dir = os.path.join(os.path.dirname(plots_root(backtest.name, backtest.exchange, backtest.symbol)), 'caches')
+        await artifact_storage.run(market_data_cache.attach, caches_dir, backtest.exchange, backtest.symbol)
+
+        # Run passivbot under the rusage wrapper, which reports CPU, peak RSS and I/O on exit.
+        usage_path = os.path.abspath(os.path.join(backtest_dir, f".{file_name}.usage.json"))
+        cmd = [sys.executable, RUSAGE_WRAPPER, usage_path, '--', *cmd]
+        span_days = (backtest.end_date - backtest.start_date).total_seconds() / 86400
+        symbol = backtest.symbol
+
+        runtime_limit = max_runtime or settings.BACKTEST_MAX_RUNTIME_SECONDS
+        deadline = time.monotonic() + runtime_limit if runtime_limit else None
+
+        async def should_stop():
+            if deadline is not None and time.monotonic() >= deadline:
+                return "timeout"
+            if await is_cancel_requested(db, backtest_id):
+                return "cancelled"
+            return None
+
+        # Output goes to the log file and to an in-memory buffer that live log streams follow.
+        log_buffer = open_log_buffer(backtest_id)
+        try:
+            async with market_data_cache.single_flight(*data_range, should_stop=should_stop) as flight:
+                # Unlinked first, so a log shared with the run store (by older entries) is not truncated.
+                if os.path.exists(log_path):
+                    os.unlink(log_path)
+                with open(log_path, "wb") as log_file:
+                    # A new session makes the wrapper a process group leader, so the whole
+                    # group can be killed and it does not die with (or outlive) us by accident.
+                    process = await asyncio.create_subprocess_exec(
+                        *cmd,
+                        stdout=asyncio.subprocess.PIPE,
+                        stderr=asyncio.subprocess.STDOUT,
+                        cwd=pb6dir,
+                        start_new_session=True
+                    )
+                    started = time.monotonic()
+                    running_processes[backtest_id] = process
+                    supervisor = None
+                    watcher = None
+                    stopped = {}
+                    try:
+                        await db.execute(update(V6SingleBacktestQueue).where(V6SingleBacktestQueue.backtest_id == backtest_id).values(pid=process.pid))
+                        await db.commit()
+                        remaining = max(deadline - time.monotonic(), 1) if deadline is not None else None
+                        supervisor = asyncio.create_task(_supervise_backtest(backtest_id, process, remaining, stopped))
+                        if flight.is_leader:
+                            # Lets waiting runs go once the download is done, not when we exit.
+                            watcher = asyncio.create_task(market_data_cache.watch_download(flight, *data_range))
+                        await tee_stream(process.stdout, log_file, log_buffer)
+                        return_code = await process.wait()
+                    finally:
+                        running_processes.pop(backtest_id, None)
+                        if supervisor is not None:
+                            supervisor.cancel()
+                        if watcher is not None:
+                            watcher.cancel()
+                        if process.returncode is None:
+                            # Cancelled (shutdown or lost lease): give the group the same grace
+                            # period as a cancel request, and SIGKILL it if cancelled again meanwhile.
+                            try:
+                                await terminate(process, settings.BACKTEST_KILL_GRACE_SECONDS)
+                            except asyncio.CancelledError:
+                                kill_process_group(process.pid, signal.SIGKILL)
+                                raise
+                    wall_seconds = time.monotonic() - started
+                    if return_code != 0 and not stopped:
+                        # Killed directly by a cancel request handled in this process
+                        if await is_cancel_requested(db, backtest_id):
+                            stopped["status"] = "cancelled"
+                if return_code == 0:
+                    flight.mark_ready()
+        except FlightAborted as e:
+            logger.info("Backtest %s stopped while waiting for market data: %s", backtest_id, e.reason)
+            await _complete_leased_backtest(db, backtest_id, e.reason, worker_id)
+            return
+        finally:
+            close_log_buffer(backtest_id)
+        usage = await artifact_storage.run(_read_usage_report, usage_path)
+        await save_backtest_usage(db, backtest_id, {"symbol": symbol, "span_days": span_days, "wall_seconds": wall_seconds, **usage})
+        await db.refresh(backtest)
+        market_data_cache.touch(*data_range)
+        await artifact_storage.run(market_data_cache.evict)
 
         # 6. Update status based on return code
-        final_status = "finished" if return_code == 0 else "failed"
-        await update_backtest_status(db, backtest_id, final_status)
+        final_status = stopped.get("status") or ("finished" if return_code == 0 else "failed")
+        if final_status == "finished":
+            await artifact_storage.run(_prepare_stats_columns, backtest)
+            await artifact_storage.run(_store_finished_run, backtest, run_hash)
+            await _record_backtest_metrics(db, backtest)
+        await _complete_leased_backtest(db, backtest_id, final_status, worker_id)
 
-    except Exception as e:
+    except Exception:
         # On any exception, mark as 'failed'
-        print(f"Error running backtest {backtest_id}: {e}") # Or use a proper logger
-        await update_backtest_status(db, backtest_id, "failed")
\ No newline at end of file
+        logger.exception("Error running backtest %s", backtest_id)
+        await db.rollback()
+        await _complete_leased_backtest(db, backtest_id, "failed", worker_id)
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Read throughput under write load, with and without the SQLite profile.
+
+Runs the same workload against two fresh databases: writer tasks updating backtest statuses
+(one commit per update, like running backtests do) while reader tasks run the backtest list
+and detail queries. With `--processes N` the workload runs in N processes at once, like an
+API process next to standalone workers.
+
+    python -m app.database.benchmark --seconds 10 --processes 4 --readers 8 --writers 2
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+from app.database.base import Base
+from app.database.session import create_session_factory
+from app.models.v6_single_backtest import V6SingleBacktest
+
+STATUSES = ["queued", "running", "finished", "failed"]
+
+async def _seed(url: str, sqlite_profile: bool, rows: int):
+    engine, read_engine, factory = create_session_factory(url, sqlite_profile)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with factory() as db:
+        db.add_all(
+            V6SingleBacktest(
+                name=f"bt{i}", account_name="acc", exchange="bybit_futures", symbol="BTCUSDT",
+                market_type="futures", model="m", start_date=datetime(2021, 1, 1), end_date=datetime(2022, 1, 1),
+                initial_capital=1000.0, status=random.choice(STATUSES),
+            )
+            for i in range(rows)
+        )
+        await db.commit()
+    for e in (engine, read_engine):
+        if e is not None:
+            await e.dispose()
+
+async def _workload(url: str, sqlite_profile: bool, seconds: float, readers: int, writers: int, rows: int) -> dict:
+    engine, read_engine, factory = create_session_factory(url, sqlite_profile)
+    counts = {"reads": 0, "writes": 0, "errors": 0, "read_latencies": []}
+    deadline = time.monotonic() + seconds
+
+    async def reader():
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                async with factory() as db:
+                    listed = await db.execute(
+                        select(V6SingleBacktest).where(V6SingleBacktest.status == random.choice(STATUSES))
+                        .order_by(V6SingleBacktest.id.desc()).limit(50)
+                    )
+                    listed.scalars().all()
+                    await db.get(V6SingleBacktest, random.randint(1, rows))
+                counts["reads"] += 1
+                counts["read_latencies"].append(time.perf_counter() - start)
+            except OperationalError:
+                counts["errors"] += 1
+
+    async def writer():
+        while time.monotonic() < deadline:
+            try:
+                async with factory() as db:
+                    await db.execute(
+                        update(V6SingleBacktest).where(V6SingleBacktest.id == random.randint(1, rows))
+                        .values(status=random.choice(STATUSES))
+                    )
+                    await db.commit()
+                counts["writes"] += 1
+            except OperationalError:
+                counts["errors"] += 1
+
+    await asyncio.gather(*[reader() for _ in range(readers)], *[writer() for _ in range(writers)])
+    for e in (engine, read_engine):
+        if e is not None:
+            await e.dispose()
+    return counts
+
+def _workload_process(*args) -> dict:
+    return asyncio.run(_workload(*args))
+
+def run(sqlite_profile: bool, seconds: float, processes: int, readers: int, writers: int, rows: int, directory: str) -> dict:
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        asyncio.run(_seed(url, sqlite_profile, rows))
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(_workload_process, url, sqlite_profile, seconds, readers, writers, rows) for _ in range(processes)]
+            results = [future.result() for future in futures]
+
+    latencies = sorted(latency for result in results for latency in result["read_latencies"])
+    def percentile(q: float) -> float:
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else float("nan")
+    return {
+        "reads_per_second": sum(result["reads"] for result in results) / seconds,
+        "writes_per_second": sum(result["writes"] for result in results) / seconds,
+        "errors": sum(result["errors"] for result in results),
+        "read_p50_ms": percentile(0.5),
+        "read_p99_ms": percentile(0.99),
+    }
+
+def main(seconds: float, processes: int, readers: int, writers: int, rows: int, directory: str):
+    print(f"{seconds:g}s, {processes} process(es) x ({readers} readers, {writers} writers), {rows} backtests")
+    print(f"{'profile':<10}{'reads/s':>10}{'writes/s':>10}{'errors':>8}{'read p50 ms':>13}{'read p99 ms':>13}")
+    for sqlite_profile in (False, True):
+        result = run(sqlite_profile, seconds, processes, readers, writers, rows, directory)
+        print(
+            f"{'on' if sqlite_profile else 'off':<10}{result['reads_per_second']:>10.0f}{result['writes_per_second']:>10.0f}"
+            f"{result['errors']:>8}{result['read_p50_ms']:>13.2f}{result['read_p99_ms']:>13.2f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=10000)
+    # fsync cost matters: benchmark on the disk the real database lives on
+    parser.add_argument("--dir", default="data")
+    args = parser.parse_args()
+    main(args.seconds, args.processes, args.readers, args.writers, args.rows, args.dir)
\ No newline at end of file
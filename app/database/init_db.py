@@ -1,20 +1,40 @@
+from sqlalchemy import inspect, text
 from app.database.session import engine
 from app.database.base import Base
 from app.models.user import User
 from app.models.department import Department
 from app.models.api_key import ApiKey
-from app.models.v6_single_backtest import V6SingleBacktest
-from app.models.coinmarket import CoinMarketCap
+from app.models.v6_single_backtest import V6SingleBacktest, V6SingleBacktestQueue, V6SingleBacktestSweep, V6SingleBacktestMetrics, V6SingleBacktestArtifact, V6SingleBacktestUsage
+from app.models.coinmarket import CoinMarketCap, CoinListing, CoinMetadata
 from app.crud.user import get_user_by_username, create_user
 from app.schemas.user import UserCreate
 from app.database.session import SessionLocal
 from app.crud.trading_pair import get_trading_pair_by_exchange, create_trading_pair
 from app.schemas.trading_pair import TradingPairCreate
 
+def _add_missing_columns(conn):
+    """
+    create_all only creates missing tables; add nullable columns (and their indexes) that
+    were introduced after a table was first created.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or not column.nullable:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
 async def init_db():
     async with engine.begin() as conn:
 #        await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
     
     async with SessionLocal() as db:
         user = await get_user_by_username(db, "vben")
@@ -0,0 +1,170 @@
+import functools
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+from typing import Optional
+from sqlalchemy import event
+from app.core.config import settings
+from app import metrics
+
+logger = logging.getLogger("app.sql")
+
+# Template used for statements beyond SQL_STATS_MAX_TEMPLATES.
+OTHER_TEMPLATE = "<other>"
+# Longest parameter repr written to the slow-query log.
+MAX_LOGGED_PARAMETERS = 2000
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_REPEATED_GROUPS = re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+")
+
+@functools.lru_cache(maxsize=2048)
+def statement_template(statement: str) -> str:
+    """
+    Normalize a statement into the template its stats are kept under: whitespace collapsed,
+    and expanded `IN (?, ?, ...)` lists and multi-row `VALUES (...), (...)` folded, so that
+    batch sizes do not create new templates.
+    """
+    template = _WHITESPACE.sub(" ", statement).strip()
+    template = _PLACEHOLDER_LIST.sub("(?, ...)", template)
+    return _REPEATED_GROUPS.sub(r"\1, ...", template)
+
+def _operation(template: str) -> str:
+    return template.split(" ", 1)[0].upper() if template else "OTHER"
+
+def _rows(cursor, executemany: bool) -> int:
+    # SELECTs report rowcount -1; SQLAlchemy's async adapters prefetch their rows into `_rows`.
+    if cursor.description is not None:
+        rows = getattr(cursor, "_rows", None)
+        return len(rows) if rows is not None else 0
+    return max(cursor.rowcount or 0, 0)
+
+class TemplateStats:
+    __slots__ = ("calls", "total_seconds", "max_seconds", "rows", "slow", "errors")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.rows = 0
+        self.slow = 0
+        self.errors = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "total_seconds": self.total_seconds,
+            "avg_seconds": self.total_seconds / self.calls if self.calls else None,
+            "max_seconds": self.max_seconds,
+            "rows": self.rows,
+            "slow": self.slow,
+            "errors": self.errors,
+        }
+
+class QueryStats:
+    """
+    Per statement-template counters: calls, total and max latency, rows returned or affected,
+    slow statements and errors. At most `max_templates` templates are tracked separately.
+    """
+
+    def __init__(self, max_templates: int):
+        self.max_templates = max_templates
+        self._templates: dict[str, TemplateStats] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def record(self, template: str, seconds: float, rows: int, slow: bool, error: bool = False):
+        with self._lock:
+            stats = self._templates.get(template)
+            if stats is None:
+                if len(self._templates) >= self.max_templates:
+                    template = OTHER_TEMPLATE
+                stats = self._templates.setdefault(template, TemplateStats())
+            stats.calls += 1
+            stats.total_seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows += rows
+            stats.slow += slow
+            stats.errors += error
+
+    def top(self, sort: str = "total_seconds", limit: int = 20) -> list[dict]:
+        with self._lock:
+            items = [
+                {"id": hashlib.sha1(template.encode("utf-8")).hexdigest()[:12], "template": template, **stats.as_dict()}
+                for template, stats in self._templates.items()
+            ]
+        items.sort(key=lambda item: item[sort] or 0, reverse=True)
+        return items[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._templates.clear()
+            self.started_at = time.time()
+
+query_stats = QueryStats(settings.SQL_STATS_MAX_TEMPLATES)
+
+db_statement_duration_seconds = metrics.registry.histogram(
+    "db_statement_duration_seconds", "Database statement latency.", ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+db_statement_rows = metrics.registry.histogram(
+    "db_statement_rows", "Rows returned or affected per database statement.", ("operation",),
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000))
+db_slow_statements_total = metrics.registry.counter(
+    "db_slow_statements_total", "Database statements slower than SQL_SLOW_QUERY_SECONDS.", ("operation",))
+db_statement_errors_total = metrics.registry.counter(
+    "db_statement_errors_total", "Database statements that raised an error.", ("operation",))
+
+def _finish(statement: str, parameters, seconds: float, rows: int, error: bool = False):
+    template = statement_template(statement)
+    operation = _operation(template)
+    slow_threshold: Optional[float] = settings.SQL_SLOW_QUERY_SECONDS
+    slow = slow_threshold is not None and seconds >= slow_threshold
+
+    metrics.record_db_time(seconds)
+    query_stats.record(template, seconds, rows, slow, error)
+    db_statement_duration_seconds.observe(seconds, operation=operation)
+    if error:
+        db_statement_errors_total.inc(operation=operation)
+    else:
+        db_statement_rows.observe(rows, operation=operation)
+    if slow:
+        db_slow_statements_total.inc(operation=operation)
+        params = repr(parameters)
+        if len(params) > MAX_LOGGED_PARAMETERS:
+            params = params[:MAX_LOGGED_PARAMETERS] + "..."
+        logger.warning(
+            "Slow SQL statement: %.1f ms, %d rows: %s parameters=%s", seconds * 1000, rows, statement, params,
+            extra={"sql_seconds": seconds, "sql_rows": rows, "sql_template": template},
+        )
+    elif settings.SQL_LOG_SAMPLE_RATE > 0 and random.random() < settings.SQL_LOG_SAMPLE_RATE:
+        logger.info(
+            "SQL statement: %.1f ms, %d rows: %s", seconds * 1000, rows, template,
+            extra={"sql_seconds": seconds, "sql_rows": rows, "sql_template": template},
+        )
+
+def instrument_engine(engine):
+    """
+    Time every statement executed through `engine` (an AsyncEngine or Engine): per-template
+    stats (`query_stats`), statement metrics, the current request's DB time, the slow-query
+    log and sampled statement logging.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_start_time"].pop()
+        _finish(statement, parameters, seconds, _rows(cursor, executemany))
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start_time"):
+            seconds = time.perf_counter() - conn.info["query_start_time"].pop()
+            _finish(exception_context.statement or "", exception_context.parameters, seconds, 0, error=True)
\ No newline at end of file
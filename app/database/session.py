@@ -1,8 +1,26 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.database.instrumentation import instrument_engine
+from app.database.sqlite import create_sqlite_engines, is_file_sqlite, routing_session_class
 
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
-SessionLocal = sessionmaker(
-    autocommit=False, autoflush=False, bind=engine, class_=AsyncSession
-)
\ No newline at end of file
+def create_session_factory(url: str, sqlite_profile: bool):
+    """
+    The engine (used for writes and DDL), the read engine or None, and the session factory.
+    With the SQLite profile, sessions route reads to the read engine (see `RoutingSession`).
+    """
+    if sqlite_profile and is_file_sqlite(url):
+        engine, read_engine = create_sqlite_engines(url, echo=settings.DATABASE_ECHO)
+        session_options = {"sync_session_class": routing_session_class(engine, read_engine)}
+    else:
+        engine, read_engine = create_async_engine(url, echo=settings.DATABASE_ECHO), None
+        session_options = {}
+    for e in (engine, read_engine):
+        if e is not None:
+            instrument_engine(e)
+    factory = sessionmaker(
+        autocommit=False, autoflush=False, bind=engine, class_=AsyncSession, **session_options
+    )
+    return engine, read_engine, factory
+
+engine, read_engine, SessionLocal = create_session_factory(settings.DATABASE_URL, settings.SQLITE_PROFILE)
\ No newline at end of file
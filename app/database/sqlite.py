@@ -0,0 +1,83 @@
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import CompoundSelect, Select, TextClause
+from app.core.config import settings
+
+# Session.info key set once a session's transaction has used the writer.
+_WRITING = "sqlite_writer"
+
+def is_file_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+def _pragmas(read_only: bool) -> list[str]:
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+        f"PRAGMA cache_size = -{int(settings.SQLITE_CACHE_SIZE_KIB)}",
+        f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        # WAL is persistent in the database file; setting it on the writer is enough.
+        pragmas += ["PRAGMA journal_mode = WAL", f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}"]
+    return pragmas
+
+def apply_pragmas(engine: AsyncEngine, read_only: bool):
+    pragmas = _pragmas(read_only)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+def create_sqlite_engines(url: str, echo: bool = False) -> tuple[AsyncEngine, AsyncEngine]:
+    """
+    The writer engine (one connection, so writes from this process queue up in the pool instead
+    of failing with "database is locked") and the reader engine (a pool of query-only connections,
+    which in WAL mode read concurrently with the writer).
+    """
+    writer = create_async_engine(url, echo=echo, pool_size=1, max_overflow=0, pool_timeout=settings.SQLITE_WRITER_TIMEOUT)
+    reader = create_async_engine(url, echo=echo, pool_size=settings.SQLITE_READ_POOL_SIZE, max_overflow=settings.SQLITE_READ_MAX_OVERFLOW)
+    apply_pragmas(writer, read_only=False)
+    apply_pragmas(reader, read_only=True)
+    return writer, reader
+
+def _is_read(clause) -> bool:
+    if isinstance(clause, (Select, CompoundSelect)):
+        return True
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().upper().startswith("SELECT")
+    return False
+
+class RoutingSession(Session):
+    """
+    Sends each statement to the reader or the writer engine. SELECTs go to a reader until the
+    transaction writes anything (a flush, INSERT/UPDATE/DELETE, DDL or other text); from then on
+    everything goes to the writer so the transaction reads its own writes. The choice resets
+    when the transaction ends.
+    """
+    writer: Optional[AsyncEngine] = None
+    reader: Optional[AsyncEngine] = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if not self.info.get(_WRITING) and not self._flushing and _is_read(clause):
+            return self.reader.sync_engine
+        self.info[_WRITING] = True
+        return self.writer.sync_engine
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_routing(session: Session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_WRITING, None)
+
+def routing_session_class(writer: AsyncEngine, reader: AsyncEngine) -> type[RoutingSession]:
+    return type("RoutingSession", (RoutingSession,), {"writer": writer, "reader": reader})
\ No newline at end of file
@@ -1,7 +1,10 @@
 import logging
+import time
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app import metrics
 
 logging.basicConfig(level=logging.INFO)
 
@@ -18,4 +21,72 @@ class LogRequestBodyMiddleware(BaseHTTPMiddleware):
             request = Request(request.scope, receive)
         
         response = await call_next(request)
-        return response
\ No newline at end of file
+        return response
+
+def route_template(scope: Scope) -> str:
+    """
+    The path template of the route that handled the request (e.g. "/api/v6-single/backtest/{backtest_id}/stats"),
+    or "<unmatched>". Routes of included routers may only know their own part of the template,
+    so the static prefix is recovered from the request path.
+    """
+    route = scope.get("route")
+    route_path = getattr(route, "path", None)
+    path_regex = getattr(route, "path_regex", None)
+    if not route_path:
+        return "<unmatched>"
+    path = scope.get("path", "")
+    if path_regex is not None and not path_regex.match(path):
+        for i in range(1, len(path)):
+            if path[i] == "/" and path_regex.match(path[i:]):
+                return path[:i] + route_path
+    return route_path
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request metrics (see `app.metrics`): latency, status,
+    response size, in-flight count, and DB / file I/O time, labelled by route template
+    rather than raw path. The response is passed through as it is sent, never buffered.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        start = time.perf_counter()
+        timings = metrics.RequestTimings()
+        token = metrics.current_timings.set(timings)
+        state = {"status": 500, "size": 0, "done": False}
+
+        def finish():
+            if state["done"]:
+                return
+            state["done"] = True
+            labels = {"method": method, "route": route_template(scope)}
+            metrics.http_requests_total.inc(status=state["status"], **labels)
+            metrics.http_request_duration_seconds.observe(time.perf_counter() - start, **labels)
+            metrics.http_response_size_bytes.observe(state["size"], **labels)
+            metrics.http_request_db_seconds.observe(timings.db_seconds, **labels)
+            metrics.http_request_db_statements.observe(timings.db_statements, **labels)
+            metrics.http_request_io_seconds.observe(timings.io_seconds, **labels)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["size"] += len(message.get("body", b""))
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        metrics.http_requests_in_flight.inc(method=method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.http_requests_in_flight.dec(method=method)
+            finish()
+            metrics.current_timings.reset(token)
\ No newline at end of file
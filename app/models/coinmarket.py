@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON
 from app.database.base import Base
 
 class CoinMarketCap(Base):
@@ -8,4 +8,53 @@ class CoinMarketCap(Base):
     coin_market_cap_api_key = Column(String, index=True)
     fetch_limit = Column(Integer)
     fetch_interval = Column(Integer)
-    metadata_interval = Column(Integer)
\ No newline at end of file
+    metadata_interval = Column(Integer)
+    # When ingestion last completed a listings / metadata refresh
+    listings_fetched_at = Column(DateTime, nullable=True)
+    metadata_fetched_at = Column(DateTime, nullable=True)
+
+class CoinListing(Base):
+    """
+    Latest CoinMarketCap listing of each coin within the configured `fetch_limit`, in USD.
+    """
+    __tablename__ = "coin_listings"
+
+    cmc_id = Column(Integer, primary_key=True, autoincrement=False)
+    symbol = Column(String, index=True)
+    name = Column(String)
+    slug = Column(String, index=True)
+    cmc_rank = Column(Integer, index=True)
+    num_market_pairs = Column(Integer)
+    price = Column(Float)
+    volume_24h = Column(Float)
+    percent_change_1h = Column(Float)
+    percent_change_24h = Column(Float)
+    percent_change_7d = Column(Float)
+    market_cap = Column(Float, index=True)
+    fully_diluted_market_cap = Column(Float)
+    circulating_supply = Column(Float)
+    total_supply = Column(Float)
+    max_supply = Column(Float)
+    tags = Column(JSON)
+    date_added = Column(DateTime)
+    last_updated = Column(DateTime)
+    fetched_at = Column(DateTime)
+
+class CoinMetadata(Base):
+    """
+    Static CoinMarketCap coin information (`/v2/cryptocurrency/info`), refreshed less often than listings.
+    """
+    __tablename__ = "coin_metadata"
+
+    cmc_id = Column(Integer, primary_key=True, autoincrement=False)
+    symbol = Column(String, index=True)
+    name = Column(String)
+    slug = Column(String, index=True)
+    category = Column(String)
+    description = Column(String)
+    logo = Column(String)
+    tags = Column(JSON)
+    urls = Column(JSON)
+    platform = Column(JSON)
+    date_launched = Column(DateTime)
+    fetched_at = Column(DateTime)
\ No newline at end of file
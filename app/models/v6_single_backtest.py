@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Integer, DateTime, Float
+from sqlalchemy import Column, String, Integer, DateTime, Float, Boolean, JSON, ForeignKey, Index
 from app.database.base import Base
+from datetime import datetime
 import uuid
 
 class V6SingleBacktest(Base):
@@ -15,4 +16,120 @@ class V6SingleBacktest(Base):
     start_date = Column(DateTime)
     end_date = Column(DateTime)
     initial_capital = Column(Float)
-    status = Column(String, default='created')
\ No newline at end of file
+    status = Column(String, default='created')
+    sweep_id = Column(Integer, ForeignKey("v6_single_backtest_sweep.id", ondelete="SET NULL"), nullable=True, index=True)
+    run_hash = Column(String, nullable=True, index=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Set while the run directory is packed into the archive tier
+    archived_at = Column(DateTime, nullable=True)
+    # Tombstone: the backtest is deleted and waits for the garbage collector
+    deleted_at = Column(DateTime, nullable=True, index=True)
+
+    # Composite indexes backing the filtered, keyset-paginated list endpoint
+    __table_args__ = (
+        Index("ix_v6_single_backtest_status_id", "status", "id"),
+        Index("ix_v6_single_backtest_symbol_id", "symbol", "id"),
+        Index("ix_v6_single_backtest_exchange_id", "exchange", "id"),
+        Index("ix_v6_single_backtest_account_name_id", "account_name", "id"),
+        Index("ix_v6_single_backtest_start_date_id", "start_date", "id"),
+        Index("ix_v6_single_backtest_end_date_id", "end_date", "id"),
+        Index("ix_v6_single_backtest_name_id", "name", "id"),
+    )
+
+class V6SingleBacktestSweep(Base):
+    """
+    A group of backtests submitted together from a base config and a parameter grid.
+    """
+    __tablename__ = "v6_single_backtest_sweep"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, index=True)
+    total = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class V6SingleBacktestQueue(Base):
+    """
+    Durable run queue for v6 single backtests. One row per queued or running backtest;
+    the row is removed once the run completes. A running entry is leased to one worker,
+    which must keep renewing `lease_expires_at` or the entry becomes claimable again.
+    """
+    __tablename__ = "v6_single_backtest_queue"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    backtest_id = Column(Integer, ForeignKey("v6_single_backtest.id", ondelete="CASCADE"), unique=True, nullable=False)
+    priority = Column(Integer, nullable=False, default=0)
+    status = Column(String, nullable=False, default='queued')
+    enqueued_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    force_rerun = Column(Boolean, nullable=True, default=False)
+    max_runtime_seconds = Column(Integer, nullable=True)
+    # Process group of the running passivbot subprocess, for cancellation and orphan reaping
+    pid = Column(Integer, nullable=True)
+    cancel_requested = Column(Boolean, nullable=True, default=False)
+
+    __table_args__ = (
+        # FIFO by enqueue time within a priority: a re-queued backtest keeps its row (and id)
+        Index("ix_v6_single_backtest_queue_fifo", "status", "priority", "enqueued_at", "id"),
+        Index("ix_v6_single_backtest_queue_lease", "status", "lease_expires_at"),
+    )
+
+class V6SingleBacktestMetrics(Base):
+    """
+    Key metrics of a finished backtest, extracted once from its result and stats files
+    so that runs can be sorted and filtered by them in SQL.
+    """
+    __tablename__ = "v6_single_backtest_metrics"
+
+    backtest_id = Column(Integer, ForeignKey("v6_single_backtest.id", ondelete="CASCADE"), primary_key=True)
+    adg = Column(Float, nullable=True)
+    final_balance = Column(Float, nullable=True)
+    max_drawdown = Column(Float, nullable=True)
+    hours_stuck_max = Column(Float, nullable=True)
+    n_fills = Column(Integer, nullable=True)
+    extracted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_v6_single_backtest_metrics_adg", "adg", "backtest_id"),
+        Index("ix_v6_single_backtest_metrics_final_balance", "final_balance", "backtest_id"),
+        Index("ix_v6_single_backtest_metrics_max_drawdown", "max_drawdown", "backtest_id"),
+        Index("ix_v6_single_backtest_metrics_hours_stuck_max", "hours_stuck_max", "backtest_id"),
+        Index("ix_v6_single_backtest_metrics_n_fills", "n_fills", "backtest_id"),
+    )
+
+class V6SingleBacktestArtifact(Base):
+    """
+    Resolved plots directory and file sizes/mtimes of a finished backtest, recorded by the runner.
+    """
+    __tablename__ = "v6_single_backtest_artifact"
+
+    backtest_id = Column(Integer, ForeignKey("v6_single_backtest.id", ondelete="CASCADE"), primary_key=True)
+    plots_dir = Column(String, nullable=True)
+    files = Column(JSON, nullable=False, default={})
+    finished_at = Column(DateTime, nullable=True)
+    archived = Column(Boolean, nullable=True, default=False)
+    indexed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class V6SingleBacktestUsage(Base):
+    """
+    Resources consumed by the passivbot subprocess of a backtest's latest run.
+    """
+    __tablename__ = "v6_single_backtest_usage"
+
+    backtest_id = Column(Integer, ForeignKey("v6_single_backtest.id", ondelete="CASCADE"), primary_key=True)
+    symbol = Column(String, nullable=True)
+    span_days = Column(Float, nullable=True)
+    return_code = Column(Integer, nullable=True)
+    wall_seconds = Column(Float, nullable=False)
+    user_cpu_seconds = Column(Float, nullable=True)
+    system_cpu_seconds = Column(Float, nullable=True)
+    max_rss_bytes = Column(Integer, nullable=True)
+    read_bytes = Column(Integer, nullable=True)
+    write_bytes = Column(Integer, nullable=True)
+    recorded_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_v6_single_backtest_usage_symbol_span", "symbol", "span_days"),
+    )
\ No newline at end of file
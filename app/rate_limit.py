@@ -0,0 +1,39 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets: each key may spend up to `burst` tokens at once, refilled at
+    `rate_per_second`. Only the `max_keys` most recently used buckets are kept; a forgotten
+    bucket starts full again.
+    """
+
+    def __init__(self, burst: int, rate_per_second: float, max_keys: int = 100000):
+        self.burst = burst
+        self.rate_per_second = rate_per_second
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, tokens: float = 1.0) -> float:
+        """
+        Take `tokens` from the bucket of `key`. Returns 0 on success, otherwise the number of
+        seconds until enough tokens are available (nothing is taken in that case).
+        """
+        now = time.monotonic()
+        with self._lock:
+            level, updated = self._buckets.pop(key, (float(self.burst), now))
+            level = min(float(self.burst), level + (now - updated) * self.rate_per_second)
+            wait = 0.0
+            if level >= tokens:
+                level -= tokens
+            elif self.rate_per_second > 0:
+                wait = (tokens - level) / self.rate_per_second
+            else:
+                wait = math.inf
+            self._buckets[key] = (level, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, Any
+from typing import Optional, Any, Dict, List
 from datetime import datetime
 
 class V6SingleBacktestBase(BaseModel):
@@ -14,6 +14,7 @@ class V6SingleBacktestBase(BaseModel):
     end_date: Optional[datetime] = None
     initial_capital: Optional[float] = None
     status: Optional[str] = None
+    sweep_id: Optional[int] = None
 
 class V6SingleBacktestCreate(V6SingleBacktestBase):
     config: dict
@@ -32,6 +33,109 @@ class V6SingleBacktestUpdate(V6SingleBacktestBase):
 
 class V6SingleBacktest(V6SingleBacktestBase):
     id: int
+    run_hash: Optional[str] = None
+    finished_at: Optional[datetime] = None
+    archived_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class V6SingleBacktestFilter(BaseModel):
+    status: Optional[List[str]] = None
+    symbol: Optional[str] = None
+    exchange: Optional[str] = None
+    account_name: Optional[str] = None
+    sweep_id: Optional[int] = None
+    name_prefix: Optional[str] = None
+    start_date_from: Optional[datetime] = None
+    start_date_to: Optional[datetime] = None
+    end_date_from: Optional[datetime] = None
+    end_date_to: Optional[datetime] = None
+    adg_min: Optional[float] = None
+    final_balance_min: Optional[float] = None
+    max_drawdown_max: Optional[float] = None
+    hours_stuck_max_max: Optional[float] = None
+    n_fills_min: Optional[int] = None
+
+    def has_metric_filters(self) -> bool:
+        return any(value is not None for value in (
+            self.adg_min, self.final_balance_min, self.max_drawdown_max, self.hours_stuck_max_max, self.n_fills_min,
+        ))
+
+class V6SingleBacktestSweepCreate(BaseModel):
+    """
+    A batch of backtests: every combination of `items` x `grid` applied on top of `base`.
+    Keys in `items`/`grid` are backtest fields (e.g. "symbol", "start_date") or
+    dotted paths into the config (e.g. "config.long.ema_span_0").
+    """
+    name: str
+    base: V6SingleBacktestBase
+    grid: Optional[Dict[str, List[Any]]] = None
+    items: Optional[List[Dict[str, Any]]] = None
+    start: bool = False
+    priority: int = 0
+    force: bool = False
+
+class V6SingleBacktestMetrics(BaseModel):
+    backtest_id: int
+    adg: Optional[float] = None
+    final_balance: Optional[float] = None
+    max_drawdown: Optional[float] = None
+    hours_stuck_max: Optional[float] = None
+    n_fills: Optional[int] = None
+    extracted_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class V6SingleBacktestMetricsResponse(BaseModel):
+    code: int
+    data: V6SingleBacktestMetrics
+    message: str
+
+class V6SingleBacktestUsage(BaseModel):
+    backtest_id: int
+    symbol: Optional[str] = None
+    span_days: Optional[float] = None
+    return_code: Optional[int] = None
+    wall_seconds: float
+    user_cpu_seconds: Optional[float] = None
+    system_cpu_seconds: Optional[float] = None
+    max_rss_bytes: Optional[int] = None
+    read_bytes: Optional[int] = None
+    write_bytes: Optional[int] = None
+    recorded_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class V6SingleBacktestUsageResponse(BaseModel):
+    code: int
+    data: V6SingleBacktestUsage
+    message: str
+
+class V6SingleBacktestSweep(BaseModel):
+    id: int
+    name: str
+    total: int
+    created_at: datetime
+    # Number of the sweep's backtests in each status
+    status_counts: Dict[str, int] = {}
+
+    class Config:
+        from_attributes = True
+
+class V6SingleBacktestSweepResponse(BaseModel):
+    code: int
+    data: V6SingleBacktestSweep
+    message: str
+
+class V6SingleBacktestSweepCreated(BaseModel):
+    sweep_id: int
+    total: int
+    backtest_ids: List[int]
+
+class V6SingleBacktestSweepCreatedResponse(BaseModel):
+    code: int
+    data: V6SingleBacktestSweepCreated
+    message: str
\ No newline at end of file
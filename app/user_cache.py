@@ -0,0 +1,135 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.user import User
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """
+    What authenticated endpoints get for the current user: a detached snapshot of the
+    `User` row without the password hash, safe to share between requests.
+    """
+    id: uuid.UUID
+    username: str
+    roles: tuple[str, ...]
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(id=user.id, username=user.username, roles=tuple(user.roles or ()))
+
+class UserCache:
+    """
+    Bounded LRU cache of verified access tokens -> `CurrentUser`.
+
+    An entry lives until the earlier of `ttl` seconds and the token's own expiry. All of a
+    user's entries are dropped when the user row is updated or deleted (see the session
+    hooks below); the TTL bounds staleness for changes made by other processes.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[CurrentUser, float]] = OrderedDict()
+        self._tokens_by_user: dict[uuid.UUID, set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, token: str) -> Optional[CurrentUser]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(token)
+            if cached is None or cached[1] <= now:
+                if cached is not None:
+                    self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return cached[0]
+
+    def put(self, token: str, user: CurrentUser, token_expires_at: Optional[float] = None):
+        """
+        Cache `user` for `token`. `token_expires_at` is the token's `exp` claim (Unix time).
+        """
+        if not self.enabled:
+            return
+        expires = time.monotonic() + self.ttl
+        if token_expires_at is not None:
+            expires = min(expires, time.monotonic() + token_expires_at - time.time())
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (user, expires)
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, token: str):
+        cached = self._entries.pop(token, None)
+        if cached is not None:
+            tokens = self._tokens_by_user.get(cached[0].id)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_user[cached[0].id]
+
+    def invalidate_user(self, user_id: uuid.UUID):
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+user_cache = UserCache(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_ENTRIES)
+
+# Invalidate on every ORM update/delete of a user, and again once the transaction commits so
+# that a request which read the old row in between cannot leave a stale entry behind.
+# Bulk `update(User)` statements bypass these hooks; call `user_cache.invalidate_user` for those.
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User):
+    user_cache.invalidate_user(target.id)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session):
+    for user_id in session.info.pop("changed_user_ids", ()):
+        user_cache.invalidate_user(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session: Session):
+    session.info.pop("changed_user_ids", None)
\ No newline at end of file
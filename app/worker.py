@@ -0,0 +1,45 @@
+"""
+Standalone backtest worker.
+
+Claims queued v6 single backtests from the shared database and runs them, so that
+backtest execution can be scaled out independently of the API processes:
+
+    python -m app.worker --concurrency 8
+
+Run the API with BACKTEST_RUN_IN_API=false so that it only enqueues.
+"""
+import argparse
+import asyncio
+import logging
+import signal
+from app.backtest.scheduler import BacktestScheduler, default_worker_id
+from app.database.init_db import init_db
+
+logger = logging.getLogger(__name__)
+
+async def run_worker(concurrency: int | None, worker_id: str):
+    await init_db()
+    worker = BacktestScheduler(max_concurrency=concurrency, worker_id=worker_id)
+    await worker.start()
+    logger.info("Backtest worker %s started with concurrency %d", worker.worker_id, worker.max_concurrency)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    logger.info("Backtest worker %s shutting down", worker.worker_id)
+    await worker.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued v6 single backtests.")
+    parser.add_argument("--concurrency", type=int, default=None, help="Maximum concurrent backtests (default: CPU count).")
+    parser.add_argument("--worker-id", default=default_worker_id(), help="Lease owner name (default: hostname:pid).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker(args.concurrency, args.worker_id))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,15 +1,50 @@
 import os
 from fastapi import FastAPI
-from app.api.endpoints import auth, user, system, trading_pairs, v6_single_backtest, preference, coinmarket
+from app.api.endpoints import auth, user, system, trading_pairs, v6_single_backtest, preference, coinmarket, coin_data, metrics
 from app.database.init_db import init_db
+from app.backtest.scheduler import scheduler
+from app.backtest.artifacts import artifact_index
+from app.backtest.archiver import archiver
+from app.backtest.gc import garbage_collector
+from app.backtest.storage import artifact_storage
+from app.crud.v6_single_backtest import load_artifact_index
+from app.database.session import SessionLocal
+from app.core.config import settings
+from app.middleware import MetricsMiddleware
+from app.security import password_hasher
+from app.coinmarket.client import cmc_client
+from app.coinmarket.ingest import coin_ingestor
+from app.coinmarket.snapshot import coin_snapshot
 
 app = FastAPI()
+app.add_middleware(MetricsMiddleware)
 
 @app.on_event("startup")
 async def on_startup():
     # Ensure the data directory exists
     os.makedirs("data", exist_ok=True)
     await init_db()
+    async with SessionLocal() as db:
+        await load_artifact_index(db)
+    await coin_snapshot.reload()
+    artifact_index.start()
+    archiver.start()
+    garbage_collector.start()
+    if settings.CMC_INGEST_ENABLED:
+        coin_ingestor.start()
+    if settings.BACKTEST_RUN_IN_API:
+        await scheduler.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await scheduler.stop()
+    await artifact_index.stop()
+    await archiver.stop()
+    await garbage_collector.stop()
+    await coin_ingestor.stop()
+    artifact_storage.shutdown()
+    password_hasher.shutdown()
+    await cmc_client.close()
 
 app.include_router(auth.router)
 app.include_router(user.router)
@@ -18,4 +53,6 @@ app.include_router(trading_pairs.router, prefix="/api/trading-pairs", tags=["tra
 app.include_router(v6_single_backtest.router, prefix="/api/v6-single/backtest", tags=["v6-single-backtest"])
 app.include_router(preference.router, prefix="/api/system/preferences", tags=["preferences"])
 app.include_router(coinmarket.router, prefix="/api/information/coin-data/key", tags=["coinmarket"])
+app.include_router(coin_data.router, prefix="/api/information/coin-data", tags=["coin-data"])
+app.include_router(metrics.router, tags=["metrics"])
 # Trigger reload
\ No newline at end of file
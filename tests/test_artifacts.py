@@ -0,0 +1,44 @@
+import asyncio
+import os
+import shutil
+from datetime import datetime
+from sqlalchemy import select
+from app.backtest import artifacts
+from app.backtest.artifacts import ArtifactEntry, ArtifactIndex, scan_files
+from app.database.base import Base
+from app.database.session import create_session_factory
+from app.models.v6_single_backtest import V6SingleBacktestArtifact
+
+def test_reconcile_updates_the_artifact_table(tmp_path, monkeypatch):
+    engine, _, factory = create_session_factory(f"sqlite+aiosqlite:///{tmp_path}/bt.db", False)
+    monkeypatch.setattr(artifacts, "SessionLocal", factory)
+    finished_at = datetime(2024, 1, 1)
+    index = ArtifactIndex()
+    for backtest_id in (1, 2, 3):
+        plots_dir = tmp_path / str(backtest_id)
+        plots_dir.mkdir()
+        (plots_dir / "stats.json").write_text("{}")
+        index.put(backtest_id, ArtifactEntry(plots_dir=str(plots_dir), finished_at=finished_at, files=scan_files(str(plots_dir))))
+
+    async def main():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with factory() as db:
+            for backtest_id in (1, 2, 3):
+                entry = index.get(backtest_id, finished_at)
+                db.add(V6SingleBacktestArtifact(backtest_id=backtest_id, plots_dir=entry.plots_dir, files=entry.files, finished_at=finished_at))
+            await db.commit()
+
+        (tmp_path / "1" / "stats.json").write_text('{"adg": 1}')
+        shutil.rmtree(tmp_path / "2")
+        assert await index.reconcile_and_persist() == 1
+
+        async with factory() as db:
+            rows = {row.backtest_id: row for row in (await db.execute(select(V6SingleBacktestArtifact))).scalars()}
+        await engine.dispose()
+        return rows
+
+    rows = asyncio.run(main())
+    assert sorted(rows) == [1, 3]
+    assert rows[1].files["stats.json"]["size"] == os.path.getsize(tmp_path / "1" / "stats.json")
+    assert index.get(2, finished_at) is None
\ No newline at end of file
@@ -0,0 +1,113 @@
+import asyncio
+from types import SimpleNamespace
+import httpx
+import pytest
+from app.coinmarket import client as client_module
+from app.coinmarket.client import CoinMarketCapClient
+from app.core.config import settings
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(client_module, "asyncio", SimpleNamespace(sleep=sleep))
+    monkeypatch.setattr(settings, "CMC_MAX_RETRIES", 3)
+    monkeypatch.setattr(settings, "CMC_RETRY_BACKOFF_SECONDS", 0.5)
+    return delays
+
+def make_client(responses, calls):
+    """
+    A client whose transport answers with `responses` in turn: status codes, (status, headers)
+    pairs, or exceptions to raise.
+    """
+    responses = iter(responses)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        status, headers = response if isinstance(response, tuple) else (response, {})
+        return httpx.Response(status, headers=headers, json={"status": {"error_code": 0}})
+
+    return CoinMarketCapClient(base_url="https://cmc.test", transport=httpx.MockTransport(handler))
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_retries_429_and_5xx_with_backoff(sleeps):
+    calls = []
+    client = make_client([429, 503, 200], calls)
+    response = run(client.get("/v1/x", "key"))
+    assert response.status_code == 200
+    assert len(calls) == 3
+    assert calls[0].headers["X-CMC_PRO_API_KEY"] == "key"
+    assert sleeps == [0.5, 1.0]
+
+def test_honours_retry_after(sleeps):
+    calls = []
+    client = make_client([(429, {"Retry-After": "7"}), (503, {"Retry-After": "3600"}), 200], calls)
+    assert run(client.get("/v1/x", "key")).status_code == 200
+    # Retry-After wins over a shorter backoff and is capped at a minute
+    assert sleeps == [7.0, 60.0]
+
+def test_returns_the_last_error_response_once_retries_are_exhausted(sleeps):
+    calls = []
+    client = make_client([500] * 4, calls)
+    assert run(client.get("/v1/x", "key")).status_code == 500
+    assert len(calls) == 4
+    assert sleeps == [0.5, 1.0, 2.0]
+
+def test_client_errors_are_not_retried(sleeps):
+    calls = []
+    client = make_client([401], calls)
+    assert run(client.get("/v1/x", "key")).status_code == 401
+    assert len(calls) == 1 and sleeps == []
+
+def test_retries_timeouts_then_raises(sleeps):
+    calls = []
+    client = make_client([httpx.ReadTimeout("slow"), 200], calls)
+    assert run(client.get("/v1/x", "key")).status_code == 200
+
+    calls = []
+    client = make_client([httpx.ConnectTimeout("down")] * 4, calls)
+    with pytest.raises(httpx.ConnectTimeout):
+        run(client.get("/v1/x", "key"))
+    assert len(calls) == 4
+
+def test_verify_cache_ttl(sleeps, monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(client_module, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    monkeypatch.setattr(settings, "CMC_VERIFY_CACHE_TTL", 300.0)
+    calls = []
+    client = make_client([200, 401, 200], calls)
+
+    assert run(client.verify_key("a")).status_code == 200
+    assert run(client.verify_key("a")).status_code == 200
+    assert len(calls) == 1
+    # Cached per key, invalid keys included
+    assert run(client.verify_key("b")).status_code == 401
+    assert run(client.verify_key("b")).status_code == 401
+    assert len(calls) == 2
+    now[0] += 301
+    assert run(client.verify_key("a")).status_code == 200
+    assert len(calls) == 3
+
+def test_verify_does_not_cache_retryable_failures(sleeps, monkeypatch):
+    monkeypatch.setattr(settings, "CMC_MAX_RETRIES", 0)
+    calls = []
+    client = make_client([503, 200], calls)
+    assert run(client.verify_key("a")).status_code == 503
+    assert run(client.verify_key("a")).status_code == 200
+    assert len(calls) == 2
+
+def test_forget_key(sleeps):
+    calls = []
+    client = make_client([200, 200], calls)
+    run(client.verify_key("a"))
+    client.forget_key("a")
+    run(client.verify_key("a"))
+    assert len(calls) == 2
\ No newline at end of file
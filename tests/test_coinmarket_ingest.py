@@ -0,0 +1,189 @@
+import asyncio
+from datetime import datetime, timedelta
+import httpx
+import pytest
+from sqlalchemy import select, update
+from app.coinmarket import ingest
+from app.coinmarket.client import CoinMarketCapClient
+from app.coinmarket.ingest import CoinMarketIngestor, IngestError
+from app.core.config import settings
+from app.database.base import Base
+from app.database.session import create_session_factory
+from app.models.coinmarket import CoinMarketCap, CoinListing, CoinMetadata
+
+def coin(cmc_id: int, rank: int, last_updated: str = "2024-01-01T00:00:00.000Z", price: float = 1.0) -> dict:
+    return {
+        "id": cmc_id, "symbol": f"C{cmc_id}", "name": f"Coin{cmc_id}", "slug": f"coin-{cmc_id}", "cmc_rank": rank,
+        "quote": {"USD": {"price": price, "market_cap": 1e9 / rank, "last_updated": last_updated}},
+    }
+
+class FakeCMC:
+    """
+    The CoinMarketCap endpoints used by ingestion, served from `coins` (in rank order).
+    `on_page` runs after each listings page, e.g. to move coins between pages.
+    """
+
+    def __init__(self, count: int):
+        self.coins = [coin(i, i) for i in range(1, count + 1)]
+        self.calls: list[tuple[str, dict]] = []
+        self.on_page = None
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        params = dict(request.url.params)
+        self.calls.append((request.url.path, params))
+        if request.url.path == "/v1/cryptocurrency/listings/latest":
+            start, limit = int(params["start"]), int(params["limit"])
+            page = self.coins[start - 1:start - 1 + limit]
+            if self.on_page is not None:
+                self.on_page(self)
+            return httpx.Response(200, json={"status": {"error_code": 0}, "data": page})
+        if request.url.path == "/v2/cryptocurrency/info":
+            ids = [int(i) for i in params["id"].split(",")]
+            return httpx.Response(200, json={"status": {"error_code": 0}, "data": {
+                str(i): {"id": i, "symbol": f"C{i}", "name": f"Coin{i}", "tags": []} for i in ids
+            }})
+        return httpx.Response(404, json={"status": {"error_message": "not found"}})
+
+    def listing_pages(self) -> list[tuple[int, int]]:
+        return [(int(p["start"]), int(p["limit"])) for path, p in self.calls if path.endswith("/listings/latest")]
+
+class Snapshot:
+    def __init__(self):
+        self.reloads = 0
+
+    async def reload(self):
+        self.reloads += 1
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    """
+    An ingestor wired to a fresh SQLite database and a FakeCMC with 1200 coins.
+    """
+    engine, _, factory = create_session_factory(f"sqlite+aiosqlite:///{tmp_path}/cmc.db", False)
+    fake = FakeCMC(1200)
+    snapshot = Snapshot()
+    monkeypatch.setattr(ingest, "SessionLocal", factory)
+    monkeypatch.setattr(ingest, "coin_snapshot", snapshot)
+    monkeypatch.setattr(settings, "CMC_LISTINGS_PAGE_SIZE", 500)
+    monkeypatch.setattr(settings, "CMC_METADATA_BATCH_SIZE", 100)
+    client = CoinMarketCapClient(base_url="https://cmc.test", transport=httpx.MockTransport(fake.handler))
+    ingestor = CoinMarketIngestor(client)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with factory() as db:
+            db.add(CoinMarketCap(coin_market_cap_api_key="key", fetch_limit=1100, fetch_interval=24, metadata_interval=7))
+            await db.commit()
+
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(setup())
+
+    class Env:
+        pass
+    e = Env()
+    e.fake, e.snapshot, e.ingestor, e.factory = fake, snapshot, ingestor, factory
+    e.run = loop.run_until_complete
+
+    async def query(stmt):
+        async with factory() as db:
+            return (await db.execute(stmt)).all()
+    e.query = lambda stmt: loop.run_until_complete(query(stmt))
+
+    async def set_config(**values):
+        async with factory() as db:
+            await db.execute(update(CoinMarketCap).values(**values))
+            await db.commit()
+    e.set_config = lambda **values: loop.run_until_complete(set_config(**values))
+    yield e
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+def stored_ids(env) -> set[int]:
+    return {row[0] for row in env.query(select(CoinListing.cmc_id))}
+
+def test_paginates_up_to_fetch_limit(env):
+    written = env.run(env.ingestor.run_once())
+    assert written == {"listings": 1100, "metadata": 1100}
+    assert env.fake.listing_pages() == [(1, 500), (501, 500), (1001, 100)]
+    assert stored_ids(env) == set(range(1, 1101))
+    assert len(env.query(select(CoinMetadata.cmc_id))) == 1100
+    assert env.snapshot.reloads == 1
+
+def test_stops_at_a_short_page(env):
+    env.fake.coins = env.fake.coins[:700]
+    assert env.run(env.ingestor.run_once())["listings"] == 700
+    assert env.fake.listing_pages() == [(1, 500), (501, 500)]
+
+def test_coins_moving_between_pages_are_stored_once(env):
+    def new_leader(fake):
+        # A new coin enters at the top while we page: page 2 repeats the last coin of page 1.
+        if len(fake.listing_pages()) == 1:
+            fake.coins.insert(0, coin(9999, 1))
+    env.fake.on_page = new_leader
+    assert env.run(env.ingestor.run_once())["listings"] == 1099
+    assert len(env.query(select(CoinListing.cmc_id))) == 1099
+
+def test_upsert_only_rewrites_changed_coins(env):
+    env.run(env.ingestor.run_once())
+    env.fake.coins[0] = coin(1, 1, last_updated="2024-01-02T00:00:00.000Z", price=2.0)
+    env.fake.coins[1] = coin(2, 2, price=3.0)  # same last_updated: not rewritten
+    env.run(env.ingestor.run_once(force=True))
+    prices = dict(env.query(select(CoinListing.cmc_id, CoinListing.price).where(CoinListing.cmc_id.in_([1, 2]))))
+    assert prices == {1: 2.0, 2: 1.0}
+
+def test_coins_no_longer_listed_are_removed(env):
+    env.run(env.ingestor.run_once())
+    env.set_config(fetch_limit=300)
+    env.fake.coins = [c for c in env.fake.coins if c["id"] != 5]
+    assert env.run(env.ingestor.run_once(force=True))["listings"] == 300
+    assert stored_ids(env) == set(range(1, 302)) - {5}
+
+def test_empty_listings_keep_the_store(env):
+    env.run(env.ingestor.run_once())
+    env.set_config(listings_fetched_at=None)
+    env.fake.coins = []
+    with pytest.raises(IngestError):
+        env.run(env.ingestor.run_once())
+    assert len(stored_ids(env)) == 1100
+    assert env.query(select(CoinMarketCap.listings_fetched_at))[0][0] is None
+
+async def set_metadata_fetched_at(env, fetched_at: datetime, where):
+    async with env.factory() as db:
+        await db.execute(update(CoinMetadata).where(where).values(fetched_at=fetched_at))
+        await db.commit()
+
+def test_work_is_only_done_when_due(env):
+    env.run(env.ingestor.run_once())
+    calls = len(env.fake.calls)
+    assert env.run(env.ingestor.run_once()) == {"listings": 0, "metadata": 0}
+    assert len(env.fake.calls) == calls
+    assert env.snapshot.reloads == 1
+
+    # Listings are due again after fetch_interval hours; metadata only after metadata_interval days.
+    env.set_config(listings_fetched_at=datetime.utcnow() - timedelta(hours=25))
+    assert env.run(env.ingestor.run_once()) == {"listings": 1100, "metadata": 0}
+    # Then only coins whose metadata is older than that are refreshed.
+    week_ago = datetime.utcnow() - timedelta(days=8)
+    env.set_config(metadata_fetched_at=week_ago)
+    env.run(set_metadata_fetched_at(env, week_ago, CoinMetadata.cmc_id <= 10))
+    assert env.run(env.ingestor.run_once())["metadata"] == 10
+
+def test_nothing_without_an_api_key(env):
+    env.set_config(coin_market_cap_api_key=None)
+    assert env.run(env.ingestor.run_once(force=True)) == {"listings": 0, "metadata": 0}
+    assert env.fake.calls == []
+
+def test_snapshot_is_reloaded_after_a_partial_failure(env, monkeypatch):
+    monkeypatch.setattr(settings, "CMC_MAX_RETRIES", 0)
+    handler = env.fake.handler
+
+    def metadata_down(request):
+        if request.url.path == "/v2/cryptocurrency/info":
+            return httpx.Response(500, json={"status": {"error_message": "down"}})
+        return handler(request)
+    env.ingestor.client = CoinMarketCapClient(base_url="https://cmc.test", transport=httpx.MockTransport(metadata_down))
+    with pytest.raises(IngestError):
+        env.run(env.ingestor.run_once())
+    assert len(stored_ids(env)) == 1100
+    assert env.snapshot.reloads == 1
\ No newline at end of file
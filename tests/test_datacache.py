@@ -0,0 +1,66 @@
+import asyncio
+import os
+import numpy as np
+import pytest
+from app.backtest.datacache import FlightAborted, MarketDataCache, _npy_complete
+
+RANGE = ("binance", "BTCUSDT", "2024-01-01", "2024-02-01")
+
+def write_ticks(cache, truncate=0):
+    path = os.path.join(cache.partition_dir("binance", "BTCUSDT"), "2024-01-01_2024-02-01_ticks_cache.npy")
+    np.save(path, np.arange(1000, dtype=np.float64))
+    if truncate:
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - truncate)
+    return path
+
+def test_truncated_npy_is_incomplete(tmp_path):
+    cache = MarketDataCache(str(tmp_path), 1 << 30)
+    os.makedirs(cache.partition_dir("binance", "BTCUSDT"))
+    assert _npy_complete(write_ticks(cache))
+    assert cache.range_complete(*RANGE)
+    assert not _npy_complete(write_ticks(cache, truncate=8))
+    assert not cache.range_complete(*RANGE)
+
+def test_waiters_go_once_the_download_is_complete(tmp_path):
+    cache = MarketDataCache(str(tmp_path), 1 << 30, poll_interval=0.01)
+
+    async def main():
+        async with cache.single_flight(*RANGE) as leader:
+            assert leader.is_leader
+            waiter = asyncio.create_task(cache.single_flight(*RANGE).__aenter__())
+            await asyncio.sleep(0.1)
+            assert not waiter.done()
+            watcher = asyncio.create_task(cache.watch_download(leader, *RANGE))
+            write_ticks(cache)
+            # The leader is still running its backtest
+            follower = await asyncio.wait_for(waiter, 5)
+            assert not follower.is_leader
+            await watcher
+    asyncio.run(main())
+
+def test_waiting_stops_when_cancelled(tmp_path):
+    cache = MarketDataCache(str(tmp_path), 1 << 30, poll_interval=0.01)
+
+    async def should_stop():
+        return "cancelled"
+
+    async def main():
+        async with cache.single_flight(*RANGE) as leader:
+            assert leader.is_leader
+            with pytest.raises(FlightAborted) as e:
+                async with cache.single_flight(*RANGE, should_stop=should_stop):
+                    pass
+            assert e.value.reason == "cancelled"
+    asyncio.run(main())
+
+def test_new_leader_drops_partial_downloads(tmp_path):
+    cache = MarketDataCache(str(tmp_path), 1 << 30)
+    os.makedirs(cache.partition_dir("binance", "BTCUSDT"))
+    path = write_ticks(cache, truncate=8)
+
+    async def main():
+        async with cache.single_flight(*RANGE) as leader:
+            assert leader.is_leader
+            assert not os.path.exists(path)
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,60 @@
+import numpy as np
+from app.backtest.downsample import lttb_indices, minmax_indices, select_stats
+from app.backtest.stats import StatsColumns
+
+def test_lttb_keeps_endpoints_and_count():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 50)
+    indices = lttb_indices(x, y, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+def test_lttb_keeps_spikes():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[437] = 100.0
+    assert 437 in lttb_indices(x, y, 50)
+
+def test_lttb_small_inputs():
+    x = np.arange(5, dtype=np.float64)
+    assert lttb_indices(x, x, 10).tolist() == [0, 1, 2, 3, 4]
+    assert lttb_indices(x, x, 2).tolist() == [0, 4]
+
+def test_minmax_keeps_extremes():
+    y = np.zeros(1000)
+    y[10], y[990] = -5.0, 5.0
+    indices = minmax_indices(y, 20)
+    assert 10 in indices and 990 in indices
+    assert len(indices) <= 22
+
+def make_stats(rows: int) -> StatsColumns:
+    rng = np.random.default_rng(0)
+    columns = {
+        "timestamp": np.arange(rows, dtype=np.float64) * 60_000,
+        "balance": np.cumsum(rng.standard_normal(rows)),
+        "equity": np.cumsum(rng.standard_normal(rows)),
+        "price": np.cumsum(rng.standard_normal(rows)),
+        "symbol": np.array(["BTC"] * rows),
+    }
+    return StatsColumns(list(columns), columns)
+
+def test_select_stats_never_exceeds_points():
+    stats = make_stats(10_000)
+    for points in (2, 3, 10, 97, 500):
+        selected = select_stats(stats, points)
+        assert 2 <= len(selected) <= points
+        timestamps = np.asarray(selected.columns["timestamp"])
+        assert timestamps[0] == 0 and timestamps[-1] == 9_999 * 60_000
+        assert np.all(np.diff(timestamps) > 0)
+
+def test_select_stats_window_and_columns():
+    stats = make_stats(1_000)
+    selected = select_stats(stats, 50, ["balance"], start=60_000 * 100, end=60_000 * 199)
+    assert selected.names == ["timestamp", "balance"]
+    assert len(selected) == 50
+    assert selected.columns["timestamp"][0] == 60_000 * 100 and selected.columns["timestamp"][-1] == 60_000 * 199
+
+def test_select_stats_without_points_returns_the_window():
+    stats = make_stats(100)
+    assert len(select_stats(stats, None, start=60_000 * 10)) == 90
\ No newline at end of file
@@ -0,0 +1,18 @@
+from app.database.instrumentation import statement_template
+
+def test_whitespace_is_collapsed():
+    assert statement_template("SELECT *\n  FROM t\n\tWHERE id = ?  ") == "SELECT * FROM t WHERE id = ?"
+
+def test_in_lists_fold_to_one_template():
+    short = statement_template("SELECT * FROM t WHERE id IN (?, ?)")
+    long = statement_template("SELECT * FROM t WHERE id IN (?,?,?,?,?)")
+    assert short == long == "SELECT * FROM t WHERE id IN (?, ...)"
+
+def test_multi_row_values_fold_to_one_template():
+    two = statement_template("INSERT INTO t (a, b) VALUES (?, ?), (?, ?)")
+    three = statement_template("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)")
+    assert two == three == "INSERT INTO t (a, b) VALUES (?, ...), ..."
+    assert statement_template("INSERT INTO t (a, b) VALUES (?, ?)") == "INSERT INTO t (a, b) VALUES (?, ...)"
+
+def test_single_placeholder_is_kept():
+    assert statement_template("SELECT * FROM t WHERE id IN (?)") == "SELECT * FROM t WHERE id IN (?)"
\ No newline at end of file
@@ -0,0 +1,23 @@
+from datetime import datetime
+import pytest
+from app.crud.v6_single_backtest import decode_cursor, encode_cursor
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor("BTCUSDT", 42), "symbol") == ("BTCUSDT", 42)
+    assert decode_cursor(encode_cursor(0.125, 7), "adg") == (0.125, 7)
+
+def test_cursor_dates_are_restored_as_datetimes():
+    start = datetime(2021, 1, 1, 12, 30)
+    assert decode_cursor(encode_cursor(start, 3), "start_date") == (start, 3)
+
+def test_cursor_keeps_null_sort_values():
+    assert decode_cursor(encode_cursor(None, 9), "start_date") == (None, 9)
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor("a/b+c?" * 10, 1)
+    assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+
+@pytest.mark.parametrize("cursor", ["garbage", "", encode_cursor("x", 1)[:-3]])
+def test_malformed_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "id")
\ No newline at end of file
@@ -0,0 +1,43 @@
+import math
+import pytest
+from app import rate_limit
+from app.rate_limit import TokenBucketLimiter
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+def test_burst_then_wait(clock):
+    limiter = TokenBucketLimiter(burst=3, rate_per_second=2.0)
+    assert [limiter.acquire("k") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("k") == pytest.approx(0.5)
+    clock[0] += 0.5
+    assert limiter.acquire("k") == 0
+
+def test_refill_is_capped_at_burst(clock):
+    limiter = TokenBucketLimiter(burst=2, rate_per_second=1.0)
+    limiter.acquire("k")
+    clock[0] += 60
+    assert [limiter.acquire("k") for _ in range(3)][:2] == [0, 0]
+    assert limiter.acquire("k") > 0
+
+def test_keys_are_independent(clock):
+    limiter = TokenBucketLimiter(burst=1, rate_per_second=1.0)
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") > 0
+    assert limiter.acquire("b") == 0
+
+def test_zero_rate_never_refills(clock):
+    limiter = TokenBucketLimiter(burst=1, rate_per_second=0)
+    assert limiter.acquire("k") == 0
+    assert limiter.acquire("k") == math.inf
+
+def test_least_recently_used_buckets_are_forgotten(clock):
+    limiter = TokenBucketLimiter(burst=1, rate_per_second=0.001, max_keys=2)
+    for key in ("a", "b", "c"):
+        assert limiter.acquire(key) == 0
+    # "a" was dropped and starts full again; "c" is still empty
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("c") > 0
\ No newline at end of file
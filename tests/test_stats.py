@@ -0,0 +1,30 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from app.backtest.stats import StatsCache, convert_stats_csv
+
+def write_csv(path, rows):
+    with open(path, "w") as f:
+        f.write("timestamp,balance,symbol\n")
+        for i in range(rows):
+            f.write(f"{i},{1000 + i},BTC\n")
+
+def test_concurrent_conversions(tmp_path):
+    csv_path = str(tmp_path / "stats.csv")
+    write_csv(csv_path, 500)
+    with ThreadPoolExecutor(8) as pool:
+        list(pool.map(lambda _: convert_stats_csv(csv_path), range(16)))
+    assert sorted(os.listdir(tmp_path)) == ["stats.csv", "stats.csv.cols"]
+    stats = StatsCache(4).get(csv_path)
+    assert stats.names == ["timestamp", "balance", "symbol"]
+    assert np.asarray(stats.columns["balance"])[-1] == 1499
+
+def test_reconverted_when_the_csv_changes(tmp_path):
+    csv_path = str(tmp_path / "stats.csv")
+    write_csv(csv_path, 10)
+    cache = StatsCache(4)
+    old = cache.get(csv_path)
+    write_csv(csv_path, 20)
+    assert len(cache.get(csv_path)) == 20
+    # Columns mapped from the previous conversion stay readable
+    assert len(old) == 10 and np.asarray(old.columns["balance"]).sum() == sum(range(1000, 1010))
\ No newline at end of file
@@ -0,0 +1,39 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from app.backtest.store import compute_run_hash, link_stored_run, store_run
+from app.core.config import settings
+
+def make_run(root):
+    plots_dir = root / "plots" / "2024-01-01T00_00_00"
+    plots_dir.mkdir(parents=True)
+    for i in range(50):
+        (plots_dir / f"f{i}.txt").write_text("x" * 100)
+    log_path = root / "run.log"
+    log_path.write_text("log\n")
+    return str(plots_dir), str(log_path)
+
+def test_hash_depends_on_config_and_params():
+    assert compute_run_hash({"a": 1, "b": 2}, {"s": "X"}) == compute_run_hash({"b": 2, "a": 1}, {"s": "X"})
+    assert compute_run_hash({"a": 1}, {"s": "X"}) != compute_run_hash({"a": 1}, {"s": "Y"})
+
+def test_concurrent_stores_of_the_same_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "BACKTEST_STORE_DIR", str(tmp_path / "store"))
+    plots_dir, log_path = make_run(tmp_path)
+    run_hash = "ab" * 32
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: store_run(run_hash, plots_dir, log_path), range(16)))
+    assert len(set(results)) == 1
+    assert os.listdir(tmp_path / "store" / "ab") == [run_hash]
+
+def test_rewriting_the_log_does_not_change_the_stored_copy(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "BACKTEST_STORE_DIR", str(tmp_path / "store"))
+    plots_dir, log_path = make_run(tmp_path)
+    run_dir = store_run("cd" * 32, plots_dir, log_path)
+    with open(log_path, "wb") as f:
+        f.write(b"rerun")
+    assert open(os.path.join(run_dir, "backtest.log")).read() == "log\n"
+
+    reused_log = str(tmp_path / "reused.log")
+    assert link_stored_run("cd" * 32, str(tmp_path / "reused"), reused_log)
+    assert open(reused_log).read().startswith("log\n")
+    assert not link_stored_run("ef" * 32, str(tmp_path / "missing"), reused_log)
\ No newline at end of file
@@ -0,0 +1,54 @@
+import pytest
+from app.crud.v6_single_backtest import expand_sweep
+from app.schemas.v6_single_backtest import V6SingleBacktestSweepCreate
+
+BASE = {
+    "config": {"long": {"a": 1}}, "account_name": "acc", "exchange": "bybit", "symbol": "BTCUSDT",
+    "market_type": "futures", "model": "m", "start_date": "2021-01-01", "end_date": "2022-01-01",
+    "initial_capital": 1000,
+}
+
+def sweep(**kwargs) -> V6SingleBacktestSweepCreate:
+    return V6SingleBacktestSweepCreate(name="sw", base=BASE, **kwargs)
+
+def test_items_times_grid():
+    backtests = expand_sweep(sweep(
+        items=[{"symbol": "BTCUSDT"}, {"symbol": "ETHUSDT"}],
+        grid={"config.long.b": [1, 2, 3], "initial_capital": [10, 20]},
+    ))
+    assert len(backtests) == 12
+    assert [b.name for b in backtests[:2]] == ["sw_00000", "sw_00001"]
+    assert {(b.symbol, b.config["long"]["b"], b.initial_capital) for b in backtests} == {
+        (symbol, value, capital) for symbol in ("BTCUSDT", "ETHUSDT") for value in (1, 2, 3) for capital in (10, 20)
+    }
+    # The base config is copied, not shared
+    assert all(b.config["long"]["a"] == 1 for b in backtests)
+    assert BASE["config"] == {"long": {"a": 1}}
+
+def test_without_grid_or_items():
+    assert [b.name for b in expand_sweep(sweep())] == ["sw_00000"]
+
+def test_too_large(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "BACKTEST_SWEEP_MAX_ITEMS", 5)
+    with pytest.raises(ValueError, match="limit"):
+        expand_sweep(sweep(grid={"initial_capital": list(range(6))}))
+
+def test_invalid_item():
+    with pytest.raises(ValueError, match="Sweep item 0"):
+        expand_sweep(sweep(items=[{"start_date": "not a date"}]))
+
+def test_duplicate_names():
+    with pytest.raises(ValueError, match="duplicate"):
+        expand_sweep(sweep(items=[{"name": "same"}, {"name": "same"}]))
+
+def test_huge_grid_is_rejected_without_expanding():
+    grid = {f"config.k{i}": list(range(10)) for i in range(9)}
+    with pytest.raises(ValueError, match="2000000000 backtests"):
+        expand_sweep(sweep(grid=grid, items=[{}, {}]))
+
+def test_largest_allowed_sweep(monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "BACKTEST_SWEEP_MAX_ITEMS", 10000)
+    backtests = expand_sweep(sweep(grid={"config.a": list(range(100)), "config.b": list(range(100))}))
+    assert len(backtests) == 10000 and len({b.name for b in backtests}) == 10000
\ No newline at end of file